@@ -123,7 +123,7 @@ def pymt_plugin_activate(w, ctx):
 
 
 def pymt_plugin_deactivate(w, ctx):
-    w.children = []
+    w.children.clear()
 
 
 
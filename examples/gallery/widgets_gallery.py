@@ -193,7 +193,7 @@ if __name__ == '__main__':
     current = None
     def select_screen(callback, *largs):
         w = getWindow()
-        w.children = []
+        w.children.clear()
         w.add_widget(lbox)
 
         anchor = MTAnchorLayout(pos=(150, 0))
@@ -60,6 +60,7 @@ pymt_options = {
     'svg': ('squirtle',),
     'spelling': ('enchant', 'osxappkit',),
     'clipboard': ('pygame', 'dummy'),
+    'clock': ('monotonic', 'wall'),
 }
 
 # Read environment
@@ -148,12 +149,15 @@ if not 'PYMT_DOC_INCLUDE' in os.environ:
     from pymt.exceptions import *
     from pymt.resources import *
     from pymt.cache import Cache
+    from pymt.diskcache import DiskCache
+    from pymt.httpfetch import *
 
     # system dependices
     from pymt.utils import *
     from pymt.event import *
     from pymt.clock import *
     from pymt.texture import *
+    from pymt.atlas import *
     from pymt.plugin import *
 
     # internal dependices
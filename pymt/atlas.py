@@ -0,0 +1,389 @@
+'''
+Atlas: pack small images into shared textures
+
+Every image loaded in PyMT have his own texture. With hundreds of icons or
+thumbnails, the texture binds are dominating the drawing, and the elements
+cannot be batched together. An atlas store the small images in a few big
+power-of-two textures (pages), and return a :class:`TextureRegion` for each
+image ::
+
+    atlas = Atlas(page_size=1024)
+    region = atlas.add_image('icons/folder.png', imagedata)
+
+    # later, get it again from the key
+    region = atlas.get('icons/folder.png')
+
+The images are placed with a skyline bottom-left packing. When an image is
+removed, his space is reused after a repack of the page: the remaining images
+are placed again, and their regions are updated in place (the on_repack event
+is dispatched, the graphics using the tex_coords must be rebuilt). When all
+the pages are full, the images not used since the longest time are evicted.
+
+The atlas use OpenGL, it must be used from the main thread.
+'''
+
+__all__ = ('Atlas', 'SkylinePacker')
+
+from pymt.utils import OrderedDict
+from pymt.logger import pymt_logger
+from pymt.event import EventDispatcher
+from pymt.texture import Texture, _nearest_pow2
+from OpenGL.GL import GL_RGBA
+
+class SkylinePacker(object):
+    '''Skyline bin packing of rectangles in a fixed area. The skyline is the
+    list of the top edges of the placed rectangles, each rectangle is put at
+    the lowest position (and the narrowest segment if equal).
+
+    :Parameters:
+        `width` : int
+            Width of the area
+        `height` : int
+            Height of the area
+    '''
+
+    __slots__ = ('width', 'height', 'skyline', 'used')
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.reset()
+
+    def reset(self):
+        '''Remove all the rectangles'''
+        # list of segments (x, y, width)
+        self.skyline = [(0, 0, self.width)]
+        self.used = 0
+
+    def insert(self, width, height):
+        '''Place a rectangle, return his position (x, y), or None if there is
+        no space for it'''
+        skyline = self.skyline
+        best = None
+        for index in xrange(len(skyline)):
+            y = self._fit(index, width, height)
+            if y is None:
+                continue
+            top = y + height
+            if best is None or top < best[0] or \
+               (top == best[0] and skyline[index][2] < best[1]):
+                best = (top, skyline[index][2], index, y)
+        if best is None:
+            return None
+        index, y = best[2], best[3]
+        x = skyline[index][0]
+        self._add_level(index, x, y, width, height)
+        self.used += width * height
+        return x, y
+
+    def _fit(self, index, width, height):
+        # return the y position of a rectangle placed on the segment index
+        skyline = self.skyline
+        x = skyline[index][0]
+        if x + width > self.width:
+            return None
+        remaining = width
+        y = 0
+        while remaining > 0:
+            if index >= len(skyline):
+                return None
+            y = max(y, skyline[index][1])
+            if y + height > self.height:
+                return None
+            remaining -= skyline[index][2]
+            index += 1
+        return y
+
+    def _add_level(self, index, x, y, width, height):
+        skyline = self.skyline
+        skyline.insert(index, (x, y + height, width))
+        # shrink or remove the segments under the new one
+        index += 1
+        while index < len(skyline):
+            px, py, pw = skyline[index - 1]
+            sx, sy, sw = skyline[index]
+            if sx >= px + pw:
+                break
+            shrink = px + pw - sx
+            if sw <= shrink:
+                del skyline[index]
+                continue
+            skyline[index] = (sx + shrink, sy, sw - shrink)
+            break
+        # merge the segments at the same height
+        index = 0
+        while index < len(skyline) - 1:
+            sx, sy, sw = skyline[index]
+            if sy == skyline[index + 1][1]:
+                skyline[index] = (sx, sy, sw + skyline[index + 1][2])
+                del skyline[index + 1]
+            else:
+                index += 1
+
+
+class AtlasEntry(object):
+    '''(internal) Image stored in an atlas page'''
+
+    __slots__ = ('key', 'region', 'page', 'data', 'size', 'mode')
+
+    def __init__(self, key, data, size, mode):
+        self.key = key
+        self.data = data
+        self.size = size
+        self.mode = mode
+        self.region = None
+        self.page = None
+
+
+class AtlasPage(object):
+    '''(internal) A texture of the atlas, with his packer'''
+
+    __slots__ = ('texture', 'packer', 'entries', 'padding')
+
+    def __init__(self, size, padding):
+        self.texture = Texture.create(size, size, GL_RGBA)
+        self.packer = SkylinePacker(size, size)
+        self.entries = set()
+        self.padding = padding
+
+    def insert(self, entry):
+        '''Place and blit an entry, return False if there is no space'''
+        padding = self.padding
+        width, height = entry.size
+        pos = self.packer.insert(width + padding * 2, height + padding * 2)
+        if pos is None:
+            return False
+        x, y = pos[0] + padding, pos[1] + padding
+        self.texture.blit_buffer(entry.data, size=entry.size,
+                                 mode=entry.mode, pos=(x, y))
+        region = self.texture.get_region(x, y, width, height)
+        if entry.region is None:
+            entry.region = region
+        else:
+            # keep the same region object, it's maybe used somewhere
+            entry.region.x = x
+            entry.region.y = y
+            entry.region.tex_coords = region.tex_coords
+        entry.page = self
+        self.entries.add(entry)
+        return True
+
+    def remove(self, entry):
+        self.entries.discard(entry)
+        entry.page = None
+
+    def repack(self, extra=()):
+        '''Place again all the entries of the page, with the extra ones.
+        Return False (and change nothing) if they don't fit.'''
+        padding = self.padding * 2
+        entries = list(self.entries) + list(extra)
+        entries.sort(key=lambda e: (max(e.size), min(e.size)), reverse=True)
+        packer = SkylinePacker(self.packer.width, self.packer.height)
+        for entry in entries:
+            width, height = entry.size
+            if packer.insert(width + padding, height + padding) is None:
+                return False
+        # clear the texture, the padding must not contain old pixels
+        width, height = self.texture.size
+        self.texture.blit_buffer('\x00' * (width * height * 4),
+                                 size=(width, height), mode='RGBA')
+        self.packer.reset()
+        self.entries = set()
+        for entry in entries:
+            self.insert(entry)
+        return True
+
+    @property
+    def free_space(self):
+        return self.packer.width * self.packer.height - self.used
+
+    @property
+    def used(self):
+        padding = self.padding * 2
+        return sum([(e.size[0] + padding) * (e.size[1] + padding)
+                    for e in self.entries])
+
+
+class Atlas(EventDispatcher):
+    '''Store small images in shared power-of-two textures.
+
+    :Parameters:
+        `page_size` : int, default to 1024
+            Size of the pages (rounded to the next power of two)
+        `max_image_size` : int, default to 256
+            Images bigger than this are not stored in the atlas
+        `max_pages` : int, default to 4
+            Maximum number of pages. When they are full, the least recently
+            used images are evicted.
+        `padding` : int, default to 1
+            Empty pixels around each image, to prevent the bleeding of the
+            neighbours when the texture is filtered
+
+    :Events:
+        `on_repack` (page_texture)
+            Fired when a page have been repacked: the regions of his images
+            have moved.
+        `on_evict` (key)
+            Fired when an image is evicted to make some room
+    '''
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('page_size', 1024)
+        kwargs.setdefault('max_image_size', 256)
+        kwargs.setdefault('max_pages', 4)
+        kwargs.setdefault('padding', 1)
+        super(Atlas, self).__init__(**kwargs)
+        self.register_event_type('on_repack')
+        self.register_event_type('on_evict')
+        self.page_size = _nearest_pow2(kwargs.get('page_size'))
+        self.max_image_size = kwargs.get('max_image_size')
+        self.max_pages = kwargs.get('max_pages')
+        self.padding = kwargs.get('padding')
+        self._pages = []
+        # key -> entry, from the least to the most recently used
+        self._entries = OrderedDict()
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        '''Return the region of an image, or None if it's not in the atlas'''
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return None
+        self._entries[key] = entry
+        return entry.region
+
+    def add_image(self, key, image):
+        '''Add an :class:`ImageData` in the atlas. See add().'''
+        return self.add(key, image.data, (image.width, image.height),
+                        image.mode)
+
+    def add(self, key, data, size, mode='RGBA'):
+        '''Add an image in the atlas, and return his :class:`TextureRegion`.
+        If the key is already in the atlas, the existing region is returned.
+        Return None if the image is too big for the atlas.
+
+        :Parameters:
+            `key` : object
+                Identifier of the image (filename...)
+            `data` : str
+                Pixels of the image
+            `size` : tuple
+                Size of the image (width, height)
+            `mode` : str, default to 'RGBA'
+                Mode of the data: RGB, RGBA, BGR or BGRA
+        '''
+        region = self.get(key)
+        if region is not None:
+            return region
+        width, height = size = tuple(size)
+        maxsize = min(self.max_image_size, self.page_size - self.padding * 2)
+        if width > maxsize or height > maxsize:
+            return None
+
+        entry = AtlasEntry(key, data, size, mode)
+        if not self._insert(entry):
+            pymt_logger.warning('Atlas: unable to store <%s>' % str(key))
+            return None
+        self._entries[key] = entry
+        return entry.region
+
+    def remove(self, key):
+        '''Remove an image from the atlas. His space will be reused after a
+        repack of the page.'''
+        entry = self._entries.pop(key, None)
+        if entry is not None and entry.page is not None:
+            entry.page.remove(entry)
+
+    def clear(self):
+        '''Remove all the images and the pages'''
+        self._entries.clear()
+        self._pages = []
+
+    def repack(self):
+        '''Repack all the pages, to reuse the space of the removed images'''
+        for page in self._pages:
+            if page.packer.used > page.used:
+                page.repack()
+                self.dispatch_event('on_repack', page.texture)
+
+    def get_stats(self):
+        '''Return a list with a dict for each page: the number of images, the
+        size of the page, the fill ratio of the area really used by the
+        images, and the ratio of the area allocated by the packer (used +
+        removed images).'''
+        stats = []
+        for page in self._pages:
+            area = float(page.packer.width * page.packer.height)
+            stats.append({
+                'images': len(page.entries),
+                'size': page.texture.size,
+                'fill': page.used / area,
+                'allocated': page.packer.used / area})
+        return stats
+
+    def on_repack(self, texture):
+        pass
+
+    def on_evict(self, key):
+        pass
+
+    def _insert(self, entry):
+        # 1. the free space of the pages
+        for page in self._pages:
+            if page.insert(entry):
+                return True
+        # 2. the space of the removed images
+        if self._insert_repack(entry):
+            return True
+        # 3. a new page
+        if self.max_pages is None or len(self._pages) < self.max_pages:
+            page = AtlasPage(self.page_size, self.padding)
+            self._pages.append(page)
+            return page.insert(entry)
+        # 4. evict the least recently used images of one page
+        if not self._pages:
+            return False
+        padding = self.padding * 2
+        needed = (entry.size[0] + padding) * (entry.size[1] + padding)
+        page = self._eviction_page(needed)
+        for key, old in self._entries.items():
+            if old.page is not page:
+                continue
+            del self._entries[key]
+            page.remove(old)
+            self.dispatch_event('on_evict', key)
+            if page.free_space >= needed and page.repack((entry, )):
+                self.dispatch_event('on_repack', page.texture)
+                return True
+        return False
+
+    def _eviction_page(self, needed):
+        # return the page where the least images must be evicted to free the
+        # needed area, when they are evicted from the least recently used
+        padding = self.padding * 2
+        free = dict((page, page.free_space) for page in self._pages)
+        count = dict((page, 0) for page in self._pages)
+        for old in self._entries.itervalues():
+            page = old.page
+            if free[page] >= needed:
+                continue
+            free[page] += (old.size[0] + padding) * (old.size[1] + padding)
+            count[page] += 1
+        return min(self._pages, key=count.__getitem__)
+
+    def _insert_repack(self, entry):
+        padding = self.padding * 2
+        needed = (entry.size[0] + padding) * (entry.size[1] + padding)
+        for page in self._pages:
+            # only if removed images have freed enough space
+            if page.packer.used - page.used < needed:
+                continue
+            if page.repack((entry, )):
+                self.dispatch_event('on_repack', page.texture)
+                return True
+        return False
@@ -17,8 +17,8 @@ import sys
 import os
 from pymt.logger import pymt_logger
 from pymt.exceptions import pymt_exception_manager, ExceptionManager
-from pymt.clock import getClock
-from pymt.input import TouchFactory, pymt_postproc_modules
+from pymt.clock import getClock, FramePacer
+from pymt.input import TouchFactory, TouchEventQueue, pymt_postproc_modules
 
 # private vars
 touch_list              = []
@@ -60,18 +60,52 @@ def getEventLoop():
 
 class TouchEventLoop(object):
     '''Main event loop. This loop handle update of input + dispatch event
+
+    The loop have 2 redraw modes, configurable with the `redraw_mode` token in
+    the graphics section of the configuration :
+
+        * continuous: the window is updated and drawn every frame (default)
+        * ondemand: the window is updated and drawn only when it have been
+          invalidated. An input, a Clock event, a running animation or a call
+          to invalidate() will invalidate the window. Clock events scheduled
+          with invalidate=False (cache purge, release of GL resources...)
+          don't. When nothing happen, the loop sleep until the next
+          scheduled event.
+
+    .. warning::
+        In ondemand mode, a widget that change itself in on_update() without
+        any Clock event must call invalidate() to be redrawn.
     '''
+
+    #: Maximum time to sleep in ondemand mode before polling input providers
+    input_poll_interval = 1 / 60.
+
     def __init__(self):
         super(TouchEventLoop, self).__init__()
         self.quit = False
-        self.input_events = []
+        self.input_events = TouchEventQueue(
+            pymt.pymt_config.get('pymt', 'input_coalesce'))
         self.postproc_modules = []
         self.status = 'idle'
+        self.redraw_mode = pymt.pymt_config.get('graphics', 'redraw_mode')
+        if self.redraw_mode not in ('continuous', 'ondemand'):
+            pymt_logger.warning('Base: Unknown redraw mode <%s>, '
+                                'use continuous' % self.redraw_mode)
+            self.redraw_mode = 'continuous'
+        self._invalid = True
+        #: Frame pacer, limit the frame rate. The target fps is taken from
+        #: the window when the loop start.
+        self.pacer = FramePacer(
+            fps=pymt.pymt_config.getfloat('graphics', 'fps'),
+            max_frame_skip=pymt.pymt_config.getint(
+                'graphics', 'max_frame_skip'))
 
     def start(self):
         '''Must be call only one time before run().
         This start all configured input providers.'''
         self.status = 'started'
+        if pymt_window:
+            self.pacer.fps = pymt_window.fps
         for provider in pymt_providers:
             provider.start()
 
@@ -172,12 +206,15 @@ class TouchEventLoop(object):
                 touch.pop()
         touch.grab_state = False
 
+    def invalidate(self):
+        '''Mark the window as invalid: it will be redrawn on the next frame.
+        Can be called from any thread, a sleeping loop is woken up.'''
+        self._invalid = True
+        getClock().wakeup()
+
     def _dispatch_input(self, event, touch):
-        ev = (event, touch)
-        # remove the save event for the touch if exist
-        if ev in self.input_events[:]:
-            self.input_events.remove(ev)
-        self.input_events.append(ev)
+        # coalesce with the pending events of the same touch
+        self.input_events.append(event, touch)
 
     def dispatch_input(self):
         '''Called by idle() to read events from input providers,
@@ -187,33 +224,49 @@ class TouchEventLoop(object):
             provider.update(dispatch_fn=self._dispatch_input)
 
         # execute post-processing modules
+        # each module take an iterable, and return an iterable, so events are
+        # streamed through the whole chain without intermediate lists.
+        events = self.input_events.drain()
         for mod in self.postproc_modules:
-            self.input_events = mod.process(events=self.input_events)
+            events = mod.process(events=events)
 
         # real dispatch input
-        for event, touch in self.input_events:
-            self.post_dispatch_input(event=event, touch=touch)
-
-        self.input_events = []
+        post_dispatch_input = self.post_dispatch_input
+        for event, touch in events:
+            post_dispatch_input(event=event, touch=touch)
+            self._invalid = True
 
     def idle(self):
         '''This function is called every frames. By default :
         * it "tick" the clock to the next frame
         * read all input and dispatch event
-        * dispatch on_update + on_draw + on_flip on window
+        * dispatch on_update + on_draw + on_flip on window. In ondemand
+          redraw mode, this is done only if the window is invalid, otherwise
+          the loop sleep.
         '''
         # update dt
         global frame_dt
-        frame_dt = getClock().tick()
+        clock = getClock()
+        frame_dt = clock.tick()
+        if clock.get_fired_count():
+            self._invalid = True
 
         # read and dispatch input from providers
         self.dispatch_input()
 
         if pymt_window:
             pymt_window.dispatch_events()
-            pymt_window.dispatch_event('on_update')
-            pymt_window.dispatch_event('on_draw')
-            pymt_window.dispatch_event('on_flip')
+            if self._invalid or self.redraw_mode == 'continuous':
+                # a late frame may skip the rendering, but input are always
+                # dispatched. The window stay invalid until it's drawn.
+                if self.pacer.should_render():
+                    self._invalid = False
+                    pymt_window.dispatch_event('on_update')
+                    pymt_window.dispatch_event('on_draw')
+                    pymt_window.dispatch_event('on_flip')
+                self.pacer.wait()
+            else:
+                self._sleep()
 
         # don't loop if we don't have listeners !
         if len(pymt_event_listeners) == 0:
@@ -222,6 +275,11 @@ class TouchEventLoop(object):
 
         return self.quit
 
+    def _sleep(self):
+        # nothing to draw, wait for the next scheduled event, an invalidation
+        # or the next input polling
+        getClock().sleep(self.input_poll_interval)
+
     def run(self):
         '''Main loop'''
         while not self.quit:
@@ -244,7 +302,7 @@ def pymt_usage():
         -a, --auto-fullscreen       force run in 'auto' fullscreen (no resolution change)
         -w, --windowed              force run in window
         -p, --provider id:provider[,options] add a provider (eg: ccvtable1:tuio,192.168.0.1:3333)
-        -F, --fps                   show fps in window
+        -F, --fps                   show fps and frame pacing stats in window
         -m mod, --module=mod        activate a module (use "list" to get available module)
         -r, --rotation              rotate the window (0, 90, 180, 270)
         -s, --save                  save current PyMT configuration
@@ -13,16 +13,13 @@ def eventdispatcher_dispatch_event(self, event_type, *args):
     if event_type not in self._event_types:
         return
 
-    _event_stack = self._event_stack
-    # search handler stack for matching event handlers
-    if _event_stack is not None:
-        for frame in _event_stack:
-            wkhandler = frame.get(event_type, None)
-            if wkhandler is None:
-                continue
+    # call the handlers attached, from the top of the stack
+    _event_table = self._event_table
+    if _event_table is not None:
+        for wkhandler in _event_table.get(event_type, ()):
             handler = wkhandler()
             if handler is None:
-                frame.remove(wkhandler)
+                self._remove_dead_handler(event_type, wkhandler)
                 continue
             try:
                 if handler(*args):
@@ -47,13 +44,14 @@ def eventdispatcher_dispatch_event(self, event_type, *args):
 # ----------------------------------------------------------------------------
 
 def widget_on_update(self):
-    for w in self.children[:]:
-        w.dispatch_event('on_update')
+    for w in self.children.snapshot():
+        if getattr(w, '_update_count', 1):
+            w.dispatch_event('on_update')
 
 def widget_on_draw(self):
     self.draw()
     if self.draw_children:
-        for w in self.children[:]:
+        for w in self.children.snapshot():
             w.dispatch_event('on_draw')
 
 def widget_collide_point(self, double x, double y):
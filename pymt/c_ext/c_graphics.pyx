@@ -93,6 +93,7 @@ from pymt.resources import resource_find
 from pymt.core.image import Image
 from array import array
 from OpenGL.arrays import vbo
+from OpenGL.GL import glBufferSubData, GL_ARRAY_BUFFER
 
 from c_opengl cimport *
 
@@ -304,8 +305,18 @@ cdef class GraphicElement(GraphicInstruction):
     cdef int _size_v, _size_c, _size_t
     cdef int _use_v, _use_c, _use_t, _use_n, _use_e, _use_i, _use_indices
 
+    # incremented each time the data, the format or the type change
+    cdef int _version
+
     def __cinit__(self):
         self.count = 0
+        self._version = 0
+        self._data_v = None
+        self._data_c = None
+        self._data_t = None
+        self._data_n = None
+        self._data_e = None
+        self._data_i = None
         self._format_str = ''
         self._type = GL_POINTS
         self._vbo_usage = 'GL_DYNAMIC_DRAW'
@@ -345,6 +356,117 @@ cdef class GraphicElement(GraphicInstruction):
             for vbo in self._vbo.itervalues():
                 vbo.delete()
 
+    cpdef prepare(self):
+        '''Build the data of the element if needed. This is automaticly called
+        by draw(), and by the canvas before merging the elements.'''
+        pass
+
+    cpdef get_batch_key(self):
+        '''Return the key used by the canvas to merge the element with others
+        having the same key in one draw call, or None if the element must be
+        drawn alone.'''
+        if type(self) not in _batch_types:
+            return None
+        # indexed elements are merged with their indices expanded, this
+        # keeps the primitives independent
+        if self._batch_count() == 0 or \
+           self._type not in (GL_POINTS, GL_LINES, GL_TRIANGLES, GL_QUADS):
+            return None
+        return (self._format_str, self._type, None)
+
+    cdef int _batch_count(self):
+        '''Return the number of vertex drawn, with the indices expanded'''
+        if self._use_indices:
+            return self._indices_count
+        return self.count
+
+    cdef int _component_size(self, int index):
+        '''Return the size of a component (0=vertex, 1=color, 2=texture,
+        3=normal), or 0 if the format doesn't use it'''
+        if index == 0 and self._use_v:
+            return self._size_v
+        elif index == 1 and self._use_c:
+            return self._size_c
+        elif index == 2 and self._use_t:
+            return self._size_t
+        elif index == 3 and self._use_n:
+            return 3
+        return 0
+
+    cdef object _batch_array(self, int index):
+        '''Return the data of a component as an array of exactly
+        _batch_count() * _component_size() floats, with the indices expanded.
+        Used by the canvas to merge the element in a batch.'''
+        cdef int size, length, i
+        data = (self._data_v, self._data_c, self._data_t, self._data_n)[index]
+        size = self._component_size(index)
+        length = self._batch_count() * size
+        if data is None:
+            return array('f', [0.]) * length
+        if self._use_indices:
+            indices = array('I')
+            indices.fromstring(self._indices)
+            out = array('f')
+            for i in indices:
+                out.extend(data[i * size:(i + 1) * size])
+            data = out
+        if len(data) == length:
+            return data
+        # keep the components of the next elements aligned
+        out = array('f', data[:length])
+        if len(out) < length:
+            out.extend(array('f', [0.]) * (length - len(out)))
+        return out
+
+    cdef _set_component(self, int index, data):
+        if index == 0:
+            self._set_data_v(data)
+        elif index == 1:
+            self._set_data_c(data)
+        elif index == 2:
+            self._set_data_t(data)
+        elif index == 3:
+            self._set_data_n(data)
+
+    cdef _update_component(self, int index, int start, data):
+        '''Replace the component data from start, and upload only this part
+        to the vbo'''
+        cdef int itemsize
+        current = (self._data_v, self._data_c, self._data_t, self._data_n)[index]
+        buf = (self._vbo_v, self._vbo_c, self._vbo_t, self._vbo_n)[index]
+        current[start:start + len(data)] = data
+        itemsize = current.itemsize
+        # bind first: if the buffer have never been drawn, the whole data is
+        # uploaded here
+        buf.bind()
+        glBufferSubData(GL_ARRAY_BUFFER, start * itemsize,
+                        len(data) * itemsize, data.tostring())
+        buf.unbind()
+
+    cdef object _get_bbox(self):
+        '''Return the bounding box (x1, y1, x2, y2) of the vertex'''
+        cdef double x, y, x1, y1, x2, y2
+        cdef int i, n, step
+        data = self._data_v
+        step = self._size_v
+        if data is None or step < 2 or len(data) < 2:
+            return None
+        n = len(data) - 1
+        x1 = x2 = data[0]
+        y1 = y2 = data[1]
+        for i in range(0, n, step):
+            x = data[i]
+            y = data[i + 1]
+            if x < x1:
+                x1 = x
+            elif x > x2:
+                x2 = x
+            if y < y1:
+                y1 = y
+            elif y > y2:
+                y2 = y
+        return (x1, y1, x2, y2)
+
     cpdef draw(self):
         if self._use_v:
             self._vbo_v.bind()
@@ -450,6 +572,7 @@ cdef class GraphicElement(GraphicInstruction):
             if self._use_n: self._format_str += 'n'
             if self._use_e: self._format_str += 'e'
             if self._use_i: self._format_str += 'i'
+            self._version += 1
         def __get__(self):
             return self._format_str
 
@@ -458,8 +581,9 @@ cdef class GraphicElement(GraphicInstruction):
             self.count = len(data) / self._size_v
         if type(data) is not array:
             data = array('f', data)
-        #self._data[typ] = data
         vbo.set_array(data.tostring())
+        self._version += 1
+        return data
 
     def _get_data_v(self): return self._data_v
     def _get_data_c(self): return self._data_c
@@ -473,22 +597,22 @@ cdef class GraphicElement(GraphicInstruction):
 
     def _set_data_v(self, x):
         if not self._vbo_v: self._vbo_v = self._create_vbo()
-        return self._set_data(self._vbo_v, x)
+        self._data_v = self._set_data(self._vbo_v, x)
     def _set_data_c(self, x):
         if not self._vbo_c: self._vbo_c = self._create_vbo()
-        return self._set_data(self._vbo_c, x)
+        self._data_c = self._set_data(self._vbo_c, x)
     def _set_data_t(self, x):
         if not self._vbo_t: self._vbo_t = self._create_vbo()
-        return self._set_data(self._vbo_t, x)
+        self._data_t = self._set_data(self._vbo_t, x)
     def _set_data_n(self, x):
         if not self._vbo_n: self._vbo_n = self._create_vbo()
-        return self._set_data(self._vbo_n, x)
+        self._data_n = self._set_data(self._vbo_n, x)
     def _set_data_e(self, x):
         if not self._vbo_e: self._vbo_e = self._create_vbo()
-        return self._set_data(self._vbo_e, x)
+        self._data_e = self._set_data(self._vbo_e, x)
     def _set_data_i(self, x):
         if not self._vbo_i: self._vbo_i = self._create_vbo()
-        return self._set_data(self._vbo_i, x)
+        self._data_i = self._set_data(self._vbo_i, x)
     data_v = property(_get_data_v, _set_data_v,
         doc='Get/set the vertex coordinates data')
     data_c = property(_get_data_c, _set_data_c,
@@ -505,6 +629,7 @@ cdef class GraphicElement(GraphicInstruction):
     def _get_indices(self):
         return self._indices
     def _set_indices(self, x):
+        self._version += 1
         if x is None:
             self._use_indices = 0
             return
@@ -520,6 +645,7 @@ cdef class GraphicElement(GraphicInstruction):
         if type(x) is str:
             x = gl_type_from_str(x)
         self._type = x
+        self._version += 1
     type = property(_get_type, _set_type,
         doc='''
             Specify how the graphic will be drawed. One of: 'lines',
@@ -550,10 +676,13 @@ cdef class Line(GraphicElement):
     cpdef build(self):
         self.data_v = self._points
 
-    cpdef draw(self):
+    cpdef prepare(self):
         if self._need_build:
             self.build()
             self._need_build = 0
+
+    cpdef draw(self):
+        self.prepare()
         GraphicElement.draw(self)
 
     def _get_points(self):
@@ -643,10 +772,19 @@ cdef class Point(GraphicElement):
         # set vertex
         self.data_v = outputList
 
-    cpdef draw(self):
+    cpdef prepare(self):
         if self._need_build:
             self.build()
             self._need_build = 0
+
+    cpdef get_batch_key(self):
+        # point sprites need their own states
+        if self._use_stmt:
+            return None
+        return GraphicElement.get_batch_key(self)
+
+    cpdef draw(self):
+        self.prepare()
         if self._use_stmt:
             stmt = self._stmt
             stmt.bind()
@@ -697,6 +835,7 @@ cdef class Point(GraphicElement):
         self._texture = x
         if self._texture:
             self._stmt = gx_texture(self._texture)
+        self._version += 1
     texture = property(_get_texture, _set_texture,
         doc='Texture to use on the object (Texture)'
     )
@@ -799,10 +938,23 @@ cdef class Rectangle(GraphicElement):
         if self.colors_coords:
             self.data_c = self.colors_coords
 
-    cpdef draw(self):
+    cpdef prepare(self):
         if self._need_build:
             self.build()
             self._need_build = 0
+
+    cpdef get_batch_key(self):
+        key = GraphicElement.get_batch_key(self)
+        if key is None or not self._use_stmt:
+            return key
+        if not self._texture:
+            return None
+        # the texture regions of the same texture can be merged
+        stmt = self._stmt
+        return (key[0], key[1], (stmt.get_target(), stmt.get_id()))
+
+    cpdef draw(self):
+        self.prepare()
         if self._use_stmt:
             stmt = self._stmt
             stmt.bind()
@@ -894,6 +1046,7 @@ cdef class Rectangle(GraphicElement):
         if self._texture:
             self._stmt = gx_texture(self._texture)
             self._use_stmt = 1
+        self._version += 1
     texture = property(_get_texture, _set_texture,
         doc='Texture to use on the object')
 
@@ -1258,10 +1411,13 @@ cdef class Circle(GraphicElement):
             p.append(y)
         self.data_v = p
 
-    cpdef draw(self):
+    cpdef prepare(self):
         if self._need_build:
             self.build()
             self._need_build = 0
+
+    cpdef draw(self):
+        self.prepare()
         GraphicElement.draw(self)
 
     def _get_radius(self):
@@ -1660,18 +1816,196 @@ cdef class CSSRectangle(GraphicInstruction):
         doc='Get/Set the css style to use (normally, its the widget.style property)')
 
 
+#: Elements that can be merged by the canvas, if they use independent
+#: primitives (points, lines, triangles, quads). The type must match exactly:
+#: a subclass can override draw(), which would not be called anymore once the
+#: element is merged in a batch.
+_batch_types = (GraphicElement, Line, Point, Rectangle, ImageRectangle, Text)
+
+#: Maximum number of previous batches where an element can be moved
+cdef int batch_lookback = 16
+
+cdef int _bbox_inside(bbox, area):
+    if area is None:
+        return 1
+    if bbox is None:
+        return 0
+    return bbox[0] >= area[0] and bbox[1] >= area[1] and \
+           bbox[2] <= area[2] and bbox[3] <= area[3]
+
+cdef class CanvasBatch(GraphicInstruction):
+    '''Elements of a canvas merged in one vertex buffer, and drawn with one
+    draw call. Created by the canvas, don't use it directly.
+
+    Each element owns a slice of the buffer. When an element changes, only
+    its slice is uploaded again. The whole batch is rebuilt only if the number
+    of vertex of the element changes.
+    '''
+    cdef readonly object key
+    cdef readonly list elements
+    cdef readonly GraphicElement mesh
+    cdef object _stmt
+    cdef list _offsets, _counts, _versions, _bboxes, _moved
+    cdef int _skipped
+    cdef int _unbounded
+    cdef double _x1, _y1, _x2, _y2
+
+    def __init__(self, key):
+        GraphicInstruction.__init__(self)
+        self.key = key
+        self.elements = []
+        self.mesh = None
+        self._stmt = None
+        self._offsets = []
+        self._counts = []
+        self._versions = []
+        self._bboxes = []
+        self._moved = []
+        self._skipped = 0
+        self._unbounded = 0
+
+    cdef add(self, GraphicElement element, bbox, int moved):
+        if not self.elements:
+            if bbox is None:
+                self._unbounded = 1
+            else:
+                self._x1, self._y1, self._x2, self._y2 = bbox
+        elif bbox is None:
+            self._unbounded = 1
+        elif not self._unbounded:
+            x1, y1, x2, y2 = bbox
+            self._x1 = min(self._x1, x1)
+            self._y1 = min(self._y1, y1)
+            self._x2 = max(self._x2, x2)
+            self._y2 = max(self._y2, y2)
+        self.elements.append(element)
+        self._versions.append(element._version)
+        self._bboxes.append(bbox)
+        self._moved.append(moved)
+
+    cdef skip(self):
+        '''An element is moved in a previous batch: it will be drawn before
+        the current elements of this batch'''
+        self._skipped = len(self.elements)
+
+    cdef int overlap(self, bbox):
+        if bbox is None or self._unbounded:
+            return 1
+        x1, y1, x2, y2 = bbox
+        return x1 <= self._x2 and x2 >= self._x1 and \
+               y1 <= self._y2 and y2 >= self._y1
+
+    cdef build(self):
+        '''Concatenate the data of the elements in the mesh'''
+        cdef GraphicElement element, mesh
+        cdef int index, offset, count
+        self._offsets = []
+        self._counts = []
+        offset = 0
+        for element in self.elements:
+            count = element._batch_count()
+            self._offsets.append(offset)
+            self._counts.append(count)
+            offset += count
+        if len(self.elements) == 1:
+            self.mesh = None
+            return
+        fmt, typ, texture = self.key
+        mesh = GraphicElement(format=fmt, type=typ)
+        mesh.context = self.context
+        for index in range(4):
+            if not mesh._component_size(index):
+                continue
+            data = array('f')
+            for element in self.elements:
+                data.extend(element._batch_array(index))
+            mesh._set_component(index, data)
+        self.mesh = mesh
+        if texture is not None:
+            self._stmt = gx_texture(self.elements[0].texture)
+
+    cdef int update(self):
+        '''Apply the changes of the elements since the last call. Return 0 if
+        the batch can't be updated, and the canvas must merge its elements
+        again.'''
+        cdef GraphicElement element
+        cdef int i, index, size, rebuild
+        cdef list changed
+        changed = []
+        rebuild = 0
+        for i in range(len(self.elements)):
+            element = self.elements[i]
+            if element._version == self._versions[i]:
+                continue
+            if element.get_batch_key() != self.key:
+                return 0
+            # the element is drawn out of the painter's order: it must stay
+            # in the area checked for the overlaps when it was merged
+            if self._moved[i] or i < self._skipped:
+                if not _bbox_inside(element._get_bbox(), self._bboxes[i]):
+                    return 0
+            self._versions[i] = element._version
+            if element._batch_count() != self._counts[i]:
+                rebuild = 1
+            else:
+                changed.append(i)
+        if rebuild:
+            self.build()
+        elif changed and self.mesh is not None:
+            for i in changed:
+                element = self.elements[i]
+                for index in range(4):
+                    size = self.mesh._component_size(index)
+                    if size:
+                        self.mesh._update_component(index,
+                            self._offsets[i] * size,
+                            element._batch_array(index))
+        return 1
+
+    cpdef draw(self):
+        if self.mesh is None:
+            self.elements[0].draw()
+            return
+        if self._stmt is not None:
+            self._stmt.bind()
+            self.mesh.draw()
+            self._stmt.release()
+        else:
+            self.mesh.draw()
+
 cdef class Canvas:
     '''Create a batch of graphic objects.
     Can be used to store many graphic instructions and call them for drawing.
-    (Note: This will lead to optimizations in the near future.)
+
+    The canvas merges the elements that can be drawn with the same states
+    (same format, primitive type and texture) in one vertex buffer, and draws
+    them with one call. Between two instructions changing the context (like
+    Color), an element can be moved in a previous batch with the same states,
+    if it doesn't overlap the elements drawn in between.
+
+    When an element changes, only its part of the buffer is uploaded again.
+    The elements are merged again when an element is added or removed, when
+    its states change, or when a moved element goes out of the area checked
+    for the overlaps.
+
+    :Parameters:
+        `batching`: bool, default to True
+            Set to False to draw the elements one by one
     '''
 
     cdef list _batch
     cdef GraphicContext _context
+    cdef list _plan
+    cdef list _loose, _loose_versions
+    cdef int _batching
 
     def __init__(self, **kwargs):
         self._batch = []
         self._context = default_context
+        self._plan = None
+        self._loose = []
+        self._loose_versions = []
+        self._batching = kwargs.get('batching', True)
 
     def add(self, graphic):
         '''Add a graphic element to draw'''
@@ -1679,6 +2013,7 @@ cdef class Canvas:
         #    raise Exception('Canvas accept only Graphic Instruction')
         self._batch.append(graphic)
         graphic.context = self._context
+        self._plan = None
         return graphic
 
     def remove(self, graphic):
@@ -1687,17 +2022,107 @@ cdef class Canvas:
             self._batch.remove(graphic)
         except:
             pass
+        self._plan = None
 
     def clear(self):
         '''Clear all the elements in the canvas'''
         self._batch = []
+        self._plan = None
 
     def draw(self):
         '''Draw all the canvas elements'''
-        #cdef GraphicInstruction x
-        for x in self._batch:
+        if not self._batching:
+            for x in self._batch:
+                x.draw()
+            return
+        for x in self._update_plan():
             x.draw()
 
+    cpdef list _update_plan(self):
+        '''(internal) Build the elements, apply their changes on the batches,
+        and return the list of instructions and batches to draw'''
+        cdef GraphicElement element
+        cdef int i
+        for x in self._batch:
+            if isinstance(x, GraphicElement):
+                (<GraphicElement>x).prepare()
+
+        if self._plan is not None:
+            # an element drawn alone can become mergeable
+            for i in range(len(self._loose)):
+                element = self._loose[i]
+                if element._version == self._loose_versions[i]:
+                    continue
+                if element.get_batch_key() is not None:
+                    self._plan = None
+                    break
+                self._loose_versions[i] = element._version
+
+        if self._plan is not None:
+            for x in self._plan:
+                if isinstance(x, CanvasBatch) and \
+                   not (<CanvasBatch>x).update():
+                    self._plan = None
+                    break
+
+        if self._plan is None:
+            self._plan = self._build_plan()
+        return self._plan
+
+    cdef list _build_plan(self):
+        '''Merge the elements in batches. Return the list of instructions and
+        batches to draw.'''
+        cdef list plan, batches
+        cdef CanvasBatch batch, target
+        cdef int i, j
+        plan = []
+        self._loose = []
+        self._loose_versions = []
+        # batches since the last instruction
+        batches = []
+        for x in self._batch:
+            key = None
+            if isinstance(x, GraphicElement):
+                key = (<GraphicElement>x).get_batch_key()
+            if key is None:
+                plan.append(x)
+                batches = []
+                if isinstance(x, GraphicElement):
+                    self._loose.append(x)
+                    self._loose_versions.append((<GraphicElement>x)._version)
+                continue
+
+            # search a previous batch with the same key. The batches drawn
+            # after it must not overlap the element.
+            bbox = (<GraphicElement>x)._get_bbox()
+            target = None
+            for i in range(len(batches) - 1,
+                           max(-1, len(batches) - 1 - batch_lookback), -1):
+                batch = batches[i]
+                if batch.key == key:
+                    target = batch
+                    break
+                if batch.overlap(bbox):
+                    break
+            if target is None:
+                target = CanvasBatch(key)
+                target.context = self._context
+                plan.append(target)
+                batches.append(target)
+                target.add(<GraphicElement>x, bbox, 0)
+            elif target is batches[-1]:
+                target.add(<GraphicElement>x, bbox, 0)
+            else:
+                # the element is drawn before the batches it skips
+                for j in range(i + 1, len(batches)):
+                    (<CanvasBatch>batches[j]).skip()
+                target.add(<GraphicElement>x, bbox, 1)
+
+        for x in plan:
+            if isinstance(x, CanvasBatch):
+                (<CanvasBatch>x).build()
+        return plan
+
     def save(self):
         '''Push the current context to the stack'''
         self.add(GraphicContextSave())
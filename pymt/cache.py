@@ -15,10 +15,20 @@ How to use the cache ::
 
 If the instance is NULL, the cache may have trash it, because you've
 not used the label since 5 seconds, and you've reach the limit.
+
+When the limit is reached, the least recently used object is removed.
+A category can also be limited in bytes, with `max_bytes`. The size of an
+object is taken from its `cache_size` property (Texture, Image and Label
+have one), or can be given to append() ::
+
+    Cache.register('mytextures', max_bytes=64 * 1024 * 1024)
+    Cache.append('mytextures', key, texture)
 '''
 
 __all__ = ('Cache', )
 
+from pymt.utils import OrderedDict
+from heapq import heappush, heappop
 from pymt.logger import pymt_logger
 from pymt.clock import getClock
 
@@ -28,8 +38,19 @@ class Cache(object):
     _categories = {}
     _objects = {}
 
+    # expiry of objects with a custom timeout: (deadline, seq, category, key,
+    # entry). Others objects expire in their last access order.
+    _expiry = []
+    _expiry_seq = 0
+
+    _purge_interval = 1.
+    _purge_event = None
+    _purge_deadline = None
+    _purge_lag = 0.
+    _last_purge = 0.
+
     @staticmethod
-    def register(category, limit=None, timeout=None):
+    def register(category, limit=None, timeout=None, max_bytes=None):
         '''Register a new category in cache, with limit
 
         :Parameters:
@@ -41,17 +62,24 @@ class Cache(object):
             `timeout` : double (optionnal)
                 Time to delete the object when it's not used.
                 if None, no timeout is applied.
+            `max_bytes` : int (optionnal)
+                Maximum size of all the objects in the cache, in bytes.
+                If None, no size limit is applied.
         '''
         Cache._categories[category] = {
             'limit': limit,
-            'timeout': timeout
+            'timeout': timeout,
+            'max_bytes': max_bytes,
+            'bytes': 0
         }
-        Cache._objects[category] = {}
-        pymt_logger.debug('Cache: register <%s> with limit=%s, timeout=%ss' %
-            (category, str(limit), str(timeout)))
+        Cache.reset_stats(category)
+        Cache._objects[category] = OrderedDict()
+        pymt_logger.debug('Cache: register <%s> with limit=%s, timeout=%ss, '
+            'max_bytes=%s' % (category, str(limit), str(timeout),
+            str(max_bytes)))
 
     @staticmethod
-    def append(category, key, obj, timeout=None):
+    def append(category, key, obj, timeout=None, size=None):
         '''Add a new object in the cache.
 
         :Parameters:
@@ -63,6 +91,9 @@ class Cache(object):
                 Object to store in cache
             `timeout` : double (optionnal)
                 Custom time to delete the object if it's not used.
+            `size` : int (optionnal)
+                Size of the object in bytes. If None, the `cache_size`
+                property of the object is used, or 0 if it doesn't have one.
         '''
         try:
             cat = Cache._categories[category]
@@ -70,16 +101,27 @@ class Cache(object):
             pymt_logger.warning('Cache: category <%s> not exist' % category)
             return
         timeout = timeout or cat['timeout']
-        # FIXME: activate purge when limit is hit
-        #limit = cat['limit']
-        #if limit is not None and len(Cache._objects[category]) >= limit:
-        #    Cache._purge_oldest(category)
-        Cache._objects[category][key] = {
+        if size is None:
+            size = getattr(obj, 'cache_size', None) or 0
+        objects = Cache._objects[category]
+        entry = objects.pop(key, None)
+        if entry is not None:
+            cat['bytes'] -= entry['size']
+        curtime = getClock().get_time()
+        objects[key] = {
             'object': obj,
             'timeout': timeout,
-            'lastaccess': getClock().get_time(),
-            'timestamp': getClock().get_time()
+            'lastaccess': curtime,
+            'timestamp': curtime,
+            'size': size
         }
+        cat['bytes'] += size
+        cat['inserts'] += 1
+        Cache._purge_oldest(category)
+        if timeout is not None:
+            if timeout != cat['timeout']:
+                Cache._push_expiry(category, key, objects[key])
+            Cache._schedule_purge(curtime + timeout)
 
     @staticmethod
     def get(category, key, default=None):
@@ -94,10 +136,17 @@ class Cache(object):
                 Default value to be returned if key is not found
         '''
         try:
-            Cache._objects[category][key]['lastaccess'] = getClock().get_time()
-            return Cache._objects[category][key]['object']
+            objects = Cache._objects[category]
+            # move the object at the end, to keep the LRU order
+            entry = objects.pop(key)
         except Exception:
+            if category in Cache._categories:
+                Cache._categories[category]['misses'] += 1
             return default
+        objects[key] = entry
+        Cache._categories[category]['hits'] += 1
+        entry['lastaccess'] = getClock().get_time()
+        return entry['object']
 
     @staticmethod
     def get_timestamp(category, key, default=None):
@@ -145,78 +194,207 @@ class Cache(object):
         '''
         try:
             if key is not None:
-                del Cache._objects[category][key]
+                entry = Cache._objects[category].pop(key)
+                Cache._categories[category]['bytes'] -= entry['size']
             else:
-                Cache._objects[category] = {}
+                Cache._objects[category] = OrderedDict()
+                Cache._categories[category]['bytes'] = 0
         except Exception:
             pass
 
     @staticmethod
-    def _purge_oldest(category, maxpurge=1):
-        print 'PURGE', category
-        import heapq
-        heap_list = []
-        for key in Cache._objects[category]:
-            obj = Cache._objects[category][key]
-            if obj['lastaccess'] == obj['timestamp']:
-                continue
-            heapq.heappush(heap_list, (obj['lastaccess'], key))
-            print '<<<', obj['lastaccess']
-        n = 0
-        while n < maxpurge:
-            try:
-                lastaccess, key = heapq.heappop(heap_list)
-                print '=>', key, lastaccess, getClock().get_time()
-            except Exception:
-                return
-            del Cache._objects[category][key]
+    def get_size(category):
+        '''Return the size of all the objects in a category, in bytes.
 
+        :Parameters:
+            `category` : str
+                Identifier of the category
+        '''
+        try:
+            return Cache._categories[category]['bytes']
+        except KeyError:
+            return 0
+
+    @staticmethod
+    def _purge_oldest(category):
+        # remove the least recently used objects until the category fit in
+        # his limit and byte budget. The newest object is always kept.
+        cat = Cache._categories[category]
+        objects = Cache._objects[category]
+        limit = cat['limit']
+        max_bytes = cat['max_bytes']
+        while len(objects) > 1:
+            over_limit = limit is not None and len(objects) > limit
+            over_budget = max_bytes is not None and cat['bytes'] > max_bytes
+            if not (over_limit or over_budget):
+                break
+            key, entry = objects.popitem(last=False)
+            cat['bytes'] -= entry['size']
+            cat['evictions_lru'] += 1
 
     @staticmethod
-    def _purge_by_timeout(dt):
+    def _schedule_purge(deadline):
+        # ensure a purge will happen at the deadline. Purge are batched, and
+        # can't happen more than once per _purge_interval.
+        deadline = max(deadline, Cache._last_purge + Cache._purge_interval)
+        if Cache._purge_event is not None:
+            if Cache._purge_deadline <= deadline:
+                return
+            getClock().unschedule(Cache._purge_event)
+        Cache._purge_deadline = deadline
+        Cache._purge_event = getClock().schedule_once(Cache._purge_by_timeout,
+            max(0, deadline - getClock().get_time()), invalidate=False)
 
+    @staticmethod
+    def _purge_by_timeout(*largs):
         curtime = getClock().get_time()
 
-        for category in Cache._objects:
-
-            timeout = Cache._categories[category]['timeout']
-            if timeout is not None and dt > timeout:
-                # XXX got a lag ! that may be because the frame take lot of
-                # time to draw. and the timeout is not adapted to the current
-                # framerate. So, increase the timeout by two.
-                # ie: if the timeout is 1 sec, and framerate go to 0.7, newly
-                # object added will be automaticly trashed.
-                timeout *= 2
-                Cache._categories[category]['timeout'] = timeout
+        # if the purge is late, that may be because a frame take lot of time
+        # to draw, and nothing have been accessed during this time. So for
+        # this purge only, extend the timeouts by the lag, otherwise the
+        # objects used just before the lag would be trashed.
+        lag = curtime - Cache._purge_deadline
+        if lag > Cache._purge_interval:
+            pymt_logger.debug('Cache: purge is late by %.3fs, extend the '
+                              'timeouts for this purge' % lag)
+        else:
+            lag = 0.
+        Cache._purge_lag = lag
+        Cache._purge_event = None
+        Cache._purge_deadline = None
+        Cache._last_purge = curtime
+
+        deadline = None
+        for category, objects in Cache._objects.iteritems():
+            cat = Cache._categories[category]
+            timeout = cat['timeout']
+            if timeout is None:
                 continue
 
-            for key in Cache._objects[category].keys()[:]:
+            # objects are in last access order: the expired ones are at the
+            # beginning. Objects with a custom timeout are in the heap.
+            expired = []
+            for key, entry in objects.iteritems():
+                if entry['timeout'] != timeout:
+                    continue
+                if curtime - entry['lastaccess'] <= timeout + lag:
+                    if deadline is None or \
+                       entry['lastaccess'] + timeout < deadline:
+                        deadline = entry['lastaccess'] + timeout
+                    break
+                expired.append(key)
+            for key in expired:
+                Cache.remove(category, key)
+            cat['evictions_timeout'] += len(expired)
+
+        # objects with a custom timeout
+        heap = Cache._expiry
+        alive = []
+        while heap and heap[0][0] <= curtime:
+            _deadline, _seq, category, key, entry = heappop(heap)
+            if Cache._objects.get(category, {}).get(key) is not entry:
+                continue
+            if curtime - entry['lastaccess'] > entry['timeout'] + lag:
+                Cache.remove(category, key)
+                Cache._categories[category]['evictions_timeout'] += 1
+            else:
+                alive.append((category, key, entry))
+        # accessed since the push (or saved by the lag), reinsert them with
+        # the new deadline
+        for category, key, entry in alive:
+            Cache._push_expiry(category, key, entry, lag)
+        if heap and (deadline is None or heap[0][0] < deadline):
+            deadline = heap[0][0]
 
-                lastaccess  = Cache._objects[category][key]['lastaccess']
-                objtimeout  = Cache._objects[category][key]['timeout']
+        if deadline is not None:
+            Cache._schedule_purge(deadline)
 
-                # take the object timeout if available
-                if objtimeout is not None:
-                    timeout = objtimeout
+    @staticmethod
+    def _push_expiry(category, key, entry, lag=0.):
+        deadline = entry['lastaccess'] + entry['timeout'] + lag
+        Cache._expiry_seq += 1
+        heappush(Cache._expiry,
+                 (deadline, Cache._expiry_seq, category, key, entry))
 
-                # no timeout, cancel
-                if timeout is None:
-                    continue
+    @staticmethod
+    def get_purge_lag():
+        '''Return the lag used to extend the timeouts during the last purge,
+        in seconds. A lag happen when a frame take lot of time to draw.'''
+        return Cache._purge_lag
+
+    @staticmethod
+    def get_stats(category=None):
+        '''Return the statistics of a category, as a dict with keys: hits,
+        misses, inserts, evictions_lru, evictions_timeout, count, bytes,
+        limit, max_bytes, timeout.
+        If category is None, return a dict of the statistics of all
+        categories.
+
+        :Parameters:
+            `category` : str (optionnal)
+                Identifier of the category
+        '''
+        if category is None:
+            return dict((x, Cache.get_stats(x)) for x in Cache._categories)
+        cat = Cache._categories[category]
+        stats = dict((x, cat[x]) for x in ('hits', 'misses', 'inserts',
+            'evictions_lru', 'evictions_timeout', 'bytes', 'limit',
+            'max_bytes', 'timeout'))
+        stats['count'] = len(Cache._objects[category])
+        return stats
+
+    @staticmethod
+    def reset_stats(category=None):
+        '''Reset the hits, misses, inserts and evictions counters
+
+        :Parameters:
+            `category` : str (optionnal)
+                Identifier of the category. If None, reset all categories.
+        '''
+        if category is None:
+            categories = Cache._categories.keys()
+        else:
+            categories = [category]
+        for category in categories:
+            Cache._categories[category].update({
+                'hits': 0,
+                'misses': 0,
+                'inserts': 0,
+                'evictions_lru': 0,
+                'evictions_timeout': 0
+            })
 
-                if curtime - lastaccess > timeout:
-                    del Cache._objects[category][key]
+    @staticmethod
+    def format_stats(category):
+        '''Return the statistics of a category in a one line string'''
+        stats = Cache.get_stats(category)
+        lookups = stats['hits'] + stats['misses']
+        ratio = 0.
+        if lookups:
+            ratio = 100. * stats['hits'] / lookups
+        count = '%d' % stats['count']
+        if stats['limit'] is not None:
+            count += '/%d' % stats['limit']
+        size = '%dk' % (stats['bytes'] / 1024)
+        if stats['max_bytes'] is not None:
+            size += '/%dk' % (stats['max_bytes'] / 1024)
+        return '%s: count=%s size=%s hits=%d misses=%d (%.1f%%) ' \
+               'inserts=%d evictions=%d lru, %d timeout' % (
+                category, count, size, stats['hits'], stats['misses'],
+                ratio, stats['inserts'], stats['evictions_lru'],
+                stats['evictions_timeout'])
+
+    @staticmethod
+    def log_usage():
+        '''Log the statistics of all categories, one line per category'''
+        for category in sorted(Cache._categories):
+            pymt_logger.info('Cache: %s' % Cache.format_stats(category))
 
     @staticmethod
     def print_usage():
         '''Print the cache usage on the console'''
         print 'Cache usage :'
-        for category in Cache._categories:
-            print ' * %s : %d / %s, timeout=%s' % (
-                category.capitalize(),
-                len(Cache._objects[category]),
-                str(Cache._categories[category]['limit']),
-                str(Cache._categories[category]['timeout'])
-            )
-
-# install the schedule clock for purging
-getClock().schedule_interval(Cache._purge_by_timeout, 1)
+        for category in sorted(Cache._categories):
+            print ' * %s, timeout=%s' % (Cache.format_stats(category),
+                str(Cache._categories[category]['timeout']))
+        print ' * Last purge lag : %.3fs' % Cache._purge_lag
@@ -13,21 +13,203 @@ You can add new event like this ::
     getClock().schedule_once(my_callback, 5)
 
 If the callback return False, the schedule will be removed.
+
+Other threads must not use schedule_once() or schedule_interval(). They can
+ask for a callback to be called in the main thread with ::
+
+    getClock().schedule_from_thread(my_callback, arg1, arg2)
+
+The callback will be called with the given arguments (without dt) at the next
+tick. Each tick process the callbacks from threads in a bounded batch,
+limited by `thread_budget` seconds and `thread_batch` callbacks.
+
+The main loop use a FramePacer on top of the clock, to limit the frame rate
+to the `fps` token of the graphics section in the configuration.
+
+Time sources
+------------
+
+The clock read the time from a time source. By default, a monotonic time is
+used, so the clock is not affected by changes of the system time (NTP...).
+The time source can be selected with the `PYMT_CLOCK` environment variable
+(monotonic, wall or virtual), or changed at runtime ::
+
+    source = VirtualTimeSource()
+    getClock().time_source = source
+
+A virtual time source advance only when asked. In fast forward mode (default),
+every sleep of PyMT advance the virtual time instead of waiting, so the
+application run as fast as possible, with reproducible frame times. Otherwise,
+the time must be advanced manually ::
+
+    source = VirtualTimeSource(fast_forward=False)
+    getClock().time_source = source
+    source.advance(1 / 60.)
+    getClock().tick()
 '''
 
-__all__ =  ('Clock', 'getClock')
+__all__ =  ('Clock', 'FramePacer', 'getClock',
+            'TimeSource', 'WallTimeSource', 'MonotonicTimeSource',
+            'VirtualTimeSource')
 
+import sys
 import time
+from pymt import pymt_options
+from heapq import heappush, heappop, heapify
+from itertools import count
+from collections import deque
+from threading import Event
 from pymt.weakmethod import WeakMethod
 
+class TimeSource(object):
+    '''Abstract time source used by the Clock'''
+
+    def time(self):
+        '''Return the current time, in seconds'''
+        raise NotImplementedError()
+
+    def sleep(self, duration, event=None):
+        '''Sleep during `duration` seconds. If a threading.Event is given,
+        the sleep is interrupted when the event is set.'''
+        if event is not None:
+            event.wait(duration)
+        else:
+            time.sleep(duration)
+
+
+class WallTimeSource(TimeSource):
+    '''Time source using the system time (time.time())'''
+
+    def time(self):
+        return time.time()
+
+
+def _get_monotonic_function():
+    # return a function giving a monotonic time for the current platform,
+    # or None if no monotonic time is available.
+    if sys.platform == 'win32':
+        # on windows, time.clock() use the performance counter
+        return time.clock
+    import ctypes
+    import ctypes.util
+    if sys.platform == 'darwin':
+        libc = ctypes.CDLL(ctypes.util.find_library('c'))
+        class _timebase_info(ctypes.Structure):
+            _fields_ = [('numer', ctypes.c_uint32), ('denom', ctypes.c_uint32)]
+        info = _timebase_info()
+        libc.mach_timebase_info(ctypes.byref(info))
+        mach_absolute_time = libc.mach_absolute_time
+        mach_absolute_time.restype = ctypes.c_uint64
+        factor = info.numer / (info.denom * 1e9)
+        return lambda: mach_absolute_time() * factor
+    class _timespec(ctypes.Structure):
+        _fields_ = [('tv_sec', ctypes.c_long), ('tv_nsec', ctypes.c_long)]
+    librt = ctypes.CDLL(ctypes.util.find_library('rt') or
+                        ctypes.util.find_library('c'), use_errno=True)
+    clock_gettime = librt.clock_gettime
+    clock_gettime.argtypes = [ctypes.c_int, ctypes.POINTER(_timespec)]
+    CLOCK_MONOTONIC = 1
+    ts = _timespec()
+    def monotonic():
+        if clock_gettime(CLOCK_MONOTONIC, ctypes.byref(ts)) != 0:
+            raise OSError(ctypes.get_errno(), 'clock_gettime failed')
+        return ts.tv_sec + ts.tv_nsec * 1e-9
+    monotonic()
+    return monotonic
+
+
+class MonotonicTimeSource(TimeSource):
+    '''Time source using a monotonic system clock, not affected by the
+    changes of the system time.
+
+    :Raises:
+        `OSError` if no monotonic clock is available on this platform.
+    '''
+
+    def __init__(self):
+        super(MonotonicTimeSource, self).__init__()
+        try:
+            self.time = _get_monotonic_function()
+        except Exception, e:
+            raise OSError('Monotonic clock not available <%s>' % e)
+
+
+class VirtualTimeSource(TimeSource):
+    '''Virtual time source: the time advance only when asked.
+
+    :Parameters:
+        `start`: float, default to 0
+            Initial time
+        `fast_forward`: bool, default to True
+            If True, a sleep advance the time immediately instead of waiting.
+            If False, a sleep do nothing, and the time must be advanced with
+            advance().
+    '''
+
+    def __init__(self, start=0., fast_forward=True):
+        super(VirtualTimeSource, self).__init__()
+        self._time = float(start)
+        self.fast_forward = fast_forward
+
+    def time(self):
+        return self._time
+
+    def advance(self, duration):
+        '''Advance the virtual time of `duration` seconds'''
+        if duration > 0:
+            self._time += duration
+
+    def sleep(self, duration, event=None):
+        if self.fast_forward:
+            self.advance(duration)
+
+
+def _create_time_source(names):
+    # create the first available time source from a list of names
+    for name in names:
+        try:
+            if name == 'monotonic':
+                return MonotonicTimeSource()
+            elif name == 'wall':
+                return WallTimeSource()
+            elif name == 'virtual':
+                return VirtualTimeSource()
+        except OSError:
+            continue
+    return WallTimeSource()
+
+
+# time used to measure the budget of callbacks scheduled from thread
+_perf_counter = _create_time_source(('monotonic', )).time
+
+def _callback_key(callback):
+    # key used to find events from a callback, without keeping a reference on
+    # the instance of a bound method.
+    try:
+        return (id(callback.im_self), callback.im_func)
+    except AttributeError:
+        return callback
+
 class _Event(object):
 
-    def __init__(self, loop, callback, timeout, starttime):
+    __slots__ = ('loop', 'callback', 'timeout', '_last_dt', '_dt', '_key',
+                 '_removed', '_queued', 'invalidate')
+
+    def __init__(self, loop, callback, timeout, starttime, invalidate=True):
         self.loop = loop
+        self.invalidate = invalidate
         self.callback = WeakMethod(callback)
         self.timeout = timeout
         self._last_dt = starttime
         self._dt = 0.
+        self._key = _callback_key(callback)
+        self._removed = False
+        self._queued = False
+
+    @property
+    def deadline(self):
+        '''Time of the next call of the callback'''
+        return self._last_dt + self.timeout
 
     def do(self, dt):
         if self.callback.is_dead():
@@ -62,23 +244,52 @@ class _Event(object):
 
 
 class Clock(object):
-    '''A clock object, that support events'''
-    __slots__ = ('_dt', '_last_fps_tick', '_last_tick', '_fps',
-            '_fps_counter', '_events')
+    '''A clock object, that support events.
 
-    def __init__(self):
+    Events are stored in a heap ordered by their deadline: each tick only
+    touch the events that must be called. schedule_once() and
+    schedule_interval() return an event that can be passed to unschedule(),
+    to remove it without searching it.
+
+    :Parameters:
+        `time_source`: TimeSource, default to None
+            Source of the time. If None, a monotonic time is used.
+    '''
+    __slots__ = ('_dt', '_last_fps_tick', '_last_tick', '_fps',
+            '_fps_counter', '_heap', '_index', '_seq', '_removed', '_fired',
+            '_time_source', '_thread_queue', '_wakeup', '_thread_processed',
+            '_thread_time', 'thread_budget', 'thread_batch')
+
+    def __init__(self, time_source=None):
+        if time_source is None:
+            time_source = _create_time_source(('monotonic', ))
+        self._time_source = time_source
         self._dt = 0
-        self._last_tick = time.time()
+        self._last_tick = time_source.time()
         self._fps = 0
         self._fps_counter = 0
         self._last_fps_tick = None
-        self._events = []
+        self._heap = []
+        self._index = {}
+        self._seq = count()
+        self._removed = 0
+        self._fired = 0
+        self._thread_queue = deque()
+        self._wakeup = Event()
+        self._thread_processed = 0
+        self._thread_time = 0.
+        #: Maximum time (in seconds) passed each tick in callbacks scheduled
+        #: from threads
+        self.thread_budget = 0.004
+        #: Maximum number of callbacks scheduled from threads processed
+        #: each tick
+        self.thread_batch = 256
 
     def tick(self):
         '''Advance clock to the next step. Must be called every frame.
         The default clock have the tick() function called by PyMT'''
         # tick the current time
-        current = time.time()
+        current = self._time_source.time()
         self._dt = current - self._last_tick
         self._fps_counter += 1
         self._last_tick = current
@@ -93,9 +304,26 @@ class Clock(object):
 
         # process event
         self._process_events()
+        if self._thread_queue:
+            self._process_thread_events()
 
         return self._dt
 
+    def _get_time_source(self):
+        return self._time_source
+    def _set_time_source(self, source):
+        # move the current tick and all the deadlines into the new time base
+        delta = source.time() - self._time_source.time()
+        self._time_source = source
+        self._last_tick += delta
+        if self._last_fps_tick is not None:
+            self._last_fps_tick += delta
+        for deadline, seq, event in self._heap:
+            event._last_dt += delta
+        self._heap = [(x[0] + delta, x[1], x[2]) for x in self._heap]
+    time_source = property(_get_time_source, _set_time_source,
+        doc='Get/set the time source of the clock (TimeSource)')
+
     def get_fps(self):
         '''Get the current FPS calculated by the clock'''
         return self._fps
@@ -104,32 +332,292 @@ class Clock(object):
         '''Get the last tick made by the clock'''
         return self._last_tick
 
-    def schedule_once(self, callback, timeout=0):
-        '''Schedule an event in <timeout> seconds'''
-        event = _Event(False, callback, timeout, self._last_tick)
-        self._events.append(event)
+    def get_fired_count(self):
+        '''Get the number of scheduled callbacks called during the last tick.
+        The callbacks scheduled with invalidate=False are not counted.'''
+        return self._fired
+
+    def get_next_timeout(self):
+        '''Get the time left before the next scheduled event must be called.
+        Return None if no event is scheduled.'''
+        if self._thread_queue:
+            return 0
+        heap = self._heap
+        while heap and heap[0][2]._removed:
+            heappop(heap)[2]._queued = False
+            self._removed -= 1
+        if not heap:
+            return None
+        return max(0, heap[0][0] - self._time_source.time())
+
+    def get_thread_stats(self):
+        '''Return a dict with the statistics of the callbacks scheduled from
+        threads: number of `pending` callbacks, number of `processed`
+        callbacks and `time` passed in them since the clock creation.'''
+        return {
+            'pending': len(self._thread_queue),
+            'processed': self._thread_processed,
+            'time': self._thread_time}
+
+    def sleep(self, timeout):
+        '''Sleep at most `timeout` seconds. The sleep stop earlier when the
+        next scheduled event must be called, or when wakeup() or
+        schedule_from_thread() is called from another thread.'''
+        self._wakeup.clear()
+        next_timeout = self.get_next_timeout()
+        if next_timeout is not None:
+            timeout = min(timeout, next_timeout)
+        if timeout > 0:
+            self._time_source.sleep(timeout, self._wakeup)
+
+    def wakeup(self):
+        '''Interrupt the current sleep(). Can be called from any thread.'''
+        self._wakeup.set()
+
+    def schedule_from_thread(self, callback, *largs, **kwargs):
+        '''Schedule a callback to be called with `largs` in the main thread,
+        at the next tick. This is the only scheduling function that can be
+        used from another thread.
+
+        If the `invalidate` keyword is False, the call is not counted by
+        get_fired_count(), and don't force a redraw in ondemand mode.'''
+        # deque.append() is atomic, no lock is needed
+        self._thread_queue.append(
+            (callback, largs, kwargs.get('invalidate', True)))
+        self._wakeup.set()
+
+    def schedule_once(self, callback, timeout=0, invalidate=True):
+        '''Schedule an event in <timeout> seconds.
+
+        Internal events that don't change the display (cache purge, release
+        of GL resources...) must use invalidate=False: they are not counted
+        by get_fired_count(), and don't force a redraw in ondemand mode.'''
+        event = _Event(False, callback, timeout, self._last_tick, invalidate)
+        self._add(event)
         return event
 
-    def schedule_interval(self, callback, timeout):
-        '''Schedule a event to be call every <timeout> seconds'''
-        event = _Event(True, callback, timeout, self._last_tick)
-        self._events.append(event)
+    def schedule_interval(self, callback, timeout, invalidate=True):
+        '''Schedule a event to be call every <timeout> seconds. See
+        schedule_once() for `invalidate`.'''
+        event = _Event(True, callback, timeout, self._last_tick, invalidate)
+        self._add(event)
         return event
 
     def unschedule(self, callback):
-        '''Remove a previous schedule event'''
-        self._events = [x for x in self._events if x.callback() != callback]
+        '''Remove a previous schedule event. The callback can be the
+        function, or the event returned by schedule_once() or
+        schedule_interval() (faster).'''
+        if isinstance(callback, _Event):
+            self._remove(callback)
+            return
+        events = self._index.get(_callback_key(callback))
+        if not events:
+            return
+        for event in events[:]:
+            if event.callback() == callback:
+                self._remove(event)
+
+    def _add(self, event):
+        self._index.setdefault(event._key, []).append(event)
+        self._push(event)
+
+    def _push(self, event):
+        event._queued = True
+        heappush(self._heap, (event.deadline, next(self._seq), event))
+
+    def _remove(self, event):
+        if event._removed:
+            return
+        event._removed = True
+        events = self._index[event._key]
+        events.remove(event)
+        if not events:
+            del self._index[event._key]
+
+        # the event is removed from the heap when it reach the top. If too
+        # much removed events are waiting, rebuild the heap.
+        if not event._queued:
+            return
+        self._removed += 1
+        heap = self._heap
+        if self._removed > 32 and self._removed > len(heap) / 2:
+            for entry in heap:
+                entry[2]._queued = not entry[2]._removed
+            self._heap = [x for x in heap if not x[2]._removed]
+            heapify(self._heap)
+            self._removed = 0
 
     def _process_events(self):
-        for event in self._events[:]:
-            if event.tick(self._last_tick) == False:
-                # event may be already removed by the callback
-                if event in self._events:
-                    self._events.remove(event)
+        curtime = self._last_tick
+        heap = self._heap
+
+        # take out all the events that must be called. events scheduled by
+        # the callbacks will be processed on the next tick.
+        due = []
+        while heap and heap[0][0] <= curtime:
+            event = heappop(heap)[2]
+            event._queued = False
+            if event._removed:
+                self._removed -= 1
+                continue
+            due.append(event)
+
+        fired = 0
+        for event in due:
+            # event may be removed by a previous callback
+            if event._removed:
+                continue
+            ret = event.tick(curtime)
+            # the event update his last call time when the callback is called
+            if event._last_dt == curtime and event.invalidate:
+                fired += 1
+            if ret == False:
+                self._remove(event)
+            elif not event._removed:
+                self._push(event)
+        self._fired = fired
+
+    def _process_thread_events(self):
+        queue = self._thread_queue
+        popleft = queue.popleft
+        start = _perf_counter()
+        limit = start + self.thread_budget
+        n = 0
+        fired = 0
+        # always process at least one callback, to make progress even if the
+        # budget is too small
+        while n < self.thread_batch:
+            try:
+                callback, largs, invalidate = popleft()
+            except IndexError:
+                break
+            n += 1
+            if invalidate:
+                fired += 1
+            callback(*largs)
+            if _perf_counter() > limit:
+                break
+        self._thread_processed += n
+        self._thread_time += _perf_counter() - start
+        self._fired += fired
+
+
+class FramePacer(object):
+    '''Frame pacing for the main loop: limit the frame rate to a target FPS,
+    by sleeping until the next frame deadline.
+
+    Deadlines are computed from the previous deadline, not from the end of the
+    frame, so the frame rate don't drift. The imprecision of the system sleep
+    is measured and removed from the next sleeps.
+
+    When the loop is late, no sleep is done until it catch up the deadlines.
+    The rendering of a late frame can be skipped, input are always processed.
+    If the loop is too late, the deadline is resynchronized instead of
+    drawing a burst of frames.
+
+    :Parameters:
+        `fps`: float, default to 0
+            Target FPS. If 0, the frame rate is not limited.
+        `max_frame_skip`: int, default to 0
+            Maximum number of consecutive frames without rendering, when the
+            loop is late.
+        `clock`: Clock, default to None
+            Clock from which the time source is taken. If None, the default
+            clock is used.
+    '''
+
+    __slots__ = ('_period', '_fps', '_deadline', '_skipped', '_sleep_error',
+                 'max_frame_skip', 'frames_rendered', 'frames_skipped',
+                 'frames_late', 'sleep_time', 'clock')
+
+    def __init__(self, fps=0, max_frame_skip=0, clock=None):
+        self.clock = clock
+        self._fps = 0
+        self._period = 0
+        self._deadline = None
+        self._skipped = 0
+        self._sleep_error = 0.
+        self.fps = fps
+        self.max_frame_skip = max_frame_skip
+        #: Number of frames rendered
+        self.frames_rendered = 0
+        #: Number of frames with rendering skipped
+        self.frames_skipped = 0
+        #: Number of frames that missed their deadline
+        self.frames_late = 0
+        #: Time passed in sleep during the last frame
+        self.sleep_time = 0.
+
+    def _get_fps(self):
+        return self._fps
+    def _set_fps(self, fps):
+        fps = float(fps)
+        self._fps = max(0., fps)
+        self._period = 1. / fps if fps > 0 else 0
+        self._deadline = None
+    fps = property(_get_fps, _set_fps,
+                   doc='Get/set the target FPS (0 mean no limit)')
+
+    def _get_time_source(self):
+        return (self.clock or _default_clock).time_source
+
+    def should_render(self):
+        '''Return False if the rendering of the current frame must be skipped
+        to catch up the deadlines.'''
+        period = self._period
+        if period and self._skipped < self.max_frame_skip and \
+           self._deadline is not None and \
+           self._get_time_source().time() - self._deadline > period:
+            self._skipped += 1
+            self.frames_skipped += 1
+            return False
+        self._skipped = 0
+        self.frames_rendered += 1
+        return True
+
+    def wait(self):
+        '''Sleep until the deadline of the next frame'''
+        self.sleep_time = 0.
+        period = self._period
+        if not period:
+            return
+        source = self._get_time_source()
+        now = source.time()
+        if self._deadline is None:
+            self._deadline = now
+        self._deadline += period
+        remaining = self._deadline - now
+
+        if remaining <= 0:
+            # late, don't sleep to catch up. If we are too late, catching up
+            # would produce a burst of frames: resynchronize.
+            self.frames_late += 1
+            if -remaining > period * (self.max_frame_skip + 1):
+                self._deadline = now
+            return
+
+        # sleep, minus the average oversleep of the system
+        duration = remaining - self._sleep_error
+        if duration <= 0:
+            return
+        source.sleep(duration)
+        self.sleep_time = source.time() - now
+        error = self.sleep_time - duration
+        self._sleep_error = min(max(
+            self._sleep_error * .9 + error * .1, 0.), period * .5)
+
+    def get_stats(self):
+        '''Return a dict with the pacing statistics'''
+        return {
+            'fps': self._fps,
+            'rendered': self.frames_rendered,
+            'skipped': self.frames_skipped,
+            'late': self.frames_late,
+            'sleep': self.sleep_time}
 
 
 # create a default clock
-_default_clock = Clock()
+_default_clock = Clock(_create_time_source(pymt_options.get('clock')))
 
 # make it available
 def getClock():
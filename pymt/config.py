@@ -11,7 +11,7 @@ from pymt.logger import pymt_logger
 from pymt import pymt_home_dir, pymt_config_fn, logger
 
 # Version number of current configuration format
-PYMT_CONFIG_VERSION = 16
+PYMT_CONFIG_VERSION = 23
 
 #: PyMT configuration object
 pymt_config = None
@@ -175,6 +175,35 @@ if not 'PYMT_DOC_INCLUDE' in os.environ:
             # ability to rotate the window
             pymt_config.setdefault('graphics', 'rotation', '0')
 
+        elif pymt_config_version == 16:
+            # coalescing policy of the input event queue
+            pymt_config.setdefault('pymt', 'input_coalesce', 'latest')
+
+        elif pymt_config_version == 17:
+            # redraw the window only when needed
+            pymt_config.setdefault('graphics', 'redraw_mode', 'continuous')
+
+        elif pymt_config_version == 18:
+            # frames that can be skipped by the frame pacer when late
+            pymt_config.setdefault('graphics', 'max_frame_skip', '0')
+
+        elif pymt_config_version == 19:
+            # persistent cache of rendered labels and svg, size in MB
+            pymt_config.setdefault('pymt', 'disk_cache', '0')
+            pymt_config.setdefault('pymt', 'disk_cache_size', '64')
+
+        elif pymt_config_version == 20:
+            # number of threads used by the image loader
+            pymt_config.setdefault('pymt', 'loader_workers', '2')
+
+        elif pymt_config_version == 21:
+            # number of processes used to decode images (posix only)
+            pymt_config.setdefault('pymt', 'loader_processes', '0')
+
+        elif pymt_config_version == 22:
+            # number of simultaneous http downloads
+            pymt_config.setdefault('pymt', 'http_connections', '4')
+
         else:
             # for future.
             break
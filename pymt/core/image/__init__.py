@@ -2,7 +2,7 @@
 Image: handle loading of images
 '''
 
-__all__ = ('Image', 'ImageLoader', 'ImageData')
+__all__ = ('Image', 'ImageLoader', 'ImageData', 'ImageLoaderData')
 
 from pymt.core import core_register_libs
 from pymt.baseobject import BaseObject
@@ -30,25 +30,56 @@ class ImageData(object):
     def release_data(self):
         self.data = None
 
+    @property
+    def cache_size(self):
+        '''Return the memory used by the data, in bytes (readonly)'''
+        if self.data is None:
+            return 0
+        return self.width * self.height * len(self.mode)
+
 
 class ImageLoaderBase(object):
-    '''Base to implement an image loader.'''
+    '''Base to implement an image loader.
+
+    If `max_size` is given (int or (width, height)), the image is downscaled
+    while loading to fit in it, keeping the aspect ratio. The loader should
+    use the fastest way available, like decoding at a lower resolution.
+
+    If `fileobj` is given, the image is read from this file object instead
+    of the filename, that is only used to know the format.'''
 
     __slots__ = ('_texture', '_data', 'filename', 'keep_data',
-                '_texture_rectangle', '_texture_mipmap')
+                '_texture_rectangle', '_texture_mipmap', 'max_size',
+                'fileobj')
 
     def __init__(self, filename, **kwargs):
         self._texture_rectangle = kwargs.get('texture_rectangle', True)
         self._texture_mipmap = kwargs.get('texture_mipmap', False)
         self.keep_data  = kwargs.get('keep_data', False)
+        self.max_size   = kwargs.get('max_size')
+        if isinstance(self.max_size, (int, long)):
+            self.max_size = (self.max_size, self.max_size)
         self.filename   = filename
+        self.fileobj    = kwargs.get('fileobj')
         self._texture   = None
         self._data      = self.load(filename)
+        self.fileobj    = None
 
     def load(self, filename):
         '''Load an image'''
         return None
 
+    def get_fit_size(self, width, height):
+        '''Return the size of the image once fitted in max_size, or None if
+        the image don't need to be downscaled.'''
+        if self.max_size is None:
+            return None
+        mw, mh = self.max_size
+        if width <= mw and height <= mh:
+            return None
+        ratio = min(mw / float(width), mh / float(height))
+        return max(1, int(width * ratio)), max(1, int(height * ratio))
+
     def _get_width(self):
         return self._data.width
     width = property(_get_width, doc='Image width')
@@ -75,6 +106,16 @@ class ImageLoaderBase(object):
     texture = property(_get_texture,
                       doc='Get the image texture (created on the first call)')
 
+    @property
+    def cache_size(self):
+        '''Return the memory used by the texture, or by the data if the
+        texture is not yet created, in bytes (readonly)'''
+        if self._texture is not None:
+            return self._texture.cache_size
+        if self._data is not None:
+            return self._data.cache_size
+        return 0
+
     @deprecated
     def get_texture(self):
         '''Retreive the texture of image
@@ -82,6 +123,20 @@ class ImageLoaderBase(object):
         return self.texture
 
 
+class ImageLoaderData(ImageLoaderBase):
+    '''Image loader for data already decoded. ::
+
+        image = ImageLoaderData('myimage', data=ImageData(w, h, 'RGBA', buf))
+    '''
+
+    def __init__(self, filename, **kwargs):
+        self._imagedata = kwargs.get('data')
+        super(ImageLoaderData, self).__init__(filename, **kwargs)
+
+    def load(self, filename):
+        return self._imagedata
+
+
 class ImageLoader(object):
     __slots__ = ('loaders')
     loaders = []
@@ -237,6 +292,15 @@ class Image(BaseObject):
             return self.image.texture
         return self._texture
 
+    @property
+    def cache_size(self):
+        '''Return the memory used by the image, in bytes (readonly)'''
+        if self.image:
+            return self.image.cache_size
+        if self._texture is not None:
+            return self._texture.cache_size
+        return 0
+
     def draw(self):
         '''Draw the image on screen'''
         imgpos = (int(self.x - self.anchor_x * self.scale),
@@ -29,11 +29,22 @@ class ImageLoaderPIL(ImageLoaderBase):
     def load(self, filename):
         pymt.pymt_logger.debug('Image: Load <%s>' % filename)
         try:
-            im = Image.open(filename)
+            if self.fileobj is not None:
+                im = Image.open(self.fileobj)
+            else:
+                im = Image.open(filename)
         except:
             pymt.pymt_logger.warning('Image: Unable to load image <%s>' % filename)
             raise
 
+        # downscale the image if asked. draft() configure the decoder to the
+        # smallest scale bigger than the size (jpeg only), then thumbnail()
+        # resize to the exact size.
+        size = self.get_fit_size(*im.size)
+        if size is not None:
+            im.draft(im.mode, size)
+            im.thumbnail(size, Image.ANTIALIAS)
+
         # image loader work only with rgb/rgba image
         if im.mode not in ('RGB', 'RGBA'):
             try:
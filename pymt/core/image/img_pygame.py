@@ -31,7 +31,11 @@ class ImageLoaderPygame(ImageLoaderBase):
     def load(self, filename):
         pymt.pymt_logger.debug('Image: Load <%s>' % filename)
         try:
-            im = pygame.image.load(filename)
+            if self.fileobj is not None:
+                # the filename is used as a hint for the format
+                im = pygame.image.load(self.fileobj, filename)
+            else:
+                im = pygame.image.load(filename)
         except:
             pymt.pymt_logger.warning('Image: Unable to load image <%s>' % filename)
             raise
@@ -54,6 +58,15 @@ class ImageLoaderPygame(ImageLoaderBase):
                 raise
             im = imc
 
+        # downscale the image if asked
+        size = self.get_fit_size(im.get_width(), im.get_height())
+        if size is not None:
+            try:
+                im = pygame.transform.smoothscale(im, size)
+            except ValueError:
+                # smoothscale work only on 24/32 bits surface
+                im = pygame.transform.scale(im, size)
+
         # update internals
         self.filename = filename
         data = pygame.image.tostring(im, mode, True)
@@ -2,7 +2,7 @@
 SVG: handle loading of svg data
 '''
 
-__all__ = ('Svg',)
+__all__ = ('Svg', 'SvgBase', 'SvgLoader')
 
 from pymt.core import core_register_libs
 from pymt.baseobject import BaseObject
@@ -13,23 +13,35 @@ from OpenGL.GL import glTranslate, glScale
 Cache.register('pymt.svg', limit=50)
 
 class SvgBase(object):
-    '''Base to implement an svg loader.'''
+    '''Base to implement an svg loader.
+
+    If `finalize` is False, the svg is only parsed: it can be done in a
+    thread, and finalize() must be called later in the main thread.'''
 
     __slots__ = ('filename', )
 
     def __init__(self, filename, **kwargs):
         self.filename = filename
 
+        if not kwargs.get('finalize', True):
+            # the cache is not thread safe, it will be filled in finalize()
+            self.svg_data = self.load(filename)
+            return
+
         self.svg_data = Cache.get('pymt.svg', filename)
         if not self.svg_data:
-            new_svg = self.load(filename)
-            Cache.append('pymt.svg', filename, new_svg)
-            self.svg_data = new_svg
+            self.svg_data = self.load(filename)
+        self.finalize()
 
     def load(self, filename):
         '''Load an svg'''
         raise NotImplementedError("abstract class SvgLoaderBase: subclass must be implemented by svg provider")
 
+    def finalize(self):
+        '''Create the OpenGL objects needed to draw the svg, and store it in
+        the cache. Must be called in the main thread.'''
+        Cache.append('pymt.svg', self.filename, self.svg_data)
+
     def __getattr__ (self, name):
         return self.svg_data.__getattribute__(name)
 
@@ -59,8 +71,8 @@ class Svg(BaseObject):
     '''Load and draw an SVG file.
 
     :Parameters:
-        `filename`: str
-            Path to the svg that should be loaded.
+        `arg`: str or SvgBase
+            Path to the svg that should be loaded, or an svg already loaded.
         `keep_data`: bool, default to False
             Keep the raw svg data when the display list is created
         `scale`: float, default to 1.0
@@ -97,6 +109,12 @@ class Svg(BaseObject):
         #this actually loads the svg
         if isinstance(arg, basestring):
             self.filename   = arg
+        elif isinstance(arg, SvgBase):
+            self._filename  = arg.filename
+            self.svg_object = arg
+        elif arg is None:
+            # the svg will be set later (by the Loader)
+            pass
         else:
             raise Exception('Unable to load image with type %s' % str(type(arg)))
 
@@ -115,10 +133,14 @@ class Svg(BaseObject):
             self.y = kwargs.get('y')
 
     def _get_original_width(self):
+        if self.svg_object is None:
+            return 0
         return self.svg_object.width
     original_width = property(_get_original_width)
 
     def _get_original_height(self):
+        if self.svg_object is None:
+            return 0
         return self.svg_object.height
     original_height = property(_get_original_height)
 
@@ -129,14 +151,14 @@ class Svg(BaseObject):
     def _get_width(self):
         return self._scale_x*self.original_width
     def _set_width(self, w):
-        if self.width != w: #nothing to do
+        if self.width != w and self.original_width:
             self._scale_x = w/float(self.original_width)
     width = property(_get_width, _set_width)
 
     def _get_height(self):
         return self._scale_y*self.original_height
     def _set_height(self, h):
-        if self.height != h: #nothing to do
+        if self.height != h and self.original_height:
             self._scale_y = h/float(self.original_height)
     height = property(_get_height, _set_height)
 
@@ -168,6 +190,8 @@ class Svg(BaseObject):
 
     def draw(self):
         '''Draw the svg on screen'''
+        if self.svg_object is None:
+            return
         with gx_matrix:
             glTranslate(self.x, self.y, 0)
             glScale(self._scale_x, self._scale_y, 1)
@@ -20,13 +20,17 @@ class SvgSquirtle(SvgBase):
         '''loads a squirtle svg object from teh filename'''
         pymt.pymt_logger.debug('SVG: Load <%s>' % filename)
         try:
-            svg = squirtle.SVG(filename)
+            svg = squirtle.SVG(filename, compile=False)
         except:
             pymt.pymt_logger.warning('SVG: Unable to load SVG file <%s>' %
                                      filename)
             raise
         return svg
 
+    def finalize(self):
+        self.svg_data.compile()
+        super(SvgSquirtle, self).finalize()
+
     def draw(self):
         self.svg_data.draw(0, 0)
 
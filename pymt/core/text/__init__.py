@@ -9,11 +9,15 @@ import re
 import os
 from pymt.core import core_select_lib
 from pymt.baseobject import BaseObject
+from pymt.diskcache import DiskCache
 
 DEFAULT_FONT = 'Liberation Sans,Bitstream Vera Sans,Free Sans,Arial, Sans'
 
 label_font_cache = {}
 
+# rendered labels can be stored in the disk cache
+DiskCache.register('pymt.label', pymt.__version__)
+
 class LabelBase(BaseObject):
     '''Core text label.
     This is the abstract class used for different backend to render text.
@@ -265,7 +269,10 @@ class LabelBase(BaseObject):
         # get data from provider
         data = self._render_end()
         assert(data)
+        self._update_texture(data)
+        return data
 
+    def _update_texture(self, data):
         # create texture is necessary
         if self.texture is None:
             self.texture = pymt.Texture.create(*self.size)
@@ -279,14 +286,30 @@ class LabelBase(BaseObject):
         # update texture
         self.texture.blit_data(data)
 
-
     def refresh(self):
         '''Force re-rendering of the label'''
-        # first pass, calculating width/height
-        sz = self.render()
-        self._size = sz
-        # second pass, render for real
-        self.render(real=True)
+        # the label may have been rendered in a previous run
+        key = entry = None
+        if DiskCache.is_enabled():
+            key = DiskCache.get_key('pymt.label', self.__class__.__name__,
+                self.label, self.usersize, sorted(self.options.items()))
+            entry = DiskCache.get('pymt.label', key)
+
+        if entry is not None:
+            (w, h, mode), data = entry
+            sz = w, h
+            self._size = sz
+            self._update_texture(pymt.ImageData(w, h, mode, data))
+        else:
+            # first pass, calculating width/height
+            sz = self.render()
+            self._size = sz
+            # second pass, render for real
+            data = self.render(real=True)
+            if key is not None and data is not None:
+                DiskCache.append('pymt.label', key,
+                    (data.width, data.height, data.mode), data.data)
+
         self._size = sz[0] + self.options['padding_x'] * 2, \
                      sz[1] + self.options['padding_y'] * 2
 
@@ -409,6 +432,13 @@ class LabelBase(BaseObject):
             return (0, 0)
         return (self.content_width, self.content_height)
 
+    @property
+    def cache_size(self):
+        '''Return the memory used by the label texture, in bytes'''
+        if self.texture is None:
+            return 0
+        return self.texture.cache_size
+
     @property
     def fontid(self):
         '''Return an uniq id for all font parameters'''
@@ -103,19 +103,8 @@ class MarkupLabel(MarkupLabelBase):
         # get data from provider
         data = self._render_end()
         assert(data)
-
-        # create texture is necessary
-        if self.texture is None:
-            self.texture = pymt.Texture.create(*self.size)
-            self.texture.flip_vertical()
-        elif self.width > self.texture.width or self.height > self.texture.height:
-            self.texture = pymt.Texture.create(*self.size)
-            self.texture.flip_vertical()
-        else:
-            self.texture = self.texture.get_region(0, 0, self.width, self.height)
-
-        # update texture
-        self.texture.blit_data(data)
+        self._update_texture(data)
+        return data
 
     def render_label(self, real, label, args):
         x, y, w, h, lw, lh, nl = args
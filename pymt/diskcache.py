@@ -0,0 +1,258 @@
+'''
+Disk cache: store computed data on disk, to reuse it on the next run
+
+The disk cache is a second tier below the :class:`Cache`. It's used for data
+that take time to compute, and that are always the same for the same input:
+rendered labels, tesselated SVG... It's disabled by default, activate it in
+the configuration ::
+
+    [pymt]
+    disk_cache = 1
+    disk_cache_size = 64
+
+Each entry is stored in ~/.pymt/cache, in a file named with the hash of the
+input and of the provider version. The data is read back with mmap, without
+any copy ::
+
+    DiskCache.register('mycategory', version=1)
+
+    key = DiskCache.get_key('mycategory', filename, size)
+    entry = DiskCache.get('mycategory', key)
+    if entry is None:
+        header, data = compute(filename, size)
+        DiskCache.append('mycategory', key, header, data)
+    else:
+        header, data = entry
+
+The header must be a simple python object (readable by marshal), and the data
+a string or any object with a buffer interface. The data is returned as a
+ctypes array of bytes.
+
+When the cache is bigger than disk_cache_size (in MB), the entries that have
+not been used for the longest time are deleted.
+'''
+
+__all__ = ('DiskCache', )
+
+import os
+import mmap
+import ctypes
+import marshal
+import struct
+import tempfile
+from hashlib import sha1
+from pymt.logger import pymt_logger
+
+# magic, format version, header size, data offset, data size
+_entry_header = struct.Struct('<4sIIII')
+_entry_magic = 'PMTC'
+_entry_version = 1
+# alignment of the data in the file
+_entry_align = 16
+
+class DiskCache(object):
+    '''Disk cache, a manager to store computed data between runs'''
+
+    _versions = {}
+    _enabled = None
+    _path = None
+    _max_bytes = None
+    _bytes = 0
+
+    @staticmethod
+    def register(category, version):
+        '''Register a new category in the disk cache
+
+        :Parameters:
+            `category` : str
+                Identifier of the category
+            `version` : str
+                Version of the provider of the data. Change it when the
+                format or the result of the computation change: the
+                previous entries will be not used anymore.
+        '''
+        DiskCache._versions[category] = str(version)
+
+    @staticmethod
+    def enable(path, max_bytes=None):
+        '''Activate the disk cache
+
+        :Parameters:
+            `path` : str
+                Directory where the entries are stored
+            `max_bytes` : int (optionnal)
+                Maximum size of the cache on the disk, in bytes.
+                If None, no limit is applied.
+        '''
+        if not os.path.exists(path):
+            os.makedirs(path)
+        DiskCache._path = path
+        DiskCache._max_bytes = max_bytes
+        DiskCache._enabled = True
+        DiskCache._trim()
+        pymt_logger.debug('DiskCache: use <%s>, %d bytes used' % (
+            path, DiskCache._bytes))
+
+    @staticmethod
+    def disable():
+        '''Deactivate the disk cache'''
+        DiskCache._enabled = False
+
+    @staticmethod
+    def is_enabled():
+        '''Return True if the disk cache is activated'''
+        if DiskCache._enabled is None:
+            DiskCache._enabled = False
+            try:
+                from pymt import pymt_config, pymt_home_dir
+                if pymt_config.getboolean('pymt', 'disk_cache'):
+                    DiskCache.enable(os.path.join(pymt_home_dir, 'cache'),
+                        pymt_config.getint('pymt', 'disk_cache_size') *
+                        1024 * 1024)
+            except Exception, e:
+                pymt_logger.warning('DiskCache: unable to activate: %s' % e)
+        return DiskCache._enabled
+
+    @staticmethod
+    def get_key(category, *largs):
+        '''Return a key for the input arguments. The key include the version
+        of the category.
+
+        :Parameters:
+            `category` : str
+                Identifier of the category
+            `*largs` : anything
+                Input of the computation. Their repr() is used to create the
+                key.
+        '''
+        version = DiskCache._versions[category]
+        return sha1('%s\0%s\0%r' % (category, version, largs)).hexdigest()
+
+    @staticmethod
+    def get(category, key):
+        '''Get an entry from the disk cache. Return a tuple (header, data),
+        or None if the entry is not found.
+
+        :Parameters:
+            `category` : str
+                Identifier of the category
+            `key` : str
+                Key of the entry, returned by get_key()
+        '''
+        if not DiskCache.is_enabled():
+            return None
+        filename = os.path.join(DiskCache._path, category, key)
+        try:
+            with open(filename, 'rb') as fd:
+                # copy on write: the data can be used as a writable buffer,
+                # but nothing is written back to the file.
+                mm = mmap.mmap(fd.fileno(), 0, access=mmap.ACCESS_COPY)
+        except (IOError, OSError, ValueError):
+            return None
+        try:
+            magic, version, header_size, offset, size = \
+                    _entry_header.unpack_from(mm)
+            if magic != _entry_magic or version != _entry_version:
+                raise ValueError('invalid magic or version')
+            if offset + size > len(mm):
+                raise ValueError('truncated entry')
+            start = _entry_header.size
+            header = marshal.loads(mm[start:start + header_size])
+            data = (ctypes.c_ubyte * size).from_buffer(mm, offset)
+        except Exception, e:
+            pymt_logger.warning('DiskCache: remove invalid entry <%s>: %s' %
+                                (filename, e))
+            DiskCache._remove(filename)
+            return None
+        # the modification time is used to remove the oldest entries
+        try:
+            os.utime(filename, None)
+        except OSError:
+            pass
+        return header, data
+
+    @staticmethod
+    def append(category, key, header, data):
+        '''Add a new entry in the disk cache.
+
+        :Parameters:
+            `category` : str
+                Identifier of the category
+            `key` : str
+                Key of the entry, returned by get_key()
+            `header` : object
+                Description of the data, must be readable by marshal
+            `data` : str or buffer
+                Data to store
+        '''
+        if not DiskCache.is_enabled():
+            return
+        header = marshal.dumps(header)
+        data = buffer(data)
+        offset = _entry_header.size + len(header)
+        padding = -offset % _entry_align
+        offset += padding
+        directory = os.path.join(DiskCache._path, category)
+        filename = os.path.join(directory, key)
+        tmpfilename = None
+        try:
+            if not os.path.exists(directory):
+                os.makedirs(directory)
+            # write in a temporary file, and rename it when it's complete.
+            # another process will never read a partial entry.
+            fd, tmpfilename = tempfile.mkstemp(dir=directory)
+            with os.fdopen(fd, 'wb') as fp:
+                fp.write(_entry_header.pack(_entry_magic, _entry_version,
+                         len(header), offset, len(data)))
+                fp.write(header)
+                fp.write('\0' * padding)
+                fp.write(data)
+            if os.name == 'nt' and os.path.exists(filename):
+                os.unlink(filename)
+            os.rename(tmpfilename, filename)
+        except (IOError, OSError), e:
+            pymt_logger.warning('DiskCache: unable to write <%s>: %s' %
+                                (filename, e))
+            if tmpfilename is not None:
+                DiskCache._remove(tmpfilename)
+            return
+        DiskCache._bytes += offset + len(data)
+        if DiskCache._max_bytes is not None and \
+           DiskCache._bytes > DiskCache._max_bytes:
+            DiskCache._trim()
+
+    @staticmethod
+    def get_size():
+        '''Return the size of the disk cache, in bytes'''
+        return DiskCache._bytes
+
+    @staticmethod
+    def _remove(filename):
+        try:
+            os.unlink(filename)
+        except OSError:
+            pass
+
+    @staticmethod
+    def _trim():
+        # compute the size of the cache, and if it's too big, remove the
+        # entries not used since the longest time, until 3/4 of the limit.
+        entries = []
+        for root, dirs, files in os.walk(DiskCache._path):
+            for filename in files:
+                filename = os.path.join(root, filename)
+                try:
+                    st = os.stat(filename)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, filename))
+        DiskCache._bytes = sum(x[1] for x in entries)
+        max_bytes = DiskCache._max_bytes
+        if max_bytes is None or DiskCache._bytes <= max_bytes:
+            return
+        entries.sort()
+        for mtime, size, filename in entries:
+            if DiskCache._bytes <= max_bytes * 3 / 4:
+                break
+            DiskCache._remove(filename)
+            DiskCache._bytes -= size
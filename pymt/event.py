@@ -148,28 +148,56 @@ from pymt.weakmethod import WeakMethod
 from pymt.baseobject import BaseObject
 from pymt.logger import pymt_logger
 
+#: Interned sets of event types. All the instances of a class register the
+#: same event types, so they share the same frozenset, and the transitions
+#: from one set to another are computed only once.
+_event_types_sets = {}
+_event_types_transitions = {}
+_event_types_empty = frozenset()
+
+def _event_types_change(event_types, event_type, add):
+    '''(internal) Return the interned set of event types, after adding or
+    removing an event type'''
+    key = (event_types, event_type, add)
+    result = _event_types_transitions.get(key)
+    if result is None:
+        if add:
+            result = event_types.union((event_type, ))
+        else:
+            result = event_types.difference((event_type, ))
+        result = _event_types_sets.setdefault(result, result)
+        _event_types_transitions[key] = result
+    return result
+
 class EventDispatcher(BaseObject):
     '''Generic event dispatcher interface.
 
     See the module docstring for usage.
+
+    The handlers attached with push_handlers() or set_handler() are compiled
+    in a table (event type -> handlers, from the top of the stack) each time
+    they change. Without handlers, dispatching an event is a direct call to
+    the default handler.
     '''
 
-    __slots__ = ('_event_types', '_event_stack')
+    __slots__ = ('_event_types', '_event_stack', '_event_table')
 
     def __init__(self, **kwargs):
         super(EventDispatcher, self).__init__(**kwargs)
-        self._event_types = []
+        self._event_types = _event_types_empty
         self._event_stack = None
+        self._event_table = None
 
     @property
     def event_types(self):
         '''List of event types available'''
-        return self._event_types
+        return list(self._event_types)
 
     def unregister_event_type(self, event_type):
         '''Remove an event types from the available list'''
         if event_type in self._event_types:
-            self._event_types.remove(event_type)
+            self._event_types = _event_types_change(
+                self._event_types, event_type, False)
 
     def register_event_type(self, event_type):
         '''Register an event type with the dispatcher.
@@ -183,11 +211,32 @@ class EventDispatcher(BaseObject):
                 Name of the event to register.
 
         '''
+        if event_type in self._event_types:
+            return
         if not hasattr(self, event_type):
             raise Exception('Missing default handler <%s> in <%s>' % (
                             event_type, self.__class__.__name__))
-        if not event_type in self._event_types:
-            self._event_types.append(event_type)
+        self._event_types = _event_types_change(
+            self._event_types, event_type, True)
+
+    def _compile_handlers(self):
+        '''(internal) Compile the handler stack in a table, to find the
+        handlers of an event type with one lookup. Must be called each time
+        the stack is changed.'''
+        table = {}
+        if self._event_stack is not None:
+            for frame in self._event_stack:
+                for name, handler in frame.iteritems():
+                    table[name] = table.get(name, ()) + (handler, )
+        self._event_table = table or None
+
+    def _remove_dead_handler(self, name, wkhandler):
+        '''(internal) Remove a handler that have been garbage collected'''
+        for frame in self._event_stack:
+            if frame.get(name) is wkhandler:
+                del frame[name]
+                break
+        self._compile_handlers()
 
     def push_handlers(self, *args, **kwargs):
         '''Push a level onto the top of the handler stack, then attach zero or
@@ -231,6 +280,7 @@ class EventDispatcher(BaseObject):
                     break
             except KeyError:
                 pass
+        self._compile_handlers()
 
     def remove_handlers(self, *args, **kwargs):
         '''Remove event handlers from the event stack.
@@ -270,6 +320,7 @@ class EventDispatcher(BaseObject):
                     del frame[name]
             except KeyError:
                 pass
+        self._compile_handlers()
 
     def _get_handlers(self, args, kwargs):
         '''Implement handler matching on arguments for set_handlers and
@@ -321,6 +372,7 @@ class EventDispatcher(BaseObject):
             self._event_stack = [{}]
 
         self._event_stack[0][name] = WeakMethod(handler)
+        self._compile_handlers()
 
     def dispatch_event(self, event_type, *args):
         '''Dispatch a single event to the attached handlers.
@@ -341,16 +393,13 @@ class EventDispatcher(BaseObject):
         if event_type not in self._event_types:
             return
 
-        # search handler stack for matching event handlers
-        _event_stack = self._event_stack
-        if _event_stack is not None:
-            for frame in _event_stack:
-                wkhandler = frame.get(event_type, None)
-                if wkhandler is None:
-                    continue
+        # call the handlers attached, from the top of the stack
+        _event_table = self._event_table
+        if _event_table is not None:
+            for wkhandler in _event_table.get(event_type, ()):
                 handler = wkhandler()
                 if handler is None:
-                    del frame[wkhandler]
+                    self._remove_dead_handler(event_type, wkhandler)
                     continue
                 try:
                     if handler(*args):
@@ -1,7 +1,7 @@
 '''
 Geometry: facilities functions for geometry calculations
 '''
-__all__ = ('circumcircle', 'minimum_bounding_circle')
+__all__ = ('circumcircle', 'minimum_bounding_circle', 'SpatialGrid')
 
 from pymt.vector import Vector
 
@@ -108,5 +108,120 @@ def minimum_bounding_circle(points):
     
     # find teh circumcenter for triangle given by P,Q,R
     return circumcircle(P, Q, R)
-   
-    
+
+
+class SpatialGrid(object):
+    '''Uniform grid over bounding boxes, to find quickly the objects under a
+    point. Each object is stored in the cells covered by his bounding box ::
+
+        grid = SpatialGrid(cell_size=128)
+        grid.insert(obj, (x, y, width, height))
+        for obj in grid.query_point(tx, ty):
+            ...
+
+    Objects covering too much cells (bigger than the screen for example) are
+    stored apart, and always returned as candidates.
+
+    :Parameters:
+        `cell_size` : int, default to 128
+            Size of a cell. Use something near the size of the objects.
+        `max_cells` : int, default to 64
+            Maximum number of cells for an object
+    '''
+
+    __slots__ = ('cell_size', 'max_cells', '_cells', '_items', '_large')
+
+    def __init__(self, cell_size=128, max_cells=64):
+        self.cell_size = float(cell_size)
+        self.max_cells = max_cells
+        # (cx, cy) -> set of objects
+        self._cells = {}
+        # object -> (bbox, cells)
+        self._items = {}
+        # objects not stored in the cells
+        self._large = set()
+
+    def __contains__(self, obj):
+        return obj in self._items
+
+    def __len__(self):
+        return len(self._items)
+
+    def __iter__(self):
+        return iter(self._items.keys())
+
+    def insert(self, obj, bbox):
+        '''Insert an object, or update his bounding box if it's already in the
+        grid.
+
+        :Parameters:
+            `obj` : object
+                Object to store, must be hashable
+            `bbox` : tuple
+                Bounding box of the object, in (x, y, width, height) format
+        '''
+        x, y, w, h = bbox
+        size = self.cell_size
+        x1, y1 = int(x // size), int(y // size)
+        x2, y2 = int((x + w) // size), int((y + h) // size)
+        if (x2 - x1 + 1) * (y2 - y1 + 1) > self.max_cells:
+            cells = None
+        else:
+            cells = (x1, y1, x2, y2)
+        item = self._items.get(obj)
+        if item is not None:
+            if item[1] == cells:
+                # still in the same cells, just update the bounding box
+                self._items[obj] = (bbox, cells)
+                return
+            self.remove(obj)
+        self._items[obj] = (bbox, cells)
+        if cells is None:
+            self._large.add(obj)
+            return
+        grid = self._cells
+        for cx in xrange(x1, x2 + 1):
+            for cy in xrange(y1, y2 + 1):
+                cell = grid.get((cx, cy))
+                if cell is None:
+                    cell = grid[(cx, cy)] = set()
+                cell.add(obj)
+
+    def remove(self, obj):
+        '''Remove an object from the grid'''
+        item = self._items.pop(obj, None)
+        if item is None:
+            return
+        cells = item[1]
+        if cells is None:
+            self._large.discard(obj)
+            return
+        x1, y1, x2, y2 = cells
+        grid = self._cells
+        for cx in xrange(x1, x2 + 1):
+            for cy in xrange(y1, y2 + 1):
+                cell = grid[(cx, cy)]
+                cell.discard(obj)
+                if not cell:
+                    del grid[(cx, cy)]
+
+    def clear(self):
+        '''Remove all the objects'''
+        self._cells.clear()
+        self._items.clear()
+        self._large.clear()
+
+    def query_point(self, x, y):
+        '''Return a list of the objects having (x, y) in their bounding box'''
+        size = self.cell_size
+        items = self._items
+        result = []
+        cell = self._cells.get((int(x // size), int(y // size)))
+        for candidates in (cell, self._large):
+            if not candidates:
+                continue
+            for obj in candidates:
+                bx, by, bw, bh = items[obj][0]
+                if bx <= x <= bx + bw and by <= y <= by + bh:
+                    result.append(obj)
+        return result
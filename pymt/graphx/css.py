@@ -1,8 +1,24 @@
 '''
 CSS: Draw shapes with css attributes !
+
+The rectangles are compiled at (0, 0) in a display list, and drawn with a
+translation: moving a widget doesn't rebuild anything. The display list is
+identified by the size and the values of the style used to draw it, and
+shared through the cache.
+
+A widget can keep his own :class:`CSSBackground`, that retain the shared
+display list and compare only the size and the used style values on each
+draw ::
+
+    self.background = CSSBackground()
+
+    def draw(self):
+        set_color(*self.style['bg-color'])
+        self.background.draw(pos=self.pos, size=self.size, style=self.style)
+
 '''
 
-__all__ = ('drawCSSRectangle', )
+__all__ = ('drawCSSRectangle', 'CSSBackground')
 
 import os
 from pymt.graphx.draw import drawRectangleAlpha, drawRectangle, \
@@ -10,16 +26,187 @@ from pymt.graphx.draw import drawRectangleAlpha, drawRectangle, \
 from pymt.graphx.colors import set_color
 from pymt.cache import Cache
 from pymt.graphx.statement import GlDisplayList, gx_color
+from pymt.graphx import statement
 from OpenGL.GL import GL_LINE_BIT, GL_LINE_LOOP, \
-        glPushAttrib, glPopAttrib, glLineWidth
+        glPushAttrib, glPopAttrib, glLineWidth, \
+        glPushMatrix, glPopMatrix, glTranslatef
 
 if not 'PYMT_DOC' in os.environ:
     Cache.register('pymt.cssrect', limit=100, timeout=60)
 
+# css keys used to draw the rectangle, with their default value.
+# bg-color is used only when a state is given.
+_css_rect_keys = (
+    ('bg-color', None),
+    ('border-width', 1.5),
+    ('border-radius', 0),
+    ('border-radius-precision', .1),
+    ('draw-border', 0),
+    ('draw-background', 1),
+    ('draw-alpha-background', 0),
+    ('alpha-background', (1, 1, .5, .5)),
+    ('border-color', None),
+)
+
+# (prefix, state) -> list of (names to search, default value)
+_css_rect_names = {}
+
+def _css_rect_get_names(prefix, state):
+    '''(internal) Return the names to search for each key, in the order of
+    priority: prefix-key-state, prefix-key, key-state, key'''
+    names = _css_rect_names.get((prefix, state))
+    if names is not None:
+        return names
+    names = []
+    for key, default in _css_rect_keys:
+        if key == 'bg-color' and not state:
+            names.append(((), default))
+            continue
+        search = []
+        if prefix is not None:
+            if state:
+                search.append('%s-%s-%s' % (prefix, key, state))
+            search.append('%s-%s' % (prefix, key))
+        if state:
+            search.append('%s-%s' % (key, state))
+        search.append(key)
+        names.append((tuple(search), default))
+    names = _css_rect_names[(prefix, state)] = tuple(names)
+    return names
+
+def _css_rect_signature(style, prefix, state):
+    '''(internal) Return the values of the style used to draw the rectangle,
+    with the prefix and state applied, in a hashable tuple'''
+    values = []
+    for names, default in _css_rect_get_names(prefix, state):
+        value = default
+        for name in names:
+            if name in style:
+                value = style[name]
+                break
+        if type(value) is list:
+            value = tuple(value)
+        values.append(value)
+    return tuple(values)
+
+def _css_rect_compile(size, signature):
+    '''(internal) Draw the rectangle at (0, 0)'''
+    bgcolor, linewidth, radius, precision, draw_border, draw_background, \
+            draw_alpha_background, alpha_background, bordercolor = signature
+
+    if bgcolor is not None:
+        set_color(*bgcolor) #hack becasue old widgets set this themselves
+
+    k = { 'pos': (0, 0), 'size': size }
+
+    if radius > 0:
+        k.update({
+            'radius': radius,
+            'precision': precision
+        })
+        if draw_background:
+            drawRoundedRectangle(**k)
+        if draw_border:
+            if linewidth:
+                glPushAttrib(GL_LINE_BIT)
+                glLineWidth(linewidth)
+            if bordercolor:
+                with gx_color(*bordercolor):
+                    drawRoundedRectangle(style=GL_LINE_LOOP, **k)
+            else:
+                drawRoundedRectangle(style=GL_LINE_LOOP, **k)
+            if linewidth:
+                glPopAttrib()
+        if draw_alpha_background:
+            drawRoundedRectangleAlpha(alpha=alpha_background, **k)
+    else:
+        if draw_background:
+            drawRectangle(**k)
+        if draw_border:
+            if linewidth:
+                glPushAttrib(GL_LINE_BIT)
+                glLineWidth(linewidth)
+            if bordercolor:
+                with gx_color(*bordercolor):
+                    drawRectangle(style=GL_LINE_LOOP, **k)
+            else:
+                drawRectangle(style=GL_LINE_LOOP, **k)
+            if linewidth:
+                glPopAttrib()
+        if draw_alpha_background:
+            drawRectangleAlpha(alpha=alpha_background, **k)
+
+def _css_rect_draw(dl, pos, key):
+    '''(internal) Draw the display list at pos, and compile it before if
+    needed.
+
+    If we are already inside a display list, the rectangle is drawn inline:
+    the outer list must not call the shared list, it can be released and
+    his id reused while the outer list is still drawn.'''
+    glPushMatrix()
+    glTranslatef(pos[0], pos[1], 0)
+    try:
+        if statement.gl_displaylist_generate:
+            _css_rect_compile(*key)
+            return
+        if not dl.is_compiled():
+            with dl:
+                _css_rect_compile(*key)
+        dl.draw()
+    finally:
+        glPopMatrix()
+
+def _css_rect_draw_cached(pos, key):
+    '''(internal) Draw the display list of the key, taken from the cache or
+    compiled and stored in it. Return the display list, or None if the
+    rectangle have been drawn inside another display list.'''
+    if statement.gl_displaylist_generate:
+        _css_rect_draw(None, pos, key)
+        return None
+    dl = Cache.get('pymt.cssrect', key)
+    if dl is None:
+        dl = GlDisplayList()
+        Cache.append('pymt.cssrect', key, dl)
+    _css_rect_draw(dl, pos, key)
+    return dl
+
+def _css_rect_draw_image(style, pos, size, state):
+    bg_image = style.get('bg-image-'+str(state))
+    if not bg_image:
+        bg_image = style.get('bg-image')
+    if bg_image:
+        bg_image.size = size
+        bg_image.pos = pos
+        bg_image.draw()
+
+
+class CSSBackground(object):
+    '''Retained rectangle drawn with CSS, for a widget background. The shared
+    display list is kept until the size or the used style values change, and
+    is drawn at the position with a translation.
+    '''
+
+    __slots__ = ('_key', '_dl')
+
+    def __init__(self):
+        self._key = None
+        self._dl = None
+
+    def draw(self, pos=(0, 0), size=(100, 100), style=dict(), prefix=None,
+             state=None):
+        '''Draw the rectangle. Same parameters as :func:`drawCSSRectangle`'''
+        key = (tuple(size), _css_rect_signature(style, prefix, state))
+        if key == self._key:
+            _css_rect_draw(self._dl, pos, key)
+        else:
+            self._dl = _css_rect_draw_cached(pos, key)
+            self._key = key if self._dl is not None else None
+        _css_rect_draw_image(style, pos, size, state)
+
 
 def drawCSSRectangle(pos=(0, 0), size=(100, 100), style=dict(), prefix=None, state=None):
     '''Draw a rectangle with CSS
-    
+
     :Parameters:
         `state`: if a certain state string is passed, we will use styles with this postifx instead.
             for example:  style[bg-color] and style[bg-color-down] are both set.
@@ -36,116 +223,6 @@ def drawCSSRectangle(pos=(0, 0), size=(100, 100), style=dict(), prefix=None, sta
 
     '''
 
-    bg_image = style.get('bg-image-'+str(state))
-    if not bg_image:
-        bg_image = style.get('bg-image')
-
-    # Check if we have a cached version
-    cache_id = '%s:%s:%s:%s:%s' % (pos, size, style, prefix, state)
-    cache = Cache.get('pymt.cssrect', cache_id)
-    if cache:
-        cache.draw()
-        if bg_image:
-            bg_image.size = size
-            bg_image.pos = pos
-            bg_image.draw()
-        return
-
-
-    # lets use the ones for given state,
-    # and ignore the regular ones if the state ones are there
-    if state:
-        state = "-" + state
-        newstyle = {}
-        overwrites = []
-        for s in style:
-            if state in s:
-                overwrite  = s.replace(state, '')
-                newstyle[overwrite] = style[s]
-                overwrites.append(overwrite)
-            if s not in overwrites:
-                newstyle[s] = style[s]
-        style = newstyle
-
-    # hack to remove prefix in style
-    if prefix is not None:
-        prefix += '-'
-        newstyle = {}
-        for k in style:
-            newstyle[k] = style[k]
-        for k in style:
-            if prefix in k:
-                newstyle[k.replace(prefix, '')] = style[k]
-        style = newstyle
-
-    style.setdefault('border-width', 1.5)
-    style.setdefault('border-radius', 0)
-    style.setdefault('border-radius-precision', .1)
-    style.setdefault('draw-border', 0)
-    style.setdefault('draw-background', 1)
-    style.setdefault('draw-alpha-background', 0)
-    style.setdefault('alpha-background', (1, 1, .5, .5))
-
-    k = { 'pos': pos, 'size': size }
-
-    new_cache = GlDisplayList()
-    with new_cache:
-
-        if state:
-            set_color(*style['bg-color']) #hack becasue old widgets set this themselves
-
-        linewidth = style.get('border-width')
-
-        bordercolor = None
-        if 'border-color' in style:
-            bordercolor = style['border-color']
-
-        if style['border-radius'] > 0:
-            k.update({
-                'radius': style['border-radius'],
-                'precision': style['border-radius-precision']
-            })
-            if style['draw-background']:
-                drawRoundedRectangle(**k)
-            if style['draw-border']:
-                if linewidth:
-                    glPushAttrib(GL_LINE_BIT)
-                    glLineWidth(linewidth)
-                if bordercolor:
-                    with gx_color(*bordercolor):
-                        drawRoundedRectangle(style=GL_LINE_LOOP, **k)
-                else:
-                    drawRoundedRectangle(style=GL_LINE_LOOP, **k)
-                if linewidth:
-                    glPopAttrib()
-            if style['draw-alpha-background']:
-                drawRoundedRectangleAlpha(alpha=style['alpha-background'], **k)
-        else:
-            if style['draw-background']:
-                drawRectangle(**k)
-            if style['draw-border']:
-                if linewidth:
-                    glPushAttrib(GL_LINE_BIT)
-                    glLineWidth(linewidth)
-                if bordercolor:
-                    with gx_color(*bordercolor):
-                        drawRectangle(style=GL_LINE_LOOP, **k)
-                else:
-                    drawRectangle(style=GL_LINE_LOOP, **k)
-                if linewidth:
-                    glPopAttrib()
-            if style['draw-alpha-background']:
-                drawRectangleAlpha(alpha=style['alpha-background'], **k)
-
-
-    # if the drawCSSRectangle is already inside a display list
-    # compilation will not happen, but drawing yes.
-    # so, store only if a cache is created !
-    if new_cache.is_compiled():
-        Cache.append('pymt.cssrect', cache_id, new_cache)
-        new_cache.draw()
-
-    if bg_image:
-        bg_image.size = size
-        bg_image.pos = pos
-        bg_image.draw()
+    key = (tuple(size), _css_rect_signature(style, prefix, state))
+    _css_rect_draw_cached(pos, key)
+    _css_rect_draw_image(style, pos, size, state)
@@ -33,7 +33,8 @@ except ImportError, e:
 # create a cache for label
 _temp_label = None
 if not 'PYMT_DOC' in os.environ:
-    Cache.register('pymt.label', timeout=1., limit=1000)
+    Cache.register('pymt.label', timeout=1., limit=1000,
+                   max_bytes=32 * 1024 * 1024)
 
 def _make_point_list(points):
     t = type(points)
@@ -53,9 +53,22 @@ from OpenGL.GL import GL_COMPILE, GL_COMPILE_AND_EXECUTE, \
         glEnable, glDisable, glGenLists, glNewList, glEndList, glCallList, \
         glBlendFunc, glMatrixMode, glPushMatrix, glLoadIdentity, glPopAttrib, \
         glPushMatrix, glPopAttrib, glColor3f, glColor4f, glBindTexture, \
-        glPopMatrix, glBegin, glEnd, glPushAttrib
+        glPopMatrix, glBegin, glEnd, glPushAttrib, glDeleteLists
+from pymt.clock import getClock
 
 gl_displaylist_generate = False
+
+# Like the textures, the display lists are not deleted from the GC: the
+# deletion is handed to the clock, and done from the main thread between two
+# frames.
+_displaylist_release_list = []
+def _displaylist_release(*largs):
+    while _displaylist_release_list:
+        dl = _displaylist_release_list.pop()
+        try:
+            glDeleteLists(dl, 1)
+        except:
+            pass
 class GlDisplayList:
     '''Abstraction to opengl display-list usage. Here is an example of usage
     ::
@@ -79,6 +92,19 @@ class GlDisplayList:
         if 'execute' in kwargs.get('mode'):
             self.mode = GL_COMPILE_AND_EXECUTE
 
+    def __del__(self):
+        dl = getattr(self, 'dl', None)
+        if dl and _displaylist_release_list is not None:
+            _displaylist_release_list.append(dl)
+            # schedule a release only for the first pending list,
+            # the others will be released in the same run.
+            if len(_displaylist_release_list) == 1:
+                try:
+                    getClock().schedule_from_thread(_displaylist_release,
+                                                    invalidate=False)
+                except:
+                    pass
+
     def __enter__(self):
         self.start()
 
@@ -0,0 +1,242 @@
+'''
+HTTP fetcher: download files with persistent connections and a disk cache
+
+The fetcher is used by the :class:`Loader` to download images. It keeps the
+connections open between requests (HTTP/1.1 keep-alive), and limits the
+number of simultaneous downloads. The number can be changed in the
+configuration ::
+
+    [pymt]
+    http_connections = 4
+
+The downloaded files are stored in the :class:`DiskCache` (when it's
+activated), with their ETag, Last-Modified and freshness time (from
+Cache-Control: max-age or Expires). A fresh file is returned without any
+request, and an expired file is revalidated with If-None-Match and
+If-Modified-Since: the server answer 304 Not Modified, and the file is not
+downloaded again ::
+
+    from pymt import Fetcher
+    data = Fetcher.fetch('http://mysite.com/test.png')
+
+The data returned is a string or a buffer, that can be read with StringIO.
+Other protocols (ftp...) are passed to urllib2, without cache.
+'''
+
+__all__ = ('Fetcher', 'HTTPFetcher')
+
+import time
+import socket
+import httplib
+import urllib2
+import urlparse
+import threading
+from email.utils import parsedate_tz, mktime_tz
+from pymt import pymt_config
+from pymt.logger import pymt_logger
+from pymt.diskcache import DiskCache
+
+DiskCache.register('pymt.http', 1)
+
+class HTTPFetcher(object):
+    '''Download files with a pool of persistent connections.
+
+    :Parameters:
+        `max_connections` : int, default to 4
+            Maximum number of simultaneous downloads
+        `max_idle` : int, default to 2
+            Maximum number of idle connections kept open for each host
+        `timeout` : int, default to 30
+            Timeout of the connections, in seconds
+    '''
+
+    #: Status of the redirections followed by fetch()
+    redirect_status = (301, 302, 303, 307, 308)
+
+    def __init__(self, max_connections=4, max_idle=2, timeout=30):
+        self.max_connections = max(1, max_connections)
+        self.max_idle = max_idle
+        self.timeout = timeout
+        self._semaphore = threading.BoundedSemaphore(self.max_connections)
+        self._lock = threading.Lock()
+        self._idle = {}
+        self.reset_stats()
+
+    def fetch(self, url, max_redirects=5):
+        '''Return the content of an url, from the disk cache if it's still
+        fresh or not modified on the server. Raise an IOError if the file
+        cannot be downloaded.
+
+        :Parameters:
+            `url` : str
+                Url to download
+            `max_redirects` : int, default to 5
+                Maximum number of redirections to follow
+        '''
+        if url.split(':', 1)[0].lower() not in ('http', 'https'):
+            fd = urllib2.urlopen(url)
+            try:
+                return fd.read()
+            finally:
+                fd.close()
+
+        # search in the disk cache
+        key = DiskCache.get_key('pymt.http', url)
+        entry = DiskCache.get('pymt.http', key)
+        headers = {}
+        if entry is not None:
+            (etag, modified, expires), data = entry
+            if expires > time.time():
+                self._count('hits')
+                return buffer(data)
+            if etag:
+                headers['If-None-Match'] = etag
+            if modified:
+                headers['If-Modified-Since'] = modified
+
+        for redirect in xrange(max_redirects + 1):
+            response, body = self._request(url, headers)
+            if response.status not in self.redirect_status:
+                break
+            location = response.getheader('location')
+            if not location:
+                break
+            url = urlparse.urljoin(url, location)
+        else:
+            raise IOError('Too many redirections for <%s>' % url)
+
+        if response.status == 304 and entry is not None:
+            self._count('revalidated')
+            expires = self._get_expires(response)
+            if expires is not None:
+                DiskCache.append('pymt.http', key, (
+                    response.getheader('etag') or etag,
+                    response.getheader('last-modified') or modified,
+                    expires), data)
+            return buffer(data)
+
+        if response.status != 200:
+            raise IOError('HTTP error %d (%s) for <%s>' % (
+                response.status, response.reason, url))
+
+        # store the file, if it can be reused later
+        expires = self._get_expires(response)
+        etag = response.getheader('etag')
+        modified = response.getheader('last-modified')
+        if expires is not None and (etag or modified or
+                                    expires > time.time()):
+            DiskCache.append('pymt.http', key, (
+                etag or '', modified or '', expires), body)
+        return body
+
+    def get_stats(self):
+        '''Return a dict with the number of requests sent, the connections
+        opened and reused, the files returned from the disk cache without
+        request (hits) or after a 304 answer (revalidated), and the bytes
+        downloaded.'''
+        with self._lock:
+            return dict(self._stats)
+
+    def reset_stats(self):
+        '''Reset the statistics returned by get_stats()'''
+        with self._lock:
+            self._stats = {'requests': 0, 'connections': 0, 'reused': 0,
+                           'hits': 0, 'revalidated': 0, 'downloaded': 0}
+
+    def close(self):
+        '''Close all the idle connections'''
+        with self._lock:
+            idle = self._idle
+            self._idle = {}
+        for connections in idle.itervalues():
+            for conn in connections:
+                conn.close()
+
+    def _count(self, name, value=1):
+        with self._lock:
+            self._stats[name] += value
+
+    def _request(self, url, headers):
+        '''(internal) Send a GET request, and return the response with his
+        body. If a reused connection have been closed by the server, the
+        request is sent again on a new connection.'''
+        parts = urlparse.urlsplit(url)
+        host = (parts.scheme.lower(), parts.hostname, parts.port)
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+        with self._semaphore:
+            while True:
+                conn, reused = self._get_connection(host)
+                try:
+                    conn.request('GET', path, headers=headers)
+                    response = conn.getresponse()
+                    body = response.read()
+                except (httplib.HTTPException, socket.error):
+                    conn.close()
+                    if reused:
+                        continue
+                    raise
+                self._count('requests')
+                self._count('downloaded', len(body))
+                if response.will_close:
+                    conn.close()
+                else:
+                    self._put_connection(host, conn)
+                return response, body
+
+    def _get_connection(self, host):
+        '''(internal) Return a tuple (connection, reused) for the host'''
+        with self._lock:
+            connections = self._idle.get(host)
+            if connections:
+                self._stats['reused'] += 1
+                return connections.pop(), True
+            self._stats['connections'] += 1
+        scheme, hostname, port = host
+        if scheme == 'https':
+            cls = httplib.HTTPSConnection
+        else:
+            cls = httplib.HTTPConnection
+        return cls(hostname, port, timeout=self.timeout), False
+
+    def _put_connection(self, host, conn):
+        '''(internal) Keep an idle connection for the next request'''
+        with self._lock:
+            connections = self._idle.setdefault(host, [])
+            if len(connections) < self.max_idle:
+                connections.append(conn)
+                return
+        conn.close()
+
+    def _get_expires(self, response):
+        '''(internal) Return the time until the response is fresh, or None
+        if it must not be stored'''
+        directives = {}
+        for directive in (response.getheader('cache-control') or '').split(','):
+            name, _, value = directive.strip().lower().partition('=')
+            directives[name] = value.strip('"')
+        if 'no-store' in directives:
+            return None
+        if 'no-cache' in directives:
+            return 0.
+        now = time.time()
+        if 'max-age' in directives:
+            try:
+                return now + int(directives['max-age'])
+            except ValueError:
+                return 0.
+        expires = response.getheader('expires')
+        if expires:
+            expires = parsedate_tz(expires)
+            if expires is None:
+                return 0.
+            # use the date of the server, his clock can be wrong
+            date = parsedate_tz(response.getheader('date') or '')
+            if date is None:
+                return mktime_tz(expires)
+            return now + mktime_tz(expires) - mktime_tz(date)
+        return 0.
+
+#: Default fetcher, used by the Loader
+Fetcher = HTTPFetcher(pymt_config.getint('pymt', 'http_connections'))
@@ -4,6 +4,7 @@ Input: All input providers (TUIO, WiiMote, Pen...)
 
 from pymt.input.postproc import *
 from pymt.input.provider import *
+from pymt.input.eventqueue import *
 from pymt.input.factory import *
 from pymt.input.providers import *
 from pymt.input.touch import *
@@ -0,0 +1,101 @@
+'''
+Touch Event Queue: coalesce pending input events before dispatching
+
+Input providers can push many events for the same touch between 2 frames
+(a TUIO table with 40 fingers flood the loop with move events). Only the
+latest state of a touch is interesting, since the touch object is shared
+and always hold its last position. This queue coalesce events by touch uid
+in constant time, and keep the insertion order.
+
+Available policies :
+
+    * latest: keep only the latest event of each type for a touch. The
+      coalesced event is moved to the end of the queue. (default)
+    * all: keep every event, no coalescing is done.
+    * merge: same as latest, but a move event is dropped if the down event
+      of the same touch is still pending.
+
+The policy can be configured in the PyMT config file ::
+
+    [pymt]
+    input_coalesce = latest
+
+'''
+
+__all__ = ('TouchEventQueue', )
+
+class TouchEventQueue(object):
+    '''Queue of pending (event, touch) input events, coalesced by touch uid.
+
+    :Parameters:
+        `policy` : str, default to 'latest'
+            Coalescing policy, can be one of 'latest', 'all', 'merge'
+    '''
+
+    __slots__ = ('_policy', '_queue', '_pending', '_dropped')
+
+    #: List of available policies
+    policies = ('latest', 'all', 'merge')
+
+    def __init__(self, policy='latest'):
+        # events in insertion order, a coalesced event is replaced by None
+        self._queue = []
+        # index in the queue of the pending events, by (event, uid)
+        self._pending = {}
+        self._dropped = 0
+        self._policy = None
+        self.policy = policy
+
+    def _get_policy(self):
+        return self._policy
+    def _set_policy(self, policy):
+        if policy not in TouchEventQueue.policies:
+            raise ValueError('Unknown coalescing policy <%s>' % policy)
+        self._policy = policy
+    policy = property(_get_policy, _set_policy,
+                      doc='Get/set the coalescing policy')
+
+    def __len__(self):
+        return len(self._queue) - self._dropped
+
+    def __iter__(self):
+        return (x for x in self._queue if x is not None)
+
+    def append(self, event, touch):
+        '''Add an event in the queue, and coalesce it with the pending events
+        of the same touch, according to the current policy.'''
+        queue = self._queue
+        policy = self._policy
+        if policy == 'all':
+            queue.append((event, touch))
+            return
+        pending = self._pending
+        uid = touch.uid
+        if policy == 'merge' and event == 'move' and ('down', uid) in pending:
+            # the touch is shared, down will be dispatched with latest state
+            return
+        key = (event, uid)
+        if key in pending:
+            queue[pending[key]] = None
+            self._dropped += 1
+        pending[key] = len(queue)
+        queue.append((event, touch))
+
+    def drain(self):
+        '''Return an iterator on all the pending events, and start a new
+        empty queue. Events pushed while iterating are kept for the next
+        drain.'''
+        queue = self._queue
+        if not queue:
+            return iter(())
+        dropped = self._dropped
+        self.clear()
+        if not dropped:
+            return iter(queue)
+        return (x for x in queue if x is not None)
+
+    def clear(self):
+        '''Remove all the pending events'''
+        self._queue = []
+        self._pending = {}
+        self._dropped = 0
@@ -1,5 +1,10 @@
 '''
 Input Postproc: analyse and process input (double tap, ignore list...)
+
+A postproc module is an object with a process() method. It receive an
+iterable of (type, touch) events, and must return an iterable of (type, touch)
+events. Returning a generator is preferred: events are streamed from the input
+queue through every module, without intermediate lists.
 '''
 
 __all__ = ('pymt_postproc_modules', )
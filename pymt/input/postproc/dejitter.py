@@ -43,24 +43,26 @@ class InputPostprocDejitter(object):
     def process(self, events):
         if not self.jitterdist:
             return events
-        processed = []
+        return self._process(events)
+
+    def _process(self, events):
+        last_touches = self.last_touches
         for type, touch in events:
             if touch.device in self.ignore_devices:
-                processed.append((type, touch))
+                yield type, touch
                 continue
             if type == 'down':
-                self.last_touches[touch.id] = touch.spos
+                last_touches[touch.id] = touch.spos
             if type == 'up':
-                del self.last_touches[touch.id]
+                del last_touches[touch.id]
             if type != 'move':
-                processed.append((type, touch))
+                yield type, touch
                 continue
             # Check whether the touch moved more than the jitter distance
-            last_spos = self.last_touches[touch.id]
+            last_spos = last_touches[touch.id]
             dist = self.taxicab_distance(last_spos, touch.spos)
             if dist > self.jitterdist:
                 # Only if the touch has moved more than the jitter dist we take
                 # it into account and dispatch it. Otherwise suppress it.
-                self.last_touches[touch.id] = touch.spos
-                processed.append((type, touch))
-        return processed
+                last_touches[touch.id] = touch.spos
+                yield type, touch
@@ -58,15 +58,14 @@ class InputPostprocDoubleTap(object):
 
             # add the touch internaly
             self.touches[touch.uid] = (type, touch)
+            yield type, touch
 
         # second, check if up-touch is timeout for double tap
         time_current = getClock().get_time()
-        for touchid in self.touches.keys()[:]:
+        for touchid in self.touches.keys():
             type, touch = self.touches[touchid]
             if type != 'up':
                 continue
             if time_current - touch.time_start < self.double_tap_time:
                 continue
             del self.touches[touchid]
-
-        return events
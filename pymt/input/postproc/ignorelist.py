@@ -31,10 +31,12 @@ class InputPostprocIgnoreList(object):
     def process(self, events):
         if not len(self.ignore_list):
             return events
+        return self._process(events)
+
+    def _process(self, events):
         for type, touch in events:
-            if type != 'down':
-                continue
-            if self.collide_ignore(touch):
+            if type == 'down' and self.collide_ignore(touch):
                 touch.userdata['__ignore__'] = True
-        return [(type, touch) for type, touch in events \
-                if not '__ignore__' in touch.userdata]
+            if '__ignore__' in touch.userdata:
+                continue
+            yield type, touch
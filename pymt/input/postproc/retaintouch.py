@@ -6,7 +6,7 @@ __all__ = ('InputPostprocRetainTouch', )
 
 from pymt.config import pymt_config
 from pymt.vector import Vector
-import time
+from pymt.clock import getClock
 
 class InputPostprocRetainTouch(object):
     '''
@@ -32,11 +32,12 @@ class InputPostprocRetainTouch(object):
         # check if module is disabled
         if self.timeout == 0:
             return events
+        return self._process(events)
 
-        d = time.time()
-        for type, touch in events[:]:
+    def _process(self, events):
+        d = getClock().get_time()
+        for type, touch in events:
             if type == 'up':
-                events.remove((type, touch))
                 if touch.uid in self._links:
                     selection = self._links[touch.uid]
                     selection.userdata['__retain_time'] = d
@@ -52,10 +53,9 @@ class InputPostprocRetainTouch(object):
                     selection.y = touch.y
                     selection.sx = touch.sx
                     selection.sy = touch.sy
-                    events.remove((type, touch))
-                    events.append((type, selection))
+                    yield type, selection
                 else:
-                    pass
+                    yield type, touch
             elif type == 'down':
                 # new touch, found the nearest one
                 selection = None
@@ -71,16 +71,14 @@ class InputPostprocRetainTouch(object):
                         selection_distance = touch_distance
                         selection = touch2
                 if selection is None:
+                    yield type, touch
                     continue
 
                 self._links[touch.uid] = selection
                 self._available.remove(selection)
-                events.remove((type, touch))
 
         for touch in self._available[:]:
             t = touch.userdata['__retain_time']
             if d - t > self.timeout:
                 self._available.remove(touch)
-                events.append(('up', touch))
-
-        return events
+                yield 'up', touch
@@ -71,6 +71,7 @@ else:
     from pymt.input.provider import TouchProvider
     from pymt.input.factory import TouchFactory
     from pymt.logger import pymt_logger
+    from pymt.clock import getClock
 
     #
     # This part is taken from linux-source-2.6.32/include/linux/input.h
@@ -242,6 +243,9 @@ else:
                             touches_sent.remove(tid)
                         del touches[tid]
 
+                # wake up the main loop if it's sleeping
+                getClock().wakeup()
+
             def normalize(value, vmin, vmax):
                 return (value - vmin) / float(vmax - vmin)
 
@@ -11,6 +11,7 @@ from pymt.input.factory import TouchFactory
 from pymt.input.touch import Touch
 from pymt.input.shape import TouchShapeRect
 from pymt.logger import pymt_logger
+from pymt.clock import getClock
 
 class TuioTouchProvider(TouchProvider):
     '''Tuio provider listen to a socket, and handle part of OSC message
@@ -115,6 +116,8 @@ class TuioTouchProvider(TouchProvider):
         message = incoming[0]
         oscpath, types, args = message[0], message[1], message[2:]
         self.tuio_event_q.appendleft([oscpath, args, types])
+        # may be called from the osc thread, wake up the main loop
+        getClock().wakeup()
 
     def _update(self, dispatch_fn, value):
         oscpath, args, types = value
@@ -129,6 +129,7 @@ class Touch(object):
         self.osxpos = None
         self.osypos = None
         self.oszpos = None
+        # clock time (monotonic by default), not a wall-clock timestamp
         self.time_start = getClock().get_time()
         self.is_double_tap = False
         self.double_tap_time = 0
@@ -11,10 +11,12 @@ __all__ = ('SVG', 'setup_gl')
 
 from OpenGL.GL import GL_BLEND, GL_LINE_SMOOTH, GL_SRC_ALPHA, \
         GL_ONE_MINUS_SRC_ALPHA, GL_COMPILE, GL_TRIANGLES, GL_LINES, \
-        GL_TRIANGLE_FAN, GL_TRIANGLE_STRIP, \
+        GL_TRIANGLE_FAN, GL_TRIANGLE_STRIP, GL_VERTEX_ARRAY, GL_COLOR_ARRAY, \
+        GL_FLOAT, GL_UNSIGNED_BYTE, \
         glEnable, glGenLists, glNewList, glEndList, glPushMatrix, \
         glPopMatrix, glTranslatef, glRotatef, glScalef, glCallList, \
-        glBegin, glEnd, glColor4ub, glVertex3f, glBlendFunc
+        glBlendFunc, glEnableClientState, glDisableClientState, \
+        glVertexPointer, glColorPointer, glDrawArrays
 from OpenGL.GLU import GLU_TESS_WINDING_RULE, GLU_TESS_WINDING_NONZERO, \
         GLU_TESS_VERTEX, GLU_TESS_BEGIN, GLU_TESS_END, GLU_TESS_ERROR, \
         GLU_TESS_COMBINE, \
@@ -24,6 +26,10 @@ from OpenGL.GLU import GLU_TESS_WINDING_RULE, GLU_TESS_WINDING_NONZERO, \
 from xml.etree.cElementTree import parse
 import re
 import math
+import gzip
+from array import array
+from ctypes import c_float, c_ubyte
+from hashlib import sha1
 try:
     # get the faster one
     from cStringIO import StringIO
@@ -31,6 +37,11 @@ except ImportError:
     # fallback to the default one
     from StringIO import StringIO
 from pymt.logger import pymt_logger
+from pymt.diskcache import DiskCache
+
+# tesselated svg can be stored in the disk cache.
+# increase the version when the geometry format change.
+DiskCache.register('pymt.svg', 1)
 
 BEZIER_POINTS = 10
 CIRCLE_POINTS = 24
@@ -382,7 +393,7 @@ class SVG(object):
 
     _tess = None
     _disp_list_cache = {}
-    def __init__(self, filename, anchor_x=0, anchor_y=0, bezier_points=BEZIER_POINTS, circle_points=CIRCLE_POINTS, rawdata=None):
+    def __init__(self, filename, anchor_x=0, anchor_y=0, bezier_points=BEZIER_POINTS, circle_points=CIRCLE_POINTS, rawdata=None, compile=True):
         """Creates an SVG object from a .svg or .svgz file.
 
             `filename`: str
@@ -401,6 +412,10 @@ class SVG(object):
             `rawdata`: string
                 Raw data string (you need to set a fake filename for cache anyway)
                 Defaults to None.
+            `compile`: bool
+                Create the display list. Set it to False to load the svg
+                in a thread, and call compile() later in the main thread.
+                Defaults to True.
         """
         self._tess = gluNewTess()
         gluTessNormal(self._tess, 0, 0, 1)
@@ -412,7 +427,9 @@ class SVG(object):
         self.circle_points = circle_points
         self.bezier_coefficients = []
         self.gradients = GradientContainer()
-        self.generate_disp_list()
+        self.disp_list = None
+        self._geometry = None
+        self.generate_disp_list(compile)
         self.anchor_x = anchor_x
         self.anchor_y = anchor_y
 
@@ -448,25 +465,68 @@ class SVG(object):
 
     anchor_y = property(_get_anchor_y, _set_anchor_y)
 
-    def generate_disp_list(self):
+    def generate_disp_list(self, compile=True):
         if (self.filename, self.bezier_points) in self._disp_list_cache:
             self.disp_list, self.width, self.height = self._disp_list_cache[self.filename, self.bezier_points]
         else:
-            if self.rawdata != None:
-                f = StringIO(self.rawdata)
-            else:
-                if open(self.filename, 'rb').read(3) == '\x1f\x8b\x08': #gzip magic numbers
-                    import gzip
-                    f = gzip.open(self.filename, 'rb')
-                else:
-                    f = open(self.filename, 'rb')
-            self.tree = parse(f)
-            self.parse_doc()
+            self._geometry = self.load_geometry()
+            if compile:
+                self.compile()
+
+    def compile(self):
+        """Create the display list from the geometry. Must be called in
+        the main thread."""
+        if self.disp_list is not None:
+            return
+        key = (self.filename, self.bezier_points)
+        if key in self._disp_list_cache:
+            # compiled by another instance in the meantime
+            self.disp_list = self._disp_list_cache[key][0]
+        else:
+            vertices, colors, batches = self._geometry
             self.disp_list = glGenLists(1)
             glNewList(self.disp_list, GL_COMPILE)
-            self.render_slowly()
+            self.render_geometry(vertices, colors, batches)
             glEndList()
-            self._disp_list_cache[self.filename, self.bezier_points] = (self.disp_list, self.width, self.height)
+            self._disp_list_cache[key] = (self.disp_list, self.width, self.height)
+        self._geometry = None
+
+    def load_geometry(self):
+        """Parse and tesselate the svg, or reuse the geometry from the disk
+        cache. Return a tuple (vertices, colors, batches), see
+        build_geometry()."""
+        if self.rawdata != None:
+            data = self.rawdata
+        else:
+            data = open(self.filename, 'rb').read()
+        if data[:3] == '\x1f\x8b\x08': #gzip magic numbers
+            data = gzip.GzipFile(fileobj=StringIO(data)).read()
+
+        key = None
+        if DiskCache.is_enabled():
+            key = DiskCache.get_key('pymt.svg', sha1(data).hexdigest(),
+                                    self.bezier_points, self.circle_points)
+            entry = DiskCache.get('pymt.svg', key)
+            if entry is not None:
+                header, blob = entry
+                self.width, self.height, self.n_tris, self.n_lines, \
+                        count, batches = header
+                vertices = (c_float * (count * 2)).from_buffer(blob)
+                colors = (c_ubyte * (count * 4)).from_buffer(blob, count * 8)
+                return vertices, colors, batches
+
+        self.tree = parse(StringIO(data))
+        self.parse_doc()
+        vertices, colors, batches = self.build_geometry()
+        if key is not None:
+            count = len(vertices) / 2
+            header = (self.width, self.height, self.n_tris, self.n_lines,
+                      count, batches)
+            DiskCache.append('pymt.svg', key, header,
+                             vertices.tostring() + colors.tostring())
+        vertices = (c_float * len(vertices)).from_buffer(vertices)
+        colors = (c_ubyte * len(colors)).from_buffer(colors)
+        return vertices, colors, batches
 
     def draw(self, x, y, z=0, angle=0, scale=1):
         """Draws the SVG to screen.
@@ -500,9 +560,29 @@ class SVG(object):
         glCallList(self.disp_list)
         glPopMatrix()
 
-    def render_slowly(self):
+    def build_geometry(self):
+        """Transform the parsed paths into arrays. Return a tuple with the
+        vertices (x, y floats), the colors (r, g, b, a bytes) and the list
+        of batches to draw, as (mode, first vertex, vertex count)."""
         self.n_tris = 0
         self.n_lines = 0
+        vertices = array('f')
+        colors = array('B')
+        batches = []
+
+        def add(mode, vtxs, clrs, transform):
+            first = len(vertices) / 2
+            for vtx, clr in zip(vtxs, clrs):
+                vtx = transform(vtx)
+                vertices.extend((vtx[0], vtx[1]))
+                colors.extend([max(0, min(255, int(c))) for c in clr])
+            count = len(vertices) / 2 - first
+            # merge with the previous batch if possible
+            if batches and batches[-1][0] == mode:
+                mode, first, previous = batches.pop()
+                count += previous
+            batches.append((mode, first, count))
+
         for path, stroke, tris, fill, transform in self.paths:
             if tris:
                 self.n_tris += len(tris)/3
@@ -511,15 +591,7 @@ class SVG(object):
                     fills = [g.interp(x) for x in tris]
                 else:
                     fills = [fill for x in tris]
-                #pyglet.graphics.draw(len(tris), GL_TRIANGLES,
-                #                     ('v3f', sum((x + [0] for x in tris), [])),
-                #                     ('c3B', sum(fills, [])))
-                glBegin(GL_TRIANGLES)
-                for vtx, clr in zip(tris, fills):
-                    vtx = transform(vtx)
-                    glColor4ub(*clr)
-                    glVertex3f(vtx[0], vtx[1], 0)
-                glEnd()
+                add(GL_TRIANGLES, tris, fills, transform)
             if path:
                 for loop in path:
                     self.n_lines += len(loop) - 1
@@ -531,15 +603,20 @@ class SVG(object):
                         strokes = [g.interp(x) for x in loop_plus]
                     else:
                         strokes = [stroke for x in loop_plus]
-                    #pyglet.graphics.draw(len(loop_plus), GL_LINES,
-                    #                     ('v3f', sum((x + [0] for x in loop_plus), [])),
-                    #                     ('c3B', sum((stroke for x in loop_plus), [])))
-                    glBegin(GL_LINES)
-                    for vtx, clr in zip(loop_plus, strokes):
-                        vtx = transform(vtx)
-                        glColor4ub(*clr)
-                        glVertex3f(vtx[0], vtx[1], 0)
-                    glEnd()
+                    add(GL_LINES, loop_plus, strokes, transform)
+        return vertices, colors, batches
+
+    def render_geometry(self, vertices, colors, batches):
+        """Draw the geometry returned by build_geometry()"""
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glEnableClientState(GL_COLOR_ARRAY)
+        glVertexPointer(2, GL_FLOAT, 0, vertices)
+        glColorPointer(4, GL_UNSIGNED_BYTE, 0, colors)
+        for mode, first, count in batches:
+            glDrawArrays(mode, first, count)
+        glDisableClientState(GL_COLOR_ARRAY)
+        glDisableClientState(GL_VERTEX_ARRAY)
+
     def parse_float(self, txt):
         if txt.endswith('px'):
             return float(txt[:-2])
@@ -16,25 +16,79 @@ If you want to change the default loading image, you can do ::
 
     Loader.loading_image = Image('another_loading.png')
 
+Images are loaded by a pool of threads. The number of threads can be changed
+in the configuration, with pymt.loader_workers. If it's 0, images are loaded
+by the main thread, one per frame.
+
+Requests are loaded by priority: images that are visible first, prefetch
+last ::
+
+    image = Loader.image('mysprite.png', priority=Loader.PRIORITY_PREFETCH)
+
+If all the images returned for a request are garbage collected before the
+loading started, the request is cancelled.
+
+If the image will be displayed smaller than his real size, like a thumbnail,
+give the maximum size: the image will be downscaled while decoding, and use
+less memory ::
+
+    image = Loader.image('photo.jpg', max_size=128)
+
+The size is rounded to the next power of 2, and images are cached for each
+size. In this example, the image will fit in 128x128.
+
+On posix systems, local images can be decoded by a pool of processes, to use
+all the cores and not stress the main process. Set pymt.loader_processes in
+the configuration to the number of processes. The decoded pixels are passed
+back through shared memory, without any copy.
+
+Network images are downloaded by the :class:`Fetcher`, with persistent
+connections and a disk cache. They are decoded from memory.
+
+Other resources can be loaded in the same way: svg, 3D objects, sounds and
+fonts ::
+
+    svg = Loader.svg('tiger.svg')
+    obj = Loader.obj('monkey.obj')
+    sound = Loader.sound('bell.wav')
+    font = Loader.font('DejaVuSans.ttf', font_size=32)
+
+Each resource type is described by a :class:`LoaderResource`: his load()
+method parse the file in a loading thread, then his finalize() method create
+the OpenGL objects (textures, display lists) in the main thread. The time
+spent in finalize() is limited by the upload budget. Register new types with
+Loader.register_resource(), and load them with Loader.load().
 '''
 
-__all__ = ('Loader', 'LoaderBase', 'ProxyImage')
+__all__ = ('Loader', 'LoaderBase', 'LoaderResource', 'ProxyImage',
+           'ProxySvg', 'ProxyOBJ', 'ProxyResource')
 
-from pymt import pymt_data_dir
+from pymt import pymt_data_dir, pymt_config
 from pymt.logger import pymt_logger
-from pymt.clock import getClock
+from pymt.clock import getClock, _perf_counter
 from pymt.cache import Cache
-from pymt.utils import SafeList
-from pymt.core.image import ImageLoader, Image
+from pymt.httpfetch import Fetcher
+from pymt.core.image import ImageLoader, ImageLoaderData, ImageData, Image
+from pymt.texture import _nearest_pow2
+from pymt.core.svg import Svg, SvgLoader
+from pymt.core.audio import SoundLoader
+from pymt.core.text import Label as CoreLabel
+from pymt.obj import OBJ
 from pymt.event import EventDispatcher
 from abc import ABCMeta, abstractmethod
-
-import time
-import collections
+from heapq import heappush, heappop
+from weakref import ref
+from ctypes import c_ubyte
+
+import cStringIO
+import threading
+import tempfile
+import mmap
 import os
 
 # Register a cache for loader
-Cache.register('pymt.loader', limit=500, timeout=60)
+Cache.register('pymt.loader', limit=500, timeout=60,
+               max_bytes=256 * 1024 * 1024)
 
 class ProxyImage(Image, EventDispatcher):
     '''Image returned by the Loader.image() function.
@@ -57,34 +111,294 @@ class ProxyImage(Image, EventDispatcher):
         pass
 
 
+class ProxySvg(Svg, EventDispatcher):
+    '''Svg returned by the Loader.svg() function. Nothing is drawn until
+    the svg is loaded.
+
+    :Properties:
+        `loaded`: bool, default to False
+            It can be True if the svg is already cached
+
+    :Events:
+        `on_load`
+            Fired when the svg is loaded
+    '''
+    def __init__(self, arg, **kwargs):
+        kwargs.setdefault('loaded', False)
+        super(ProxySvg, self).__init__(arg, **kwargs)
+        self.loaded = kwargs.get('loaded')
+        self.register_event_type('on_load')
+
+    def on_load(self):
+        pass
+
+
+class ProxyResource(EventDispatcher):
+    '''Resource returned by the Loader for sounds, fonts and custom types.
+    The attributes of the resource are available on the proxy once it's
+    loaded.
+
+    :Properties:
+        `resource`: object
+            The resource loaded, None until it's loaded or if the loading
+            failed
+        `loaded`: bool, default to False
+            It can be True if the resource is already cached
+
+    :Events:
+        `on_load`
+            Fired when the resource is loaded
+    '''
+    def __init__(self, resource=None, **kwargs):
+        kwargs.setdefault('loaded', False)
+        super(ProxyResource, self).__init__(**kwargs)
+        self.resource = resource
+        self.loaded = kwargs.get('loaded')
+        self.register_event_type('on_load')
+
+    def __getattr__(self, name):
+        resource = self.__dict__.get('resource')
+        if resource is None:
+            raise AttributeError(name)
+        return getattr(resource, name)
+
+    def on_load(self):
+        pass
+
+
+class ProxyOBJ(ProxyResource):
+    '''OBJ returned by the Loader.obj() function. Nothing is drawn until the
+    object is loaded.'''
+    def draw(self):
+        if self.resource is not None:
+            self.resource.draw()
+
+
+class LoaderResource(object):
+    '''Describe how to load a type of resource.
+
+    The load() method is called in a loading thread, and must not use
+    OpenGL. The finalize() method is called in the main thread, with the
+    result of load(), to create the OpenGL objects. The result of finalize()
+    is cached, and passed to the proxies returned to the clients.'''
+
+    #: Name of the resource type, used with Loader.load()
+    name = None
+    #: Class of the proxies returned to the clients
+    proxy = ProxyResource
+
+    def get_key(self, filename, **kwargs):
+        '''Return the key used to cache the resource'''
+        if kwargs:
+            return '%s:%s#%r' % (self.name, filename, sorted(kwargs.items()))
+        return '%s:%s' % (self.name, filename)
+
+    def load(self, loader, filename, **kwargs):
+        '''Load the resource. Called in a loading thread.'''
+        raise NotImplementedError()
+
+    def finalize(self, loader, data):
+        '''Create the OpenGL objects needed by the resource, and return it.
+        Called in the main thread.'''
+        return data
+
+    def get_error(self, loader):
+        '''Return the resource used when the loading failed'''
+        return None
+
+    def create_proxy(self, loader, resource):
+        '''Return a proxy for a resource, or for a resource not yet loaded
+        if resource is None.'''
+        return self.proxy(resource, loaded=resource is not None)
+
+    def update_proxy(self, proxy, resource):
+        '''Set the resource loaded in the proxy'''
+        proxy.resource = resource
+
+
+class _ImageResource(LoaderResource):
+    name = 'image'
+
+    def get_key(self, filename, max_size=None):
+        if max_size is None:
+            return filename
+        return '%s#%dx%d' % (filename, max_size[0], max_size[1])
+
+    def load(self, loader, filename, max_size=None):
+        proto = filename.split(':', 1)[0]
+        if proto in ('http', 'https', 'ftp'):
+            return loader._load_urllib(filename, max_size)
+        return loader._load_local(filename, max_size)
+
+    def finalize(self, loader, data):
+        # create the texture now, instead of the first drawing, to control
+        # the time spent.
+        getattr(data, 'texture', None)
+        return data
+
+    def get_error(self, loader):
+        return loader.error_image
+
+    def create_proxy(self, loader, resource):
+        if resource is None:
+            return ProxyImage(loader.loading_image,
+                    loading_image=loader.loading_image)
+        return ProxyImage(resource, loading_image=loader.loading_image,
+                loaded=True)
+
+    def update_proxy(self, proxy, resource):
+        proxy.image = resource
+
+
+class _SvgResource(LoaderResource):
+    name = 'svg'
+
+    def load(self, loader, filename):
+        return SvgLoader.load(filename, finalize=False)
+
+    def finalize(self, loader, data):
+        data.finalize()
+        return data
+
+    def create_proxy(self, loader, resource):
+        return ProxySvg(resource, loaded=resource is not None)
+
+    def update_proxy(self, proxy, resource):
+        if resource is not None:
+            proxy.svg_object = resource
+
+
+class _OBJResource(LoaderResource):
+    name = 'obj'
+    proxy = ProxyOBJ
+
+    def load(self, loader, filename, **kwargs):
+        return OBJ(filename, finalize=False, **kwargs)
+
+    def finalize(self, loader, data):
+        data.finalize()
+        return data
+
+
+class _SoundResource(LoaderResource):
+    name = 'sound'
+
+    def load(self, loader, filename):
+        sound = SoundLoader.load(filename)
+        if sound is None:
+            raise Exception('No loader found for <%s>' % filename)
+        return sound
+
+
+class _FontResource(LoaderResource):
+    name = 'font'
+
+    def load(self, loader, filename, **kwargs):
+        # without text, the label is not rendered, and don't use OpenGL.
+        # get_extents() load the font in the text provider.
+        label = CoreLabel(None, font_name=filename, **kwargs)
+        label.get_extents('')
+        return label
+
+
+def _size_bucket(max_size):
+    '''(internal) Round a maximum size to the next power of 2'''
+    if isinstance(max_size, (int, long, float)):
+        max_size = (max_size, max_size)
+    return tuple(_nearest_pow2(max(1, int(x))) for x in max_size)
+
+
+def _decode_shared(filename, max_size, directory):
+    '''(internal) Function called in a decoding process. Decode the image,
+    write the pixels in a file of the shared memory directory, and return a
+    tuple (path, width, height, mode).'''
+    data = ImageLoader.load(filename, max_size=max_size)._data
+    fd, path = tempfile.mkstemp(prefix='pymtloader', dir=directory)
+    with os.fdopen(fd, 'wb') as fp:
+        fp.write(data.data)
+    return path, data.width, data.height, data.mode
+
+
+class _LoaderRequest(object):
+    '''(internal) A file to load, with his callbacks and priority'''
+
+    __slots__ = ('key', 'resource', 'filename', 'kwargs', 'load_callback',
+                 'post_callback', 'priority', 'started')
+
+    def __init__(self, key, resource, filename, kwargs, load_callback,
+                 post_callback, priority):
+        self.key = key
+        self.resource = resource
+        self.filename = filename
+        self.kwargs = kwargs
+        self.load_callback = load_callback
+        self.post_callback = post_callback
+        self.priority = priority
+        self.started = False
+
+
 class LoaderBase(object):
     '''Common base for Loader and specific implementation.
     By default, Loader will be the best available loader implementation.
 
-    The _update() function is called every 1 / 25.s or each frame if we have
-    less than 25 FPS.
+    The loading threads hand back the loaded data to the main thread with
+    Clock.schedule_from_thread(), where the _update() function create the
+    textures and pass them to the clients. The time and the bytes uploaded
+    each frame are limited by upload_budget and upload_budget_bytes: if many
+    images are loaded at the same time, they are spread over several frames.
+
+    Pending requests are stored in a heap, ordered by priority, and by
+    request time (the newest first). The loaded requests are passed to the
+    clients by priority, and in the order they have been loaded. The queues
+    are protected by a condition, used to wake up the loading threads.
     '''
 
     __metaclass__ = ABCMeta
 
+    #: Priority of images that are visible on the screen
+    PRIORITY_VISIBLE = 0
+    #: Default priority
+    PRIORITY_NORMAL = 1
+    #: Priority of images that may be used later
+    PRIORITY_PREFETCH = 2
+
+    #: Resource types, by name
+    resources = {}
+
+    @classmethod
+    def register_resource(cls, resource):
+        '''Register a new type of resource, an instance of LoaderResource'''
+        cls.resources[resource.name] = resource
+
     def __init__(self):
 
         self._loading_image = None
         self._error_image = None
 
-        self._q_load  = collections.deque()
-        self._q_done  = collections.deque()
-        self._client  = SafeList()
+        self._q_load  = []
+        self._q_done  = []
+        self._seq     = 0
+        self._done_seq = 0
+        self._requests = {}
+        self._client  = {}
+        self._lock    = threading.Condition()
         self._running = False
-        self._start_wanted = False
-
-        getClock().schedule_interval(self._update, 1 / 25.)
-
-    def __del__(self):
-        try:
-            getClock().unschedule(self._update)
-        except Exception:
-            pass
+        self._cancelled = 0
+
+        #: Maximum time (in seconds) passed each frame to create the textures
+        #: and update the clients. At least one image is processed per frame.
+        self.upload_budget = 0.004
+        #: Maximum size (in bytes) of the textures created each frame, or 0
+        #: for no limit.
+        self.upload_budget_bytes = 4 * 1024 * 1024
+        self._upload_pending = False
+        self._upload_frame = None
+        self._upload_frame_time = 0.
+        self._upload_frame_bytes = 0
+        self._upload_count = 0
+        self._upload_bytes = 0
+        self._upload_time = 0.
+        self._upload_time_max = 0.
 
     @property
     def loading_image(self):
@@ -117,87 +431,187 @@ class LoaderBase(object):
         '''Stop the loader thread/process'''
         self._running = False
 
-    def _load(self, parameters):
+    def _push_request(self, request):
+        '''(internal) Add a request in the load queue. Must be called with
+        the lock acquired.'''
+        self._seq += 1
+        heappush(self._q_load, (request.priority, -self._seq, request))
+        self._lock.notify()
+
+    def _pop_request(self):
+        '''(internal) Return the next request to load, or None if the queue
+        is empty. Must be called with the lock acquired.'''
+        while self._q_load:
+            priority, seq, request = heappop(self._q_load)
+            # the request have been pushed again with another priority
+            if request.started or request.priority != priority:
+                continue
+            # all the clients have been garbage collected, cancel it.
+            key = request.key
+            clients = [x for x in self._client[key] if x() is not None]
+            if not clients:
+                del self._requests[key]
+                del self._client[key]
+                self._cancelled += 1
+                continue
+            self._client[key] = clients
+            request.started = True
+            return request
+        return None
+
+    def _load(self, request):
         '''(internal) Loading function, called by the thread.
-        Will call _load_local() if the file is local,
-        or _load_urllib() if the file is on Internet'''
+        Will call the load() method of the resource type, or the
+        load_callback if one have been given'''
 
-        filename, load_callback, post_callback = parameters
-        proto = filename.split(':', 1)[0]
-        if load_callback is not None:
-            data = load_callback(filename)
-        elif proto in ('http', 'https', 'ftp'):
-            data = self._load_urllib(filename)
-        else:
-            data = self._load_local(filename)
-
-        if post_callback:
-            data = post_callback(data)
-
-        self._q_done.append((filename, data))
-
-    def _load_local(self, filename):
-        '''(internal) Loading a local file'''
-        return ImageLoader.load(filename)
-
-    def _load_urllib(self, filename):
-        '''(internal) Loading a network file. First download it, save it to a
-        temporary file, and pass it to _load_local()'''
-        import urllib2, tempfile
-        data = None
+        filename = request.filename
         try:
-            suffix = '.%s'  % (filename.split('.')[-1])
-            _out_osfd, _out_filename = tempfile.mkstemp(
-                    prefix='pymtloader', suffix=suffix)
+            if request.load_callback is not None:
+                data = request.load_callback(filename)
+            else:
+                data = request.resource.load(self, filename, **request.kwargs)
 
-            # read from internet
-            fd = urllib2.urlopen(filename)
-            idata = fd.read()
-            fd.close()
+            if request.post_callback:
+                data = request.post_callback(data)
+        except Exception:
+            pymt_logger.exception('Loader: unable to load <%s>' % filename)
+            data = request.resource.get_error(self)
 
-            # write to local filename
-            os.write(_out_osfd, idata)
-            os.close(_out_osfd)
+        with self._lock:
+            self._done_seq += 1
+            heappush(self._q_done,
+                     (request.priority, self._done_seq, request, data))
+        getClock().schedule_from_thread(self._update)
 
-            # load data
-            data = self._load_local(_out_filename)
-        except Exception:
-            pymt_logger.exception('Failed to load image <%s>' % filename)
-            return self.error_image
-        finally:
-            os.unlink(_out_filename)
+    def _load_local(self, filename, max_size=None):
+        '''(internal) Loading a local file'''
+        return ImageLoader.load(filename, max_size=max_size)
 
-        return data
+    def _load_urllib(self, filename, max_size=None):
+        '''(internal) Loading a network file. Download it with the Fetcher,
+        and decode it from memory'''
+        data = Fetcher.fetch(filename)
+        return ImageLoader.load(filename, max_size=max_size,
+                                fileobj=cStringIO.StringIO(data))
 
     def _update(self, *largs):
-        '''(internal) Check if a data is loaded, and pass to the client'''
-        # want to start it ?
-        if self._start_wanted:
-            if not self._running:
-                self.start()
-            self._start_wanted = False
-
-        while True:
-            try:
-                filename, data = self._q_done.pop()
-            except IndexError:
-                return
+        '''(internal) Called in the main thread when a data is loaded,
+        pass it to the clients'''
+        self._upload_pending = False
+
+        # the budget is for the whole frame, even if we are called many times
+        frame = getClock().get_time()
+        if frame != self._upload_frame:
+            self._upload_frame = frame
+            self._upload_frame_time = 0.
+            self._upload_frame_bytes = 0
+
+        while self._q_done:
+            if self._upload_frame_time > self.upload_budget or (
+               self.upload_budget_bytes and
+               self._upload_frame_bytes > self.upload_budget_bytes):
+                # continue on the next frame
+                if not self._upload_pending:
+                    self._upload_pending = True
+                    getClock().schedule_once(self._update, 0)
+                break
+
+            start = _perf_counter()
+            with self._lock:
+                priority, seq, request, data = heappop(self._q_done)
+            key = request.key
+            rtype = request.resource
 
-            # create the image
-            image = data#ProxyImage(data)
-            Cache.append('pymt.loader', filename, image)
+            try:
+                resource = rtype.finalize(self, data)
+            except Exception:
+                pymt_logger.exception('Loader: unable to finalize <%s>' %
+                                      request.filename)
+                resource = rtype.get_error(self)
+            size = getattr(resource, 'cache_size', None) or 0
+            if resource is not None:
+                Cache.append('pymt.loader', key, resource, size=size)
+
+            with self._lock:
+                del self._requests[key]
+                clients = self._client.pop(key)
 
             # update client
-            for c_filename, client in self._client[:]:
-                if filename != c_filename:
+            for client in clients:
+                client = client()
+                if client is None:
                     continue
-                # got one client to update
-                client.image = image
+                rtype.update_proxy(client, resource)
                 client.loaded = True
                 client.dispatch_event('on_load')
-                self._client.remove((c_filename, client))
 
-    def image(self, filename, load_callback=None, post_callback=None):
+            duration = _perf_counter() - start
+            self._upload_frame_time += duration
+            self._upload_frame_bytes += size
+            self._upload_time_max = max(self._upload_time_max,
+                                        self._upload_frame_time)
+            self._upload_count += 1
+            self._upload_bytes += size
+            self._upload_time += duration
+
+    def load(self, name, filename, load_callback=None, post_callback=None,
+             priority=None, **kwargs):
+        '''Load a resource using loader. A proxy is returned, and updated
+        when the resource is loaded.
+
+        :Parameters:
+            `name` : str
+                Name of the resource type (image, svg, obj, sound, font...)
+            `filename` : str
+                Filename of the resource
+            `load_callback` : callable, default to None
+                Function called in the loading thread with the filename,
+                instead of the default loading of the resource type
+            `post_callback` : callable, default to None
+                Function called in the loading thread with the data loaded,
+                returning the data to use
+            `priority` : int, default to PRIORITY_NORMAL
+                Priority of the request, one of PRIORITY_VISIBLE,
+                PRIORITY_NORMAL or PRIORITY_PREFETCH. If the resource is
+                already queued with a lower priority, the priority is raised.
+            `**kwargs` :
+                Arguments passed to the load() method of the resource type
+        '''
+        rtype = self.resources[name]
+        key = rtype.get_key(filename, **kwargs)
+
+        resource = Cache.get('pymt.loader', key)
+        if resource is not None:
+            # found resource
+            return rtype.create_proxy(self, resource)
+
+        if priority is None:
+            priority = self.PRIORITY_NORMAL
+
+        client = rtype.create_proxy(self, None)
+
+        with self._lock:
+            request = self._requests.get(key)
+            if request is None:
+                # this is really the first time
+                request = _LoaderRequest(key, rtype, filename, kwargs,
+                        load_callback, post_callback, priority)
+                self._requests[key] = request
+                self._client[key] = []
+                self._push_request(request)
+            elif priority < request.priority and not request.started:
+                # already queued, but with a lower priority
+                request.priority = priority
+                self._push_request(request)
+            self._client[key].append(ref(client))
+
+        if not self._running:
+            self.start()
+
+        return client
+
+    def image(self, filename, load_callback=None, post_callback=None,
+              priority=None, max_size=None):
         '''Load a image using loader. A Proxy image is returned
         with a loading image ::
 
@@ -208,28 +622,66 @@ class LoaderBase(object):
             # the loader will change the img.image property
             # to the new loaded image
 
+        :Parameters:
+            `priority` : int, default to PRIORITY_NORMAL
+                Priority of the request, one of PRIORITY_VISIBLE,
+                PRIORITY_NORMAL or PRIORITY_PREFETCH. If the image is
+                already queued with a lower priority, the priority is raised.
+            `max_size` : int or tuple, default to None
+                Maximum size (width, height) of the image. If the image is
+                bigger, it's downscaled while loading. The size is rounded to
+                the next power of 2.
         '''
-        data = Cache.get('pymt.loader', filename)
-        if data not in (None, False):
-            # found image
-            return ProxyImage(data,
-                    loading_image=self.loading_image,
-                    loaded=True)
-
-        client = ProxyImage(self.loading_image,
-                    loading_image=self.loading_image)
-        self._client.append((filename, client))
-
-        if data is None:
-            # if data is None, this is really the first time
-            self._q_load.append((filename, load_callback, post_callback))
-            Cache.append('pymt.loader', filename, False)
-            self._start_wanted = True
-        else:
-            # already queued for loading
-            pass
-
-        return client
+        if max_size is not None:
+            max_size = _size_bucket(max_size)
+        return self.load('image', filename, load_callback, post_callback,
+                         priority, max_size=max_size)
+
+    def svg(self, filename, priority=None):
+        '''Load a svg using loader. A ProxySvg is returned, drawing nothing
+        until the svg is loaded.'''
+        return self.load('svg', filename, priority=priority)
+
+    def obj(self, filename, priority=None, **kwargs):
+        '''Load a 3D object using loader. A ProxyOBJ is returned, drawing
+        nothing until the object is loaded. The arguments are passed to
+        OBJ().'''
+        return self.load('obj', filename, priority=priority, **kwargs)
+
+    def sound(self, filename, priority=None):
+        '''Load a sound using loader. A ProxyResource is returned, his
+        resource is the Sound once loaded.'''
+        return self.load('sound', filename, priority=priority)
+
+    def font(self, font_name, priority=None, **kwargs):
+        '''Load a font using loader. A ProxyResource is returned, his
+        resource is a core Label using this font once loaded, without
+        text. The arguments (font_size, bold...) are passed to the Label.'''
+        return self.load('font', font_name, priority=priority, **kwargs)
+
+    def get_stats(self):
+        '''Return a dict with the number of requests queued, loading,
+        loaded and waiting to be passed to the clients (done), and cancelled.
+        The upload of textures is described by the number of images uploaded,
+        their size (upload_bytes), the total time spent (upload_time) and the
+        maximum time spent in one frame (upload_time_max).'''
+        with self._lock:
+            started = len([x for x in self._requests.itervalues()
+                           if x.started])
+            return {
+                'queued': len(self._requests) - started,
+                'loading': started - len(self._q_done),
+                'done': len(self._q_done),
+                'cancelled': self._cancelled,
+                'uploaded': self._upload_count,
+                'upload_bytes': self._upload_bytes,
+                'upload_time': self._upload_time,
+                'upload_time_max': self._upload_time_max
+            }
+
+for _resource in (_ImageResource, _SvgResource, _OBJResource,
+                  _SoundResource, _FontResource):
+    LoaderBase.register_resource(_resource())
 
 #
 # Loader implementation
@@ -241,62 +693,111 @@ if 'PYMT_DOC' in os.environ:
 
 else:
 
+    class LoaderThreadPool(LoaderBase):
+        '''Loader implementation using a pool of threads. The threads are
+        waiting on a condition until a request is queued.
+
+        If num_processes is more than 0, local images are decoded by a pool
+        of processes, and the threads only wait for the result.'''
+        def __init__(self, num_workers=2, num_processes=0):
+            super(LoaderThreadPool, self).__init__()
+            self.num_workers = num_workers
+            self.num_processes = num_processes
+            self._workers = []
+            self._pool = None
+            self._shm_dir = None
+
+        def start(self):
+            super(LoaderThreadPool, self).start()
+            if self.num_processes > 0 and self._pool is None:
+                import multiprocessing
+                self._pool = multiprocessing.Pool(self.num_processes)
+                if os.path.isdir('/dev/shm'):
+                    self._shm_dir = '/dev/shm'
+            self._workers = [x for x in self._workers if x.isAlive()]
+            while len(self._workers) < self.num_workers:
+                worker = threading.Thread(target=self.run,
+                        name='Loader-%d' % len(self._workers))
+                worker.daemon = True
+                worker.start()
+                self._workers.append(worker)
+
+        def stop(self):
+            with self._lock:
+                super(LoaderThreadPool, self).stop()
+                self._lock.notifyAll()
+            if self._pool is not None:
+                self._pool.terminate()
+                self._pool = None
+
+        def _load_local(self, filename, max_size=None):
+            pool = self._pool
+            if pool is None:
+                return super(LoaderThreadPool, self)._load_local(
+                        filename, max_size)
+            path, width, height, mode = pool.apply(_decode_shared,
+                    (filename, max_size, self._shm_dir))
+            try:
+                with open(path, 'rb') as fd:
+                    # copy on write, the data is never written back
+                    mm = mmap.mmap(fd.fileno(), 0, access=mmap.ACCESS_COPY)
+            finally:
+                os.unlink(path)
+            data = (c_ubyte * len(mm)).from_buffer(mm)
+            return ImageLoaderData(filename,
+                    data=ImageData(width, height, mode, data))
+
+        def run(self, *largs):
+            while True:
+                with self._lock:
+                    request = None
+                    while self._running:
+                        request = self._pop_request()
+                        if request is not None:
+                            break
+                        self._lock.wait()
+                    if request is None:
+                        return
+                self._load(request)
+
     #
-    # Try to use pygame as our first choice for loader
+    # Default to the clock loader when no threads are wanted
     #
 
-    try:
-        import pygame
-
-        class LoaderPygame(LoaderBase):
-            def __init__(self):
-                super(LoaderPygame, self).__init__()
-                self.worker = None
-
-            def start(self):
-                super(LoaderPygame, self).start()
-                self.worker = pygame.threads.WorkerQueue()
-                self.worker.do(self.run)
-
-            def stop(self):
-                super(LoaderPygame, self).stop()
-                self.worker.stop()
-
-            def run(self, *largs):
-                while self._running:
-                    try:
-                        parameters = self._q_load.pop()
-                    except:
-                        time.sleep(0.1)
-                        continue
-                    self.worker.do(self._load, parameters)
-
-        Loader = LoaderPygame()
-        pymt_logger.info('Loader: using <pygame> as thread loader')
-
-    except:
-
-        #
-        # Default to the clock loader
-        #
-
-        class LoaderClock(LoaderBase):
-            '''Loader implementation using a simple Clock()'''
-            def start(self):
-                super(LoaderClock, self).start()
-                getClock().schedule_interval(self.run, 0.0001)
-
-            def stop(self):
-                super(LoaderClock, self).stop()
-                getClock().unschedule(self.run)
-
-            def run(self, *largs):
-                try:
-                    parameters = self._q_load.pop()
-                except IndexError:
-                    return
-                self._load(parameters)
-
+    class LoaderClock(LoaderBase):
+        '''Loader implementation using a simple Clock(): one image is
+        loaded per frame, in the main thread'''
+        def start(self):
+            super(LoaderClock, self).start()
+            getClock().schedule_interval(self.run, 0.0001,
+                                         invalidate=False)
+
+        def stop(self):
+            super(LoaderClock, self).stop()
+            getClock().unschedule(self.run)
+
+        def run(self, *largs):
+            with self._lock:
+                request = self._pop_request()
+            if request is None:
+                # nothing to load, start again on the next request
+                self._running = False
+                return False
+            self._load(request)
+
+    num_workers = pymt_config.getint('pymt', 'loader_workers')
+    num_processes = pymt_config.getint('pymt', 'loader_processes')
+    if num_processes > 0 and os.name != 'posix':
+        # processes would import the application again
+        pymt_logger.warning('Loader: decoding processes are not supported '
+                            'on this platform')
+        num_processes = 0
+    if num_workers > 0:
+        # each thread wait for one process
+        num_workers = max(num_workers, num_processes)
+        Loader = LoaderThreadPool(num_workers, num_processes)
+        pymt_logger.info('Loader: using a pool of %d threads and %d '
+                         'processes' % (num_workers, num_processes))
+    else:
         Loader = LoaderClock()
-        pymt_logger.info('Loader: using <clock> as thread loader')
-
+        pymt_logger.info('Loader: using <clock> as loader')
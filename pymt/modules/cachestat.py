@@ -0,0 +1,63 @@
+'''
+Cache statistics: show hits, misses and evictions of each cache category
+
+The statistics are refreshed every second, and displayed on top of the
+window. They are also logged every 10 seconds. Both can be configured ::
+
+    [modules]
+    cachestat = log=30,display=0
+
+Use log=0 to disable the log, and display=0 to hide the statistics.
+'''
+
+from pymt import MTWidget, Label, Cache, getClock, set_color, drawRectangle
+
+class CacheStats(MTWidget):
+    def __init__(self, **kwargs):
+        super(CacheStats, self).__init__(**kwargs)
+        self.labels = []
+        self.update_stats()
+        getClock().schedule_interval(self.update_stats, 1)
+
+    def update_stats(self, *largs):
+        lines = [Cache.format_stats(x) for x in sorted(Cache._categories)]
+        while len(self.labels) < len(lines):
+            self.labels.append(Label('', font_size=10))
+        del self.labels[len(lines):]
+        for label, line in zip(self.labels, lines):
+            label.label = line
+
+    def on_update(self):
+        self.bring_to_front()
+
+    def draw(self):
+        win = self.get_parent_window()
+        if win is None:
+            return
+        height = 14 * len(self.labels) + 10
+        set_color(0, 0, 0, .6)
+        drawRectangle(pos=(0, win.height - height), size=(win.width, height))
+        y = win.height - 5
+        for label in self.labels:
+            y -= 14
+            label.pos = (5, y)
+            label.draw()
+
+def _log_usage(*largs):
+    Cache.log_usage()
+
+def start(win, ctx):
+    ctx.w = None
+    if ctx.config.get('display', '1') not in ('0', 'false'):
+        ctx.w = CacheStats()
+        win.add_widget(ctx.w)
+    ctx.log = float(ctx.config.get('log', 10))
+    if ctx.log > 0:
+        getClock().schedule_interval(_log_usage, ctx.log)
+
+def stop(win, ctx):
+    if ctx.w is not None:
+        getClock().unschedule(ctx.w.update_stats)
+        win.remove_widget(ctx.w)
+    if ctx.log > 0:
+        getClock().unschedule(_log_usage)
@@ -5,6 +5,7 @@ Create/fill an heatmap in database
 from pymt import MTWidget, pymt_logger
 import sys
 import os
+import time
 import sqlite3
 
 class HeatMap(MTWidget):
@@ -31,10 +32,12 @@ class HeatMap(MTWidget):
             pymt_logger.info('Heatmap: Fill heatmap database in %s' % self.filename)
 
     def on_touch_down(self, touch):
+        # touch.time_start is taken from the clock time source (monotonic by
+        # default), it's meaningless across sessions: store the wall time.
         self.db.execute('''
             INSERT INTO heatmap
             VALUES (%f, %f, %f)
-        ''' % (touch.sx, touch.sy, touch.time_start))
+        ''' % (touch.sx, touch.sy, time.time()))
         self.db.commit()
 
     def on_update(self):
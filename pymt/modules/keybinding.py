@@ -129,23 +129,9 @@ def _on_draw():
         drawRectangle(size=win.size)
 
         y = 0
-        for x in Cache._categories:
+        for x in sorted(Cache._categories):
             y += 25
-            cat = Cache._categories[x]
-            count = 0
-            usage = '-'
-            limit = cat['limit']
-            timeout = cat['timeout']
-            try:
-                count = len(Cache._objects[x])
-            except:
-                pass
-            try:
-                usage = 100 * count / limit
-            except:
-                pass
-            args = (x, usage, count, limit, timeout)
-            drawLabel('%s: usage=%s%% count=%d limit=%s timeout=%s' % args,
+            drawLabel(Cache.format_stats(x),
                       pos=(20, 20 + y), font_size=20, center=False, nocache=True)
 
         return True
@@ -34,6 +34,7 @@ class Material(object):
     shininess = 0.
     opacity = 1.
     texture = None
+    image = None
 
     def __init__(self, name):
         self.name = name
@@ -57,6 +58,14 @@ class Material(object):
             self.texture.disable()
             glDisable(GL_COLOR_MATERIAL)
 
+    def finalize(self):
+        '''Create the texture from the image. Must be called in the main
+        thread'''
+        if self.image is None or self.texture is not None:
+            return
+        self.texture = self.image.texture
+        self.texture.wrap = GL_REPEAT
+
 class MaterialGroup(object):
     '''
     Groups of material
@@ -67,6 +76,29 @@ class MaterialGroup(object):
         # Interleaved array of floats in GL_T2F_N3F_V3F format
         self.vertices = []
         self.array = None
+        self.triangles = 0
+
+    def build(self):
+        '''Build the array used for drawing. If the material have an image,
+        his texture must be created first.'''
+        material = self.material
+        if material and material.image is not None and \
+           material.texture is None:
+            raise Exception('The material texture is not created')
+        if material and material.texture and material.texture.rectangle:
+            # texture is a rectangle texture
+            # that's mean we need to adjust the range of texture
+            # coordinate from original 0-1 to 0-width/0-height
+            self.vertices[0::8] = map(
+                lambda x: x * material.texture.width,
+                self.vertices[0::8]
+            )
+            self.vertices[1::8] = map(
+                lambda x: x * material.texture.height,
+                self.vertices[1::8]
+            )
+        self.array = (GLfloat * len(self.vertices))(*self.vertices)
+        self.triangles = len(self.vertices) / 8
 
 class Mesh(object):
     '''
@@ -94,21 +126,9 @@ class Mesh(object):
             if group.material:
                 group.material.apply()
             if group.array is None:
-                if group.material and group.material.texture:
-                    if group.material.texture.rectangle:
-                        # texture is a rectangle texture
-                        # that's mean we need to adjust the range of texture
-                        # coordinate from original 0-1 to 0-width/0-height
-                        group.vertices[0::8] = map(
-                            lambda x: x * group.material.texture.width,
-                            group.vertices[0::8]
-                        )
-                        group.vertices[1::8] = map(
-                            lambda x: x * group.material.texture.height,
-                            group.vertices[1::8]
-                        )
-                group.array = (GLfloat * len(group.vertices))(*group.vertices)
-                group.triangles = len(group.vertices) / 8
+                if group.material:
+                    group.material.finalize()
+                group.build()
             glInterleavedArrays(GL_T2F_N3F_V3F, 0, group.array)
             glDrawArrays(GL_TRIANGLES, 0, group.triangles)
             if group.material:
@@ -140,8 +160,13 @@ class OBJ:
         `compat` : bool, default to True
             Set to False if you want to take care yourself of the lights, depth
             test, color...
+        `finalize` : bool, default to True
+            Set to False to load the object in a thread: only the parsing and
+            the arrays that don't need a texture are done, and finalize()
+            must be called later in the main thread.
     '''
-    def __init__(self, filename, file=None, path=None, compat=True):
+    def __init__(self, filename, file=None, path=None, compat=True,
+                 finalize=True):
         self.materials = {}
         self.meshes = {}        # Name mapping
         self.mesh_list = []     # Also includes anonymous meshes
@@ -224,6 +249,15 @@ class OBJ:
                         v1 = vertex
                     vlast = vertex
 
+        # build the meshes now, except the ones waiting for a texture
+        for mesh in self.mesh_list:
+            for group in mesh.groups:
+                if not group.material or group.material.image is None:
+                    group.build()
+
+        if finalize:
+            self.finalize()
+
     def open_material_file(self, filename):
         '''Override for loading from archive/network etc.'''
         return open(os.path.join(self.path, filename), 'r')
@@ -262,8 +296,8 @@ class OBJ:
                 elif values[0] == 'map_Kd':
                     try:
                         filename = ' '.join(values[1:])
-                        material.texture = Image(filename).texture
-                        material.texture.wrap = GL_REPEAT
+                        # the texture is created in finalize()
+                        material.image = Image(filename)
                     except:
                         pymt_logger.warning('OBJ: Could not load texture %s' % values[1])
                         raise
@@ -271,6 +305,16 @@ class OBJ:
                 pymt_logger.warning('OBJ: Parse error in %s.' % filename)
                 raise
 
+    def finalize(self):
+        '''Create the textures of the materials, and the arrays using them.
+        Must be called in the main thread.'''
+        for material in self.materials.itervalues():
+            material.finalize()
+        for mesh in self.mesh_list:
+            for group in mesh.groups:
+                if group.array is None:
+                    group.build()
+
     def enter(self):
         if not self.compat:
             return
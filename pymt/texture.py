@@ -51,12 +51,12 @@ def _is_pow2(v):
 #
 # Releasing texture through GC is problematic
 # GC can happen in a middle of glBegin/glEnd
-# So, to prevent that, call the _texture_release
-# at flip time.
+# So, to prevent that, the deletion is handed to the clock, and
+# _texture_release is called from the main thread between two frames.
 _texture_release_list = []
 def _texture_release(*largs):
-    global _texture_release_list
-    for texture_id in _texture_release_list:
+    while _texture_release_list:
+        texture_id = _texture_release_list.pop()
         # try/except are here to prevent an error like this :
         # Exception TypeError: "'NoneType' object is not callable"
         # in <bound method Texture.__del__ of <pymt.texture.Texture
@@ -73,15 +73,13 @@ def _texture_release(*largs):
         except:
             pass
 
-    # let the list to 0
-    _texture_release_list = []
-
 class Texture(object):
     '''Handle a OpenGL texture. This class can be used to create simple texture
     or complex texture based on ImageData.'''
 
     __slots__ = ('tex_coords', '_width', '_height', '_target', '_id', '_mipmap',
-                '_gl_wrap', '_gl_min_filter', '_gl_mag_filter', '_rectangle')
+                '_gl_wrap', '_gl_min_filter', '_gl_mag_filter', '_rectangle',
+                '_bpp')
 
     _has_bgr = None
     _has_bgr_tested = False
@@ -99,6 +97,7 @@ class Texture(object):
         self._gl_min_filter = None
         self._gl_mag_filter = None
         self._rectangle     = rectangle
+        self._bpp           = 4
 
     def __del__(self):
         # Add texture deletion outside GC call.
@@ -106,6 +105,14 @@ class Texture(object):
         # before application exit...
         if _texture_release_list is not None:
             _texture_release_list.append(self.id)
+            # schedule a release only for the first pending texture,
+            # the others will be released in the same run.
+            if len(_texture_release_list) == 1:
+                try:
+                    getClock().schedule_from_thread(_texture_release,
+                                                    invalidate=False)
+                except:
+                    pass
 
     @property
     def mipmap(self):
@@ -137,6 +144,11 @@ class Texture(object):
         '''Return the height of the texture (readonly)'''
         return self._height
 
+    @property
+    def cache_size(self):
+        '''Return the memory used by the texture, in bytes (readonly)'''
+        return self._width * self._height * self._bpp
+
     def flip_vertical(self):
         '''Flip tex_coords for vertical displaying'''
         a, b, c, d, e, f, g, h = self.tex_coords
@@ -251,8 +263,8 @@ class Texture(object):
         if not Texture.is_gl_format_supported(format):
             format = Texture.convert_gl_format(format)
 
-        data = (GLubyte * texture_width * texture_height *
-                Texture.gl_format_size(format))()
+        texture._bpp = Texture.gl_format_size(format)
+        data = (GLubyte * texture_width * texture_height * texture._bpp)()
         glTexImage2D(target, 0, format, texture_width, texture_height, 0,
                      format, GL_UNSIGNED_BYTE, data)
 
@@ -436,9 +448,11 @@ class TextureRegion(Texture):
         # don't use self of owner !
         pass
 
+    @property
+    def cache_size(self):
+        '''Return the memory used by the owner texture, in bytes (readonly)'''
+        return self.owner.cache_size
+
 if 'PYMT_DOC' not in os.environ:
     from pymt.clock import getClock
 
-    # install tick to release texture every 200ms
-    getClock().schedule_interval(_texture_release, 0.2)
-
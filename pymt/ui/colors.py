@@ -19,6 +19,10 @@ Exemple of user.css ::
 We cannot describe how to style every widget in this class.
 If you want to known which attribute is needed to style a widget,
 please look on the widget documentation.
+
+The computed styles are shared between the widgets with the same class, css
+classes and id. When the css is reloaded, only the widgets using a rule that
+have changed are updated.
 '''
 
 __all__ = (
@@ -29,7 +33,6 @@ __all__ = (
 )
 
 from pymt.logger import pymt_logger
-from pymt.cache import Cache
 from pymt.resources import resource_add_path
 from pymt.parser import parse_color, parse_image, parse_float4, \
         parse_float, parse_bool, parse_int, parse_int2, parse_string, \
@@ -42,9 +45,6 @@ import logging
 import re
 import weakref
 
-# Register CSS cache
-Cache.register('pymt.css', limit=500, timeout=60)
-
 #: Instance of the CSS sheet
 pymt_sheet = None
 
@@ -59,6 +59,9 @@ pymt_css_prefix = ['key-', 'slider-', 'title-', 'cursor-', 'selection-']
 _css_sources = []
 _css_widgets = set()
 
+# Computed styles, by signature
+_css_styles = {}
+
 # Auto conversion from css to a special type.
 css_keyword_convert = {
     'color':                    parse_color,
@@ -118,18 +121,101 @@ css_keyword_convert = {
     'selected-color':           parse_color,
 }
 
+class CSSComputedStyle(dict):
+    '''Computed style of a widget, returned by css_get_style(). The same
+    style is shared by all the widgets with the same signature (class, css
+    classes and id), so it cannot be modified.
+    '''
+
+    __slots__ = ()
+
+    def _readonly(self, *largs, **kwargs):
+        raise TypeError('CSSComputedStyle is read-only, copy it with dict()')
+
+    __setitem__ = __delitem__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+def _get_widget_cls(widget):
+    '''(internal) Return the css classes of a widget in a tuple'''
+    widget_cls = widget.cls
+    if type(widget_cls) in (unicode, str):
+        return (widget_cls, )
+    elif type(widget_cls) in (list, tuple):
+        return tuple(widget_cls)
+    return ()
+
 class CSSSheet(object):
+    '''CSS sheet, with all the rules parsed.
+
+    The rules are compiled into an index by type, class and id at the first
+    get_style(), and the merged style of every type/class chain is kept, so
+    a lookup cost a few dict access, whatever the size of the sheet. The
+    index is rebuilt when new rules are added.
+    '''
     def __init__(self):
         self._rule = ''
         self._content = ''
         self._state = 'rule'
         self._css = {}
+        self._invalidate()
 
     def reset(self):
         self._rule = ''
         self._content = ''
         self._state = 'rule'
         self._css = {}
+        self._invalidate()
+
+    def _invalidate(self):
+        '''(internal) Drop the compiled index'''
+        self._by_type = None
+        self._by_class = None
+        self._by_type_class = None
+        self._by_id = None
+        self._chains = {}
+
+    def _compile(self):
+        '''(internal) Compile the rules into an index by selector type'''
+        by_type, by_class, by_type_class, by_id = {}, {}, {}, {}
+        for rule, values in self._css.iteritems():
+            if rule.startswith('#'):
+                by_id[rule[1:]] = values
+            elif rule.startswith('.'):
+                by_class[rule[1:]] = values
+            elif '.' in rule:
+                by_type_class[tuple(rule.split('.', 1))] = values
+            else:
+                by_type[rule] = values
+        self._by_type = by_type
+        self._by_class = by_class
+        self._by_type_class = by_type_class
+        self._by_id = by_id
+        self._chains = {}
+
+    def _get_chain_style(self, widget_class, widget_cls):
+        '''(internal) Merge the rules matching a widget class and a list of
+        css classes. The most generic rules are applied first.'''
+        names = ['*'] + list(reversed(get_widget_parents_by_class(widget_class)))
+        styles = {}
+
+        # match <objectname>
+        by_type = self._by_type
+        for name in names:
+            if name in by_type:
+                styles.update(by_type[name])
+
+        # match .<classname>, then <objectname>.<classname>
+        by_class = self._by_class
+        by_type_class = self._by_type_class
+        for kcls in widget_cls:
+            if kcls in by_class:
+                styles.update(by_class[kcls])
+            for name in names:
+                values = by_type_class.get((name, kcls))
+                if values is not None:
+                    styles.update(values)
+
+        return styles
 
     def parse_text(self, text):
         '''Parse a CSS text, and inject in the current sheet'''
@@ -204,51 +290,59 @@ class CSSSheet(object):
                 self._css[rule].update(dict(keys[:]))
             else:
                 self._css[rule] = dict(keys[:])
-
-    def get_style(self, widget):
-        '''Return the style of a widget'''
-        widget_classes = get_widget_parents(widget)
-        widget_classes.append('*')
-        styles = {}
-
-        # 
-        # TODO rework this part to match
-        # #<objectid>  uniq
-        # <objectname> uniq
-        # .<class>     multiple
-        #
-
-        # match <objectname>
-        for cls in reversed(widget_classes):
-            for r, v in self._css.iteritems():
-                if r == cls:
-                    styles.update(v)
-
-        # match .<classname>
-        widget_cls = widget.cls
-        if type(widget_cls) in (unicode, str):
-            widget_cls = [widget.cls]
-        if type(widget_cls) in (list, tuple):
-            for kcls in widget_cls:
-                cls = '.%s' % kcls
-                if cls in self._css:
-                    styles.update(self._css[cls])
-
-                # match <objectname>.<classname>
-                for name in reversed(widget_classes):
-                    lcls = '%s%s' % (name, cls)
-                    for r, v in self._css.iteritems():
-                        if r == lcls:
-                            styles.update(v)
+        self._invalidate()
+
+    def get_signature(self, widget):
+        '''Return the signature of a widget: a tuple (class, css classes,
+        id). The id is kept only if a rule match it, so the widgets with
+        the same signature have the same style.'''
+        if self._by_type is None:
+            self._compile()
+        widget_id = getattr(widget, 'id', None)
+        if widget_id is not None:
+            widget_id = '%s' % widget_id
+            if widget_id not in self._by_id:
+                widget_id = None
+        return (widget.__class__, _get_widget_cls(widget), widget_id)
+
+    def get_selectors(self, signature):
+        '''Return the list of the rules that can match a signature, even if
+        they are not in the sheet.'''
+        widget_class, widget_cls, widget_id = signature
+        names = ['*'] + list(reversed(get_widget_parents_by_class(widget_class)))
+        selectors = names[:]
+        for kcls in widget_cls:
+            selectors.append('.%s' % kcls)
+            selectors.extend(['%s.%s' % (name, kcls) for name in names])
+        if widget_id is not None:
+            selectors.append('#%s' % widget_id)
+        return selectors
+
+    def get_style_by_signature(self, signature):
+        '''Return the style for a signature returned by get_signature()'''
+        if self._by_type is None:
+            self._compile()
+
+        # merged style of <objectname>, .<classname>, <objectname>.<classname>
+        key = signature[:2]
+        styles = self._chains.get(key)
+        if styles is None:
+            styles = self._chains[key] = self._get_chain_style(*key)
+        styles = dict(styles)
 
         # match #<objectname>
-        if hasattr(widget, 'id') and widget.id is not None:
-            widgetid = '#%s' % widget.id
-            if widgetid in self._css:
-                styles.update(self._css[widgetid])
+        widget_id = signature[2]
+        if widget_id is not None:
+            values = self._by_id.get(widget_id)
+            if values is not None:
+                styles.update(values)
 
         return styles
 
+    def get_style(self, widget):
+        '''Return the style of a widget'''
+        return self.get_style_by_signature(self.get_signature(widget))
+
 def get_truncated_classname(name):
     '''Return the css-ized name of a class
     (remove the MT prefix, and all in lowercase)'''
@@ -258,8 +352,11 @@ def get_truncated_classname(name):
 
 widgets_parents = {}
 def get_widget_parents(widget):
-    parent = [widget.__class__]
-    if not widget.__class__ in widgets_parents:
+    return get_widget_parents_by_class(widget.__class__)
+
+def get_widget_parents_by_class(widget_class):
+    if not widget_class in widgets_parents:
+        parent = [widget_class]
         widget_classes = list()
         while parent and len(parent):
             # take only the first parent...
@@ -268,8 +365,8 @@ def get_widget_parents(widget):
             if parent[0].__name__ in ['MTWidget', 'MTWindow']:
                 break
             parent = parent[0].__bases__
-        widgets_parents[widget.__class__] = widget_classes
-    return widgets_parents[widget.__class__]
+        widgets_parents[widget_class] = widget_classes
+    return widgets_parents[widget_class]
 
 def css_get_widget_id(widget):
     '''Return the css id of a widget'''
@@ -285,7 +382,9 @@ def css_get_widget_id(widget):
     return idwidget
 
 def css_get_style(widget):
-    '''Return a dict() with all the style for the widget.
+    '''Return a :class:`CSSComputedStyle` with all the style for the widget.
+    The style is shared with the other widgets of the same class, css classes
+    and id, and cannot be modified.
 
     :Parameters:
         `widget`: class
@@ -298,15 +397,30 @@ def css_get_style(widget):
     if not ref in _css_widgets:
         _css_widgets.add(ref)
 
-    idwidget = css_get_widget_id(widget)
-    styles = Cache.get('pymt.css', idwidget)
-    if styles is not None:
-        return styles
-
-    styles = pymt_sheet.get_style(widget)
-    Cache.append('pymt.css', idwidget, styles)
+    signature = pymt_sheet.get_signature(widget)
+    styles = _css_styles.get(signature)
+    if styles is None:
+        styles = _css_styles[signature] = CSSComputedStyle(
+            pymt_sheet.get_style_by_signature(signature))
     return styles
 
+def _css_get_rules():
+    '''(internal) Return a copy of the rules of the sheet'''
+    return dict([(rule, dict(values))
+                 for rule, values in pymt_sheet._css.iteritems()])
+
+def _css_invalidate(rules):
+    '''(internal) Compare the rules with the current sheet, and remove the
+    computed styles that use a changed rule. Return the changed rules.'''
+    css = pymt_sheet._css
+    changed = set([rule for rule in set(rules).union(css)
+                   if rules.get(rule) != css.get(rule)])
+    if changed:
+        for signature in _css_styles.keys():
+            if changed.intersection(pymt_sheet.get_selectors(signature)):
+                del _css_styles[signature]
+    return changed
+
 def css_add_sheet(text, _reload=False):
     '''Add a css text to use.
     Example ::
@@ -315,9 +429,13 @@ def css_add_sheet(text, _reload=False):
         css_add_sheet(mycss)
 
     '''
+    if _reload:
+        pymt_sheet.parse_text(text)
+        return
+    rules = _css_get_rules()
     pymt_sheet.parse_text(text)
-    if not _reload:
-        _css_sources.append((css_add_sheet, (text, )))
+    _css_invalidate(rules)
+    _css_sources.append((css_add_sheet, (text, )))
 
 def css_add_file(cssfile, _reload=False):
     '''Add a css file to use.
@@ -329,9 +447,14 @@ def css_add_file(cssfile, _reload=False):
     '''
     resource_add_path(os.path.dirname(cssfile))
     with open(cssfile, 'r') as fd:
-        pymt_sheet.parse_text(fd.read())
-    if not _reload:
-        _css_sources.append((css_add_file, (cssfile, )))
+        text = fd.read()
+    if _reload:
+        pymt_sheet.parse_text(text)
+        return
+    rules = _css_get_rules()
+    pymt_sheet.parse_text(text)
+    _css_invalidate(rules)
+    _css_sources.append((css_add_file, (cssfile, )))
 
 def css_register_state(name):
     '''Register a new state'''
@@ -347,18 +470,31 @@ def css_add_keyword(keyword, convertfunc):
     css_keyword_convert[keyword] = convertfunc
 
 def css_reload():
+    '''Reload all the css sources. Only the widgets using a rule that have
+    changed are reloaded.'''
     pymt_logger.debug('CSS: Reloading CSS in progress')
+    # the rules are not modified by the reset, no need to copy them
+    rules = pymt_sheet._css
     pymt_sheet.reset()
     for callback, args in _css_sources[:]:
         callback(*args, _reload=True)
-    Cache.remove('pymt.css')
+    changed = _css_invalidate(rules)
+    count = 0
     for r in _css_widgets.copy():
         o = r()
         if o is None:
             _css_widgets.remove(r)
             continue
-        o.reload_css()
-    pymt_logger.info('CSS: CSS Reloaded')
+        # use the id of the widget, the rule can have been added
+        signature = pymt_sheet.get_signature(o)
+        widget_id = getattr(o, 'id', None)
+        if widget_id is not None:
+            signature = signature[:2] + ('%s' % widget_id, )
+        if changed.intersection(pymt_sheet.get_selectors(signature)):
+            o.reload_css()
+            count += 1
+    pymt_logger.info('CSS: CSS Reloaded, %d rules changed, %d widgets '
+                     'updated' % (len(changed), count))
 
 # Autoload the default css + user css
 if 'PYMT_DOC' not in os.environ:
@@ -6,7 +6,7 @@ __all__ = ('MTButton', 'MTToggleButton', 'MTImageButton')
 
 import pymt
 import weakref
-from pymt.graphx import GlDisplayList, set_color, gx_blending, drawCSSRectangle
+from pymt.graphx import GlDisplayList, set_color, gx_blending
 from pymt.utils import SafeList
 from pymt.ui.widgets.label import MTLabel
 
@@ -140,8 +140,8 @@ class MTButton(MTLabel):
 
     def draw_background(self):
         set_color(*self.style.get('bg-color'))
-        drawCSSRectangle(pos=self.pos, size=self.size, style=self.style,
-                         state=self.state)
+        self._css_background.draw(pos=self.pos, size=self.size,
+                                  style=self.style, state=self.state)
 
     def draw_label(self, dx=0, dy=0):
         style = self.style
@@ -215,10 +215,10 @@ class MTKineticList(MTStencilContainer):
         Attached to the on_press handler of the delete button(self.db)
         '''
         if self.db.state == 'down':
-            for child in self.children[:]:
+            for child in self.children.snapshot():
                 child.show_delete()
         else:
-            for child in self.children[:]:
+            for child in self.children.snapshot():
                 child.hide_delete()
 
     def toggle_search(self, touch):
@@ -328,7 +328,7 @@ class MTKineticList(MTStencilContainer):
         ny = y
 
         # recalculate position for each children
-        for child in self.children[:]:
+        for child in self.children.snapshot():
 
             # each row, calculate the height, advance y and reset x
             if index % limit == 0:
@@ -445,7 +445,7 @@ class MTKineticList(MTStencilContainer):
 
         # ok, the trigger distance is enough, we can dispatch event.
         # will not work if children grab the touch in down state :/
-        for child in reversed(self.children[:]):
+        for child in reversed(self.children.snapshot()):
             must_break = child.dispatch_event('on_touch_down', touch)
             old_grab_current = touch.grab_current
             touch.grab_current = child
@@ -496,7 +496,7 @@ class MTKineticList(MTStencilContainer):
 
         # draw children
         self.stencil_push()
-        for w in self.children[:]:
+        for w in self.children.snapshot():
             # internal update of children
             w.update()
             # optimization to draw only viewed children
@@ -38,7 +38,7 @@ class MTListContainer(MTWidget):
     def on_draw(self):
         with gx_matrix:
             glTranslatef(self.x + self.content_x, self.y + self.content_y, 0)
-            for children in self.children[:]:
+            for children in self.children.snapshot():
                 children.dispatch_event('on_draw')
 
 class MTList(MTStencilContainer):
@@ -215,10 +215,10 @@ class MTList(MTStencilContainer):
         # first, we should dispatch event as base should do
         # then, in second, we must dispatch event for widgets in the grab list
         touch.grab_current = None
-        for child in reversed(self.container.children[:]):
+        for child in reversed(self.container.children.snapshot()):
             if child.dispatch_event('on_touch_down', touch):
                 break
-        for child in reversed(self.container.children[:]):
+        for child in reversed(self.container.children.snapshot()):
             if child.dispatch_event('on_touch_up', touch):
                 break
 
@@ -72,7 +72,7 @@ class MTScreenLayout(MTAbstractLayout):
         self.screens.append(widget)
 
     def remove_widget(self, widget):
-        for btn in self.tabs.children[:]:
+        for btn in self.tabs.children.snapshot():
             if isinstance(widget, basestring):
                 if btn.label == widget:
                     self.tabs.remove_widget(btn)
@@ -328,6 +328,7 @@ class MTScatter(MTWidget):
                                                dtype='float32')
         self._transform_inv_gl = ascontiguousarray(self._transform.T,
                                                    dtype='float32')
+        self._spatial_update()
 
     def _apply_drag(self, touch):
         #_last_touch_pos has last pos in correct parent space, just liek incoming touch
@@ -37,6 +37,6 @@ class MTStencilContainer(MTWidget):
     def on_draw(self):
         self.stencil_push()
         # draw childrens
-        for w in self.children[:]:
+        for w in self.children.snapshot():
             w.dispatch_event('on_draw')
         self.stencil_pop()
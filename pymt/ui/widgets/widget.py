@@ -5,12 +5,14 @@ Widget: Base of every widget implementation.
 __all__ = ('getWidgetById', 'MTWidget')
 
 import weakref
+from pymt.base import getEventLoop
 from pymt.event import EventDispatcher
 from pymt.logger import pymt_logger
 from pymt.utils import SafeList
+from pymt.geometry import SpatialGrid
 from pymt.ui.factory import MTWidgetFactory
 from pymt.ui.colors import css_get_style
-from pymt.graphx import set_color, drawCSSRectangle
+from pymt.graphx import set_color, CSSBackground
 
 _id_2_widget = dict()
 
@@ -36,12 +38,49 @@ class MTWidgetMetaclass(type):
         # auto registration in factory
         MTWidgetFactory.register(name, mcs)
 
+_update_classes = {}
+
+def _class_need_update(cls):
+    '''(internal) Return True if the class override on_update'''
+    result = _update_classes.get(cls)
+    if result is None:
+        for base in cls.__mro__:
+            if 'on_update' in base.__dict__:
+                result = base is not MTWidget
+                break
+        _update_classes[cls] = result
+    return result
+
+def _widget_bbox(w):
+    '''(internal) Return the bounding box of a widget in his parent space,
+    with a small margin for the rounding errors'''
+    bbox = getattr(w, 'bbox', None)
+    if bbox is not None:
+        (x, y), (width, height) = bbox
+    else:
+        (x, y), (width, height) = w.pos, w.size
+    return (x - 1, y - 1, width + 2, height + 2)
+
 class MTWidget(EventDispatcher):
     '''Global base for any multitouch widget.
     Implement event for mouse, object, touch and animation.
 
     Event are dispatched through widget only if it's visible.
 
+    The on_update event is dispatched only to the widgets that need it, and
+    to their parents: the widgets overriding on_update, having handlers
+    attached on it, or subscribed with subscribe_update(). The subtrees
+    without any of them are skipped. Children must be added with
+    add_widget() to be counted.
+
+    A container with lot of children can use a spatial index
+    (`spatial_index` parameter): the touch events are dispatched only to the
+    children having the touch in their bounding box, in z-order, instead of
+    testing every children. Use it only if the children react to the touches
+    inside their bounding box, or grab the touches they need (like scatter,
+    button...). The index is updated when a child is moved, resized or
+    transformed.
+
     :Parameters:
         `pos` : list, default is (0, 0)
             Position of widget, in (x, y) format
@@ -63,6 +102,9 @@ class MTWidget(EventDispatcher):
             Add inline CSS
         `cls` : str, default is ''
             CSS class of this widget
+        `spatial_index` : bool or int, default is False
+            Use a spatial index to dispatch touch events to the children.
+            If an int is given, it's used as the size of the grid cells.
 
     :Events:
         `on_update` ()
@@ -83,13 +125,16 @@ class MTWidget(EventDispatcher):
 
     __metaclass__ = MTWidgetMetaclass
 
-    __slots__ = ('children', 'style', 'draw_children',
+    __slots__ = ('_children', 'style', 'draw_children',
                  '_cls',
                  '_root_window_source', '_root_window',
                  '_parent_window_source', '_parent_window',
                  '_parent_layout_source', '_parent_layout',
                  '_size_hint', '_id', '_parent',
                  '_visible', '_inline_style',
+                 '_update_count', '_update_parent', '_update_handlers',
+                 '_spatial_index', '_spatial_children', '_spatial_order',
+                 '_css_background',
                  '__animationcache__',
                  '__weakref__')
 
@@ -111,6 +156,18 @@ class MTWidget(EventDispatcher):
         kwargs.setdefault('draw_children', True)
         kwargs.setdefault('cls', '')
         kwargs.setdefault('style', {})
+        kwargs.setdefault('spatial_index', False)
+
+        # number of widgets needing on_update in this subtree
+        self._update_count      = 1 if _class_need_update(type(self)) else 0
+        self._update_parent     = None
+        self._update_handlers   = False
+
+        # spatial index of children, used by the position setters
+        self._parent            = None
+        self._spatial_index     = None
+        self._spatial_children  = None
+        self._spatial_order     = None
 
         self._id = None
         if 'id' in kwargs:
@@ -124,12 +181,11 @@ class MTWidget(EventDispatcher):
 
         # privates
         self.__animationcache__   = set()
-        self._parent              = None
+        self._css_background      = CSSBackground()
         self._visible             = None
         self._size_hint           = kwargs.get('size_hint')
 
 
-        #: List of children (SafeList)
         self.children             = SafeList()
         #: If False, childrens are not drawed. (deprecated)
         self.draw_children        = kwargs.get('draw_children')
@@ -139,6 +195,8 @@ class MTWidget(EventDispatcher):
         # apply visibility
         self.visible              = kwargs.get('visible')
 
+        self.spatial_index        = kwargs.get('spatial_index')
+
         # cache for get_parent_window()
         self._parent_layout         = None
         self._parent_layout_source  = None
@@ -186,6 +244,77 @@ class MTWidget(EventDispatcher):
     parent = property(_get_parent, _set_parent,
                       doc='MTWidget: parent of widget. Fired on_parent event when set')
 
+    def _set_children(self, children):
+        old = getattr(self, '_children', None)
+        if old is not None:
+            for w in old:
+                if isinstance(w, MTWidget) and w._update_parent is self:
+                    w._set_update_parent(None)
+        if not isinstance(children, SafeList):
+            children = SafeList(children)
+        self._children = children
+        for w in children:
+            if isinstance(w, MTWidget):
+                w._set_update_parent(self)
+    def _get_children(self):
+        return self._children
+    children = property(_get_children, _set_children,
+        doc='SafeList: children of the widget. A plain list can be assigned, '
+            'it will be converted to a SafeList')
+
+    def _set_spatial_index(self, value):
+        if value is False or value is None:
+            self._spatial_index = None
+        elif value is True:
+            self._spatial_index = SpatialGrid()
+        else:
+            self._spatial_index = SpatialGrid(cell_size=value)
+        self._spatial_children = None
+        self._spatial_order = None
+    def _get_spatial_index(self):
+        return self._spatial_index is not None
+    spatial_index = property(_get_spatial_index, _set_spatial_index,
+        doc='bool: Use a spatial index to dispatch touch events to the '
+            'children (can be set to an int for the size of the grid cells)')
+
+    def _spatial_sync(self):
+        '''(internal) Synchronize the spatial index with the children list, and
+        return a dict with the z-order of the children'''
+        children = self.children.snapshot()
+        if children is self._spatial_children:
+            return self._spatial_order
+        index = self._spatial_index
+        order = {}
+        for i, w in enumerate(children):
+            order[w] = i
+        for w in list(index):
+            if w not in order:
+                index.remove(w)
+        for w in children:
+            if w not in index:
+                index.insert(w, _widget_bbox(w))
+        self._spatial_children = children
+        self._spatial_order = order
+        return order
+
+    def _spatial_candidates(self, touch):
+        '''(internal) Return the children having the touch in their bounding
+        box, in z-order'''
+        order = self._spatial_sync()
+        candidates = self._spatial_index.query_point(touch.x, touch.y)
+        candidates.sort(key=order.__getitem__)
+        return candidates
+
+    def _spatial_update(self):
+        '''(internal) Update the bounding box of the widget in the spatial
+        index of his parent. Must be called when the widget move.'''
+        parent = self._parent
+        if parent is None:
+            return
+        index = getattr(parent, '_spatial_index', None)
+        if index is not None and self in index:
+            index.insert(self, _widget_bbox(self))
+
     def _set_id(self, id):
         ref = weakref.ref(self)
         if ref in _id_2_widget:
@@ -334,6 +463,56 @@ class MTWidget(EventDispatcher):
             parent.remove_widget(self)
             parent.add_widget(self)
 
+    def invalidate(self):
+        '''Ask the window to be redrawn on the next frame.
+        Needed only in ondemand redraw mode, if the widget change without
+        any input or Clock event.'''
+        evloop = getEventLoop()
+        if evloop is not None:
+            evloop.invalidate()
+
+    def subscribe_update(self):
+        '''Dispatch on_update to this widget every frame. Not needed if the
+        widget override on_update, or have handlers attached on it. Each call
+        must be balanced by a call to unsubscribe_update().'''
+        self._update_propagate(1)
+
+    def unsubscribe_update(self):
+        '''Stop dispatching on_update to this widget, see
+        subscribe_update()'''
+        self._update_propagate(-1)
+
+    def _update_propagate(self, count):
+        '''(internal) Add count to the update subscribers of this widget
+        and his parents'''
+        w = self
+        while w is not None:
+            w._update_count += count
+            w = w._update_parent
+
+    def _set_update_parent(self, parent):
+        '''(internal) Move the update subscribers of this widget to another
+        parent'''
+        old = self._update_parent
+        if old is parent:
+            return
+        count = self._update_count
+        if count:
+            if old is not None:
+                old._update_propagate(-count)
+            if parent is not None:
+                parent._update_propagate(count)
+        self._update_parent = parent
+
+    def _compile_handlers(self):
+        super(MTWidget, self)._compile_handlers()
+        # handlers attached on on_update subscribe the widget
+        handlers = self._event_table is not None and \
+                'on_update' in self._event_table
+        if handlers != self._update_handlers:
+            self._update_handlers = handlers
+            self._update_propagate(1 if handlers else -1)
+
     def hide(self):
         '''Hide the widget'''
         self.visible = False
@@ -343,20 +522,22 @@ class MTWidget(EventDispatcher):
         self.visible = True
 
     def on_update(self):
-        for w in self.children[:]:
-            w.dispatch_event('on_update')
+        for w in self.children.snapshot():
+            if getattr(w, '_update_count', 1):
+                w.dispatch_event('on_update')
 
     def on_draw(self):
         self.draw()
         if self.draw_children:
-            for w in self.children[:]:
+            for w in self.children.snapshot():
                 w.dispatch_event('on_draw')
 
     def draw(self):
         '''Handle the draw of widget.
         Derivate this method to draw your widget.'''
         set_color(*self.style.get('bg-color'))
-        drawCSSRectangle(pos=self.pos, size=self.size, style=self.style)
+        self._css_background.draw(pos=self.pos, size=self.size,
+                                  style=self.style)
 
     def add_widget(self, w, front=True):
         '''Add a widget in the children list.'''
@@ -368,6 +549,8 @@ class MTWidget(EventDispatcher):
             w.parent = self
         except Exception:
             pass
+        if isinstance(w, MTWidget):
+            w._set_update_parent(self)
 
     def add_widgets(self, *widgets):
         for w in widgets:
@@ -378,6 +561,8 @@ class MTWidget(EventDispatcher):
         '''Remove a widget from the children list'''
         if w in self.children:
             self.children.remove(w)
+            if isinstance(w, MTWidget) and w._update_parent is self:
+                w._set_update_parent(None)
 
     def on_animation_complete(self, *largs):
         pass
@@ -389,25 +574,37 @@ class MTWidget(EventDispatcher):
         pass
 
     def on_resize(self, w, h):
-        for c in self.children[:]:
+        for c in self.children.snapshot():
             c.dispatch_event('on_parent_resize', w, h)
 
     def on_move(self, x, y):
-        for c in self.children[:]:
+        for c in self.children.snapshot():
             c.dispatch_event('on_move', x, y)
 
     def on_touch_down(self, touch):
-        for w in reversed(self.children[:]):
+        if self._spatial_index is not None:
+            children = self._spatial_candidates(touch)
+        else:
+            children = self.children.snapshot()
+        for w in reversed(children):
             if w.dispatch_event('on_touch_down', touch):
                 return True
 
     def on_touch_move(self, touch):
-        for w in reversed(self.children[:]):
+        if self._spatial_index is not None:
+            children = self._spatial_candidates(touch)
+        else:
+            children = self.children.snapshot()
+        for w in reversed(children):
             if w.dispatch_event('on_touch_move', touch):
                 return True
 
     def on_touch_up(self, touch):
-        for w in reversed(self.children[:]):
+        if self._spatial_index is not None:
+            children = self._spatial_candidates(touch)
+        else:
+            children = self.children.snapshot()
+        for w in reversed(children):
             if w.dispatch_event('on_touch_up', touch):
                 return True
 
@@ -438,36 +635,42 @@ class MTWidget(EventDispatcher):
 
     def _set_pos(self, x):
         if super(MTWidget, self)._set_pos(x):
+            self._spatial_update()
             self.dispatch_event('on_move', *self._pos)
             return True
     pos = property(EventDispatcher._get_pos, _set_pos)
 
     def _set_x(self, x):
         if super(MTWidget, self)._set_x(x):
+            self._spatial_update()
             self.dispatch_event('on_move', *self._pos)
             return True
     x = property(EventDispatcher._get_x, _set_x)
 
     def _set_y(self, x):
         if super(MTWidget, self)._set_y(x):
+            self._spatial_update()
             self.dispatch_event('on_move', *self._pos)
             return True
     y = property(EventDispatcher._get_y, _set_y)
 
     def _set_size(self, x):
         if super(MTWidget, self)._set_size(x):
+            self._spatial_update()
             self.dispatch_event('on_resize', *self._size)
             return True
     size = property(EventDispatcher._get_size, _set_size)
 
     def _set_width(self, x):
         if super(MTWidget, self)._set_width(x):
+            self._spatial_update()
             self.dispatch_event('on_resize', *self._size)
             return True
     width = property(EventDispatcher._get_width, _set_width)
 
     def _set_height(self, x):
         if super(MTWidget, self)._set_height(x):
+            self._spatial_update()
             self.dispatch_event('on_resize', *self._size)
             return True
     height = property(EventDispatcher._get_height, _set_height)
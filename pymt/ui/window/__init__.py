@@ -22,7 +22,8 @@ from OpenGL.GL import GL_VERSION, GL_FASTEST, GL_NICEST, GL_LINE_SMOOTH, \
 import pymt
 from pymt.utils import SafeList
 from pymt.logger import pymt_logger
-from pymt.base import getCurrentTouches, setWindow, touch_event_listeners
+from pymt.base import getCurrentTouches, setWindow, touch_event_listeners, \
+        getEventLoop
 from pymt.clock import getClock
 from pymt.graphx import set_color, drawCircle, drawLabel, drawRectangle, drawCSSRectangle
 from pymt.modules import pymt_modules
@@ -164,6 +165,15 @@ class BaseWindow(EventDispatcher):
         else:
             params['fps'] = pymt.pymt_config.getint('graphics', 'fps')
 
+        # ensure the default fps will be 60 if vsync is actived
+        # and if user didn't set any maximum fps.
+        if params['vsync'] and params['fps'] <= 0:
+            params['fps'] = 60.
+
+        #: Maximum FPS of the window, applied by the frame pacer of the
+        #: main loop
+        self.fps = float(params['fps'])
+
         if 'rotation' in kwargs:
             params['rotation'] = kwargs.get('rotation')
         else:
@@ -225,6 +235,12 @@ class BaseWindow(EventDispatcher):
         '''Dispatch all events from windows'''
         pass
 
+    def invalidate(self):
+        '''Ask the window to be redrawn on the next frame'''
+        evloop = getEventLoop()
+        if evloop is not None:
+            evloop.invalidate()
+
     def apply_css(self, styles):
         '''Called at __init__ time to applied css attribute in current class.
         '''
@@ -238,6 +254,16 @@ class BaseWindow(EventDispatcher):
         if len(self._inline_style):
             self.apply_css(self._inline_style)
 
+    def _get_children(self):
+        return self._children
+    def _set_children(self, children):
+        if not isinstance(children, SafeList):
+            children = SafeList(children)
+        self._children = children
+    children = property(_get_children, _set_children,
+        doc='SafeList: widgets of the window. A plain list can be assigned, '
+            'it will be converted to a SafeList')
+
     def _get_modifiers(self):
         return self._modifiers
     modifiers = property(_get_modifiers)
@@ -391,8 +417,9 @@ class BaseWindow(EventDispatcher):
         '''Event called when window are update the widget tree.
         (Usually before on_draw call.)
         '''
-        for w in self.children[:]:
-            w.dispatch_event('on_update')
+        for w in self.children.snapshot():
+            if getattr(w, '_update_count', 1):
+                w.dispatch_event('on_update')
 
     def on_draw(self):
         '''Event called when window we are drawing window.
@@ -403,12 +430,18 @@ class BaseWindow(EventDispatcher):
         self.draw()
 
         # then, draw childrens
-        for w in self.children[:]:
+        for w in self.children.snapshot():
             w.dispatch_event('on_draw')
 
         if self.show_fps:
             fps = getClock().get_fps()
-            drawLabel(label='FPS: %.2f' % float(fps),
+            label = 'FPS: %.2f' % float(fps)
+            evloop = getEventLoop()
+            if evloop is not None and evloop.pacer.fps:
+                stats = evloop.pacer.get_stats()
+                label += ' (target %.0f, late %d, skipped %d)' % (
+                    stats['fps'], stats['late'], stats['skipped'])
+            drawLabel(label=label,
                 center=False, pos=(0, 0),
                 font_size=10, bold=False)
 
@@ -418,7 +451,7 @@ class BaseWindow(EventDispatcher):
         '''Event called when a touch is down'''
         w, h = self.system_size
         touch.scale_for_screen(w, h, rotation=self._rotation)
-        for w in reversed(self.children[:]):
+        for w in reversed(self.children.snapshot()):
             if w.dispatch_event('on_touch_down', touch):
                 return True
 
@@ -426,7 +459,7 @@ class BaseWindow(EventDispatcher):
         '''Event called when a touch move'''
         w, h = self.system_size
         touch.scale_for_screen(w, h, rotation=self._rotation)
-        for w in reversed(self.children[:]):
+        for w in reversed(self.children.snapshot()):
             if w.dispatch_event('on_touch_move', touch):
                 return True
 
@@ -434,13 +467,14 @@ class BaseWindow(EventDispatcher):
         '''Event called when a touch up'''
         w, h = self.system_size
         touch.scale_for_screen(w, h, rotation=self._rotation)
-        for w in reversed(self.children[:]):
+        for w in reversed(self.children.snapshot()):
             if w.dispatch_event('on_touch_up', touch):
                 return True
 
     def on_resize(self, width, height):
         '''Event called when the window is resized'''
         self.update_viewport()
+        self.invalidate()
 
     def update_viewport(self):
         width, height = self.system_size
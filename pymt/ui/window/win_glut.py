@@ -123,6 +123,7 @@ class MTWindowGlut(BaseWindow):
         self.dispatch_event('on_mouse_move', x, y, self.modifiers)
 
     def _glut_keyboard(self, key, x, y):
+        self.invalidate()
         self.dispatch_event('on_keyboard', key, None, None)
 
     def _glut_update_modifiers(self):
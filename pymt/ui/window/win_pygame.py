@@ -6,8 +6,6 @@ __all__ = ('MTWindowPygame', )
 
 import os
 import pymt
-from time import sleep, time
-from pymt.clock import getClock
 from pymt.ui.window import BaseWindow
 from pymt.exceptions import pymt_exception_manager, ExceptionManager
 from pymt.logger import pymt_logger
@@ -84,12 +82,6 @@ class MTWindowPygame(BaseWindow):
         # before calling on_resize
         self._size = params['width'], params['height']
         self._vsync = params['vsync']
-        self._fps = float(params['fps'])
-
-        # ensure the default fps will be 60 if vsync is actived
-        # and if user didn't set any maximum fps.
-        if self._vsync and self._fps <= 0:
-            self._fps = 60.
 
         # try to use mode with multisamples
         try:
@@ -133,20 +125,10 @@ class MTWindowPygame(BaseWindow):
         super(MTWindowPygame, self).on_keyboard(key, scancode, unicode)
 
     def flip(self):
+        # software vsync is done by the frame pacer of the main loop
         pygame.display.flip()
         super(MTWindowPygame, self).flip()
 
-        # do software vsync if asked
-        # FIXME: vsync is surely not 60 for everyone
-        # this is not a real vsync. this must be done by driver...
-        # but pygame can't do vsync on X11, and some people
-        # use hack to make it work under darwin...
-        fps = self._fps
-        if fps > 0:
-            s = 1 / fps - (time() - getClock().get_time())
-            if s > 0:
-                sleep(s)
-
     def toggle_fullscreen(self):
         if self.flags & pygame.FULLSCREEN:
             self.flags &= ~pygame.FULLSCREEN
@@ -158,7 +140,12 @@ class MTWindowPygame(BaseWindow):
         evloop = getEventLoop()
         evloop.idle()
 
-        for event in pygame.event.get():
+        events = pygame.event.get()
+        if events:
+            # anything coming from the window can change the display
+            evloop.invalidate()
+
+        for event in events:
 
             # kill application (SIG_TERM)
             if event.type == pygame.QUIT:
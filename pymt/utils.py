@@ -147,15 +147,57 @@ def deprecated(func):
     return new_func
 
 
+def _safelist_mutator(name):
+    method = getattr(list, name)
+    def mutator(self, *largs, **kwargs):
+        self._snapshot = None
+        return method(self, *largs, **kwargs)
+    mutator.__name__ = name
+    mutator.__doc__ = method.__doc__
+    return mutator
+
 class SafeList(list):
-    '''List with clear() method
+    '''List with clear() and snapshot() methods
+
+    snapshot() return a tuple of the items, that can be iterated even if the
+    list is modified during the iteration. The tuple is cached until the
+    list is modified, so iterating on a list that don't change allocate
+    nothing ::
+
+        for w in self.children.snapshot():
+            w.dispatch_event('on_update')
 
     .. warning::
         Usage of iterate() function will decrease your performance.
     '''
+
+    _snapshot = None
+
+    # all the methods modifying the list invalidate the snapshot
+    append = _safelist_mutator('append')
+    extend = _safelist_mutator('extend')
+    insert = _safelist_mutator('insert')
+    remove = _safelist_mutator('remove')
+    pop = _safelist_mutator('pop')
+    reverse = _safelist_mutator('reverse')
+    sort = _safelist_mutator('sort')
+    __setitem__ = _safelist_mutator('__setitem__')
+    __delitem__ = _safelist_mutator('__delitem__')
+    __setslice__ = _safelist_mutator('__setslice__')
+    __delslice__ = _safelist_mutator('__delslice__')
+    __iadd__ = _safelist_mutator('__iadd__')
+    __imul__ = _safelist_mutator('__imul__')
+
     def clear(self):
         del self[:]
 
+    def snapshot(self):
+        '''Return a tuple of the items, cached until the list is modified'''
+        snapshot = self._snapshot
+        if snapshot is None:
+            snapshot = self._snapshot = tuple(self)
+        return snapshot
+
     @deprecated
     def iterate(self, reverse=False):
         if reverse:
@@ -163,6 +205,83 @@ class SafeList(list):
         return iter(self)
 
 
+try:
+    from collections import OrderedDict
+except ImportError:
+    # Python 2.6
+    class OrderedDict(dict):
+        '''Dictionnary that remembers the insertion order of the keys.
+        Minimal version of the Python 2.7 class, for Python 2.6.'''
+
+        def __init__(self):
+            dict.__init__(self)
+            # circular doubly linked list of [prev, next, key]
+            self._root = root = []
+            root[:] = [root, root, None]
+            self._links = {}
+
+        def __setitem__(self, key, value):
+            if key not in self:
+                root = self._root
+                last = root[0]
+                last[1] = root[0] = self._links[key] = [last, root, key]
+            dict.__setitem__(self, key, value)
+
+        def __delitem__(self, key):
+            dict.__delitem__(self, key)
+            prev, next, key = self._links.pop(key)
+            prev[1] = next
+            next[0] = prev
+
+        def __iter__(self):
+            root = self._root
+            link = root[1]
+            while link is not root:
+                yield link[2]
+                link = link[1]
+
+        def clear(self):
+            dict.clear(self)
+            root = self._root
+            root[:] = [root, root, None]
+            self._links.clear()
+
+        def pop(self, key, *default):
+            if key in self:
+                value = dict.__getitem__(self, key)
+                del self[key]
+                return value
+            if default:
+                return default[0]
+            raise KeyError(key)
+
+        def popitem(self, last=True):
+            if not self:
+                raise KeyError('dictionary is empty')
+            link = self._root[0] if last else self._root[1]
+            key = link[2]
+            return key, self.pop(key)
+
+        iterkeys = __iter__
+
+        def itervalues(self):
+            for key in self:
+                yield dict.__getitem__(self, key)
+
+        def iteritems(self):
+            for key in self:
+                yield key, dict.__getitem__(self, key)
+
+        def keys(self):
+            return list(self)
+
+        def values(self):
+            return list(self.itervalues())
+
+        def items(self):
+            return list(self.iteritems())
+
+
 def serialize_numpy(obj):
     import numpy
     from StringIO import StringIO
@@ -0,0 +1,126 @@
+'''
+Atlas
+'''
+
+from init import test, import_pymt_no_window
+
+def unittest_atlas_packer():
+    import_pymt_no_window()
+    from pymt import SkylinePacker
+    packer = SkylinePacker(64, 64)
+    rects = []
+    while True:
+        pos = packer.insert(10, 12)
+        if pos is None:
+            break
+        rects.append((pos[0], pos[1], 10, 12))
+    # 6 columns of 5 rows fit in the area
+    test(len(rects) == 30)
+    test(packer.used == 30 * 10 * 12)
+    # no rectangle is outside or overlapping another
+    for i, (x, y, w, h) in enumerate(rects):
+        test(x >= 0 and y >= 0 and x + w <= 64 and y + h <= 64)
+        for x2, y2, w2, h2 in rects[i+1:]:
+            test(x + w <= x2 or x2 + w2 <= x or y + h <= y2 or y2 + h2 <= y)
+    # the remaining space is still usable for smaller rectangles
+    test(packer.insert(4, 4) is not None)
+    packer.reset()
+    test(packer.insert(64, 64) == (0, 0))
+
+class _FakeRegion(object):
+    def __init__(self, x, y, width, height):
+        self.x, self.y = x, y
+        self.size = width, height
+        self.tex_coords = (x, y, width, height)
+
+class _FakeTexture(object):
+    def __init__(self, width, height):
+        self.size = width, height
+        self.blits = 0
+
+    @staticmethod
+    def create(width, height, fmt):
+        return _FakeTexture(width, height)
+
+    def blit_buffer(self, data, size, mode='RGBA', pos=(0, 0)):
+        self.blits += 1
+
+    def get_region(self, x, y, width, height):
+        return _FakeRegion(x, y, width, height)
+
+def _fake_atlas(**kwargs):
+    import sys
+    module = sys.modules['pymt.atlas']
+    module.Texture = _FakeTexture
+    kwargs.setdefault('page_size', 64)
+    kwargs.setdefault('padding', 0)
+    atlas = module.Atlas(**kwargs)
+    evicted = []
+    repacked = []
+    atlas.push_handlers(on_evict=evicted.append, on_repack=repacked.append)
+    return atlas, evicted, repacked
+
+def _restore_texture():
+    import sys
+    from pymt.texture import Texture
+    sys.modules['pymt.atlas'].Texture = Texture
+
+def unittest_atlas_lru():
+    import_pymt_no_window()
+    try:
+        atlas, evicted, repacked = _fake_atlas(max_pages=1)
+        for key in 'abcd':
+            atlas.add(key, '', (32, 32))
+        test(len(atlas) == 4)
+        test(atlas.get('unknown') is None)
+        # a is used again, b is now the least recently used
+        test(atlas.get('a') is not None)
+        test(atlas.add('e', '', (32, 32)) is not None)
+        test(evicted == ['b'])
+        test('a' in atlas and 'b' not in atlas and 'e' in atlas)
+        test(len(repacked) == 1)
+    finally:
+        _restore_texture()
+
+def unittest_atlas_repack():
+    import_pymt_no_window()
+    try:
+        atlas, evicted, repacked = _fake_atlas(max_pages=1)
+        regions = [atlas.add(key, '', (32, 16)) for key in 'abcd']
+        atlas.remove('a')
+        atlas.remove('c')
+        test(atlas.get_stats()[0]['allocated'] == .5)
+        test(atlas.get_stats()[0]['fill'] == .25)
+        atlas.repack()
+        test(len(repacked) == 1)
+        stats = atlas.get_stats()[0]
+        test(stats['allocated'] == stats['fill'] == .25)
+        # the regions are updated in place
+        test(atlas.get('b') is regions[1])
+        test(atlas.get('d') is regions[3])
+        positions = set([(r.x, r.y) for r in (regions[1], regions[3])])
+        test(positions == set([(0, 0), (32, 0)]))
+    finally:
+        _restore_texture()
+
+def unittest_atlas_evict_one_page():
+    import_pymt_no_window()
+    try:
+        atlas, evicted, repacked = _fake_atlas(max_pages=2)
+        keys = ['a1', 'a2', 'a3', 'a4', 'b1', 'b2', 'b3', 'b4']
+        for key in keys:
+            atlas.add(key, '', (32, 32))
+        test(len(atlas.get_stats()) == 2)
+        # interleave the pages in the LRU order
+        for key in ('a1', 'b1', 'a2', 'b2', 'a3', 'b3', 'a4', 'b4'):
+            atlas.get(key)
+        # a full page is needed: only the images of one page are evicted
+        test(atlas.add('big', '', (64, 64)) is not None)
+        test(sorted(evicted) == ['a1', 'a2', 'a3', 'a4'])
+        test(len(repacked) == 1)
+        test(len(atlas) == 5)
+        stats = atlas.get_stats()
+        test(stats[0]['images'] == 1 and stats[0]['fill'] == 1.)
+        test(stats[1]['images'] == 4)
+    finally:
+        _restore_texture()
@@ -0,0 +1,105 @@
+'''
+Cache eviction
+'''
+
+from init import test, import_pymt_no_window
+
+class _Sized(object):
+    def __init__(self, size):
+        self.cache_size = size
+
+def unittest_cache_lru_limit():
+    import_pymt_no_window()
+    from pymt import Cache
+    Cache.register('test.lru', limit=2)
+    Cache.append('test.lru', 'a', 1)
+    Cache.append('test.lru', 'b', 2)
+    # touch a, b is now the least recently used
+    test(Cache.get('test.lru', 'a') == 1)
+    Cache.append('test.lru', 'c', 3)
+    test(Cache.get('test.lru', 'b') is None)
+    test(Cache.get('test.lru', 'a') == 1)
+    test(Cache.get('test.lru', 'c') == 3)
+
+def unittest_cache_max_bytes():
+    import_pymt_no_window()
+    from pymt import Cache
+    Cache.register('test.bytes', max_bytes=100)
+    Cache.append('test.bytes', 'a', _Sized(40))
+    Cache.append('test.bytes', 'b', _Sized(40))
+    test(Cache.get_size('test.bytes') == 80)
+    Cache.append('test.bytes', 'c', None, size=40)
+    test(Cache.get('test.bytes', 'a') is None)
+    test(Cache.get_size('test.bytes') == 80)
+    Cache.remove('test.bytes', 'b')
+    test(Cache.get_size('test.bytes') == 40)
+
+def unittest_cache_timeout():
+    import_pymt_no_window()
+    from pymt import Cache, getClock, VirtualTimeSource
+    clock = getClock()
+    source = clock.time_source
+    try:
+        virtual = VirtualTimeSource(start=clock.get_time())
+        clock.time_source = virtual
+        Cache.register('test.timeout', timeout=2)
+        Cache.append('test.timeout', 'a', 1)
+        Cache.append('test.timeout', 'b', 2)
+        Cache.append('test.timeout', 'c', 3, timeout=5)
+        virtual.advance(1.5)
+        clock.tick()
+        Cache.get('test.timeout', 'a')
+        virtual.advance(1)
+        clock.tick()
+        test(Cache.get('test.timeout', 'b') is None)
+        test(Cache.get('test.timeout', 'a') == 1)
+        test(Cache.get('test.timeout', 'c') == 3)
+        for x in xrange(12):
+            virtual.advance(.5)
+            clock.tick()
+        test(Cache.get('test.timeout', 'c') is None)
+    finally:
+        clock.time_source = source
+
+def unittest_cache_stats():
+    import_pymt_no_window()
+    from pymt import Cache
+    Cache.register('test.stats', limit=1)
+    Cache.get('test.stats', 'a')
+    Cache.append('test.stats', 'a', 1)
+    Cache.append('test.stats', 'b', 2)
+    Cache.get('test.stats', 'b')
+    stats = Cache.get_stats('test.stats')
+    test(stats['hits'] == 1)
+    test(stats['misses'] == 1)
+    test(stats['inserts'] == 2)
+    test(stats['evictions_lru'] == 1)
+    test(stats['count'] == 1)
+    Cache.reset_stats('test.stats')
+    test(Cache.get_stats('test.stats')['hits'] == 0)
+
+def unittest_cache_purge_no_redraw():
+    import_pymt_no_window()
+    from pymt import Cache, getClock, VirtualTimeSource
+    from pymt.base import TouchEventLoop, pymt_event_listeners
+    clock = getClock()
+    source = clock.time_source
+    evloop = TouchEventLoop()
+    # keep the loop running without window
+    pymt_event_listeners.append(evloop)
+    try:
+        virtual = VirtualTimeSource(start=clock.get_time())
+        clock.time_source = virtual
+        Cache.register('test.redraw', timeout=1)
+        Cache.append('test.redraw', 'a', 1)
+        evloop.idle()
+        evloop._invalid = False
+        # the purge is called, but the window is not invalidated
+        for x in xrange(6):
+            virtual.advance(.5)
+            evloop.idle()
+            test(not evloop._invalid)
+        test(Cache.get('test.redraw', 'a') is None)
+    finally:
+        pymt_event_listeners.remove(evloop)
+        clock.time_source = source
@@ -0,0 +1,110 @@
+'''
+Clock scheduling
+'''
+
+from init import test, import_pymt_no_window
+
+def unittest_clock_schedule():
+    import_pymt_no_window()
+    from pymt import Clock
+    calls = []
+    def callback(dt):
+        calls.append(dt)
+    clock = Clock()
+    clock.schedule_once(callback, 0)
+    clock.schedule_once(callback, 60)
+    clock.tick()
+    test(len(calls) == 1)
+    clock.tick()
+    test(len(calls) == 1)
+    test(clock.get_next_timeout() > 0)
+
+def unittest_clock_unschedule():
+    import_pymt_no_window()
+    from pymt import Clock
+    calls = []
+    def callback(dt):
+        calls.append(dt)
+    def other(dt):
+        calls.append(dt)
+    clock = Clock()
+    event = clock.schedule_interval(callback, 0)
+    clock.schedule_interval(other, 0)
+    clock.tick()
+    test(len(calls) == 2)
+    clock.unschedule(event)
+    clock.tick()
+    test(len(calls) == 3)
+    clock.unschedule(other)
+    clock.tick()
+    test(len(calls) == 3)
+    test(clock.get_next_timeout() is None)
+
+def unittest_clock_remove_false():
+    import_pymt_no_window()
+    from pymt import Clock
+    calls = []
+    def callback(dt):
+        calls.append(dt)
+        return False
+    clock = Clock()
+    clock.schedule_interval(callback, 0)
+    clock.tick()
+    clock.tick()
+    test(len(calls) == 1)
+
+def unittest_clock_virtual():
+    import_pymt_no_window()
+    from pymt import Clock, VirtualTimeSource
+    calls = []
+    def callback(dt):
+        calls.append(dt)
+    source = VirtualTimeSource(fast_forward=False)
+    clock = Clock(time_source=source)
+    clock.schedule_once(callback, 10)
+    clock.tick()
+    test(len(calls) == 0)
+    source.sleep(20)
+    clock.tick()
+    test(len(calls) == 0)
+    source.advance(10)
+    test(clock.tick() == 10)
+    test(calls == [10])
+
+def unittest_clock_time_source_change():
+    import_pymt_no_window()
+    from pymt import Clock, VirtualTimeSource
+    calls = []
+    def callback(dt):
+        calls.append(dt)
+    clock = Clock()
+    clock.schedule_once(callback, 5)
+    source = VirtualTimeSource(start=1000)
+    clock.time_source = source
+    test(abs(clock.get_time() - 1000) < 1)
+    source.sleep(5)
+    clock.tick()
+    test(len(calls) == 1)
+
+def unittest_clock_schedule_from_thread():
+    import_pymt_no_window()
+    import threading
+    from pymt import Clock
+    calls = []
+    def callback(value):
+        calls.append(value)
+    def producer():
+        for x in xrange(10):
+            clock.schedule_from_thread(callback, x)
+    clock = Clock()
+    clock.thread_batch = 4
+    thread = threading.Thread(target=producer)
+    thread.start()
+    thread.join()
+    test(clock.get_next_timeout() == 0)
+    clock.tick()
+    test(calls == [0, 1, 2, 3])
+    clock.tick()
+    clock.tick()
+    test(calls == range(10))
+    test(clock.get_thread_stats()['pending'] == 0)
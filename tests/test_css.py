@@ -2,7 +2,7 @@
 Css styling basic tests
 '''
 
-from init import test, import_pymt_no_window
+from init import test, import_pymt_no_window, import_pymt_window
 
 def unittest_css():
     import_pymt_no_window()
@@ -45,3 +45,131 @@ def unittest_css_multiclass():
     ''')
     l = MTLabel(label = 'test', cls=('test1', 'test2'))
     test(l.style['font-size'] == 24)
+
+def unittest_css_index():
+    import_pymt_no_window()
+    from pymt import MTButton, pymt_sheet, css_add_sheet
+    b = MTButton(label='test', cls='indexed')
+    test('font-size' in pymt_sheet.get_style(b))
+    # the index is rebuilt when rules are added
+    css_add_sheet('''
+    button.indexed { font-size: 42; }
+    ''')
+    test(pymt_sheet.get_style(b)['font-size'] == 42)
+    # the id rules are applied on the merged style
+    css_add_sheet('''
+    #indexedid { font-size: 43; }
+    ''')
+    b.id = 'indexedid'
+    test(pymt_sheet.get_style(b)['font-size'] == 43)
+
+def unittest_css_shared_style():
+    import_pymt_no_window()
+    import os
+    import tempfile
+    from pymt import MTWidget, css_get_style, css_add_sheet, css_add_file, \
+            css_reload
+    css_add_sheet('''
+    .shared { font-size: 17; }
+    ''')
+
+    reloaded = []
+    class SharedWidget(MTWidget):
+        def reload_css(self):
+            reloaded.append(self)
+            super(SharedWidget, self).reload_css()
+
+    a = SharedWidget(cls='shared')
+    b = SharedWidget(cls='shared', id='sharedb')
+    c = SharedWidget()
+    # same signature, same computed style
+    test(css_get_style(a) is css_get_style(b))
+    try:
+        css_get_style(a)['font-size'] = 0
+        test(False)
+    except TypeError:
+        test(True)
+
+    # only the widgets using a changed rule are reloaded
+    fd, filename = tempfile.mkstemp(suffix='.css')
+    try:
+        os.write(fd, '#sharedb { font-size: 18; }')
+        os.close(fd)
+        css_add_file(filename)
+        with open(filename, 'w') as fd:
+            fd.write('#sharedb { font-size: 19; }')
+        del reloaded[:]
+        css_reload()
+        test(reloaded == [b])
+        test(b.style['font-size'] == 19)
+    finally:
+        from pymt.ui.colors import _css_sources
+        _css_sources.remove((css_add_file, (filename, )))
+        os.unlink(filename)
+
+def unittest_css_rect_signature():
+    import_pymt_no_window()
+    from pymt.graphx.css import _css_rect_signature
+    style = {
+        'bg-color': [1, 0, 0, 1],
+        'bg-color-down': [0, 1, 0, 1],
+        'border-width': 2,
+        'border-width-down': 3,
+        'button-border-width': 4,
+        'button-border-width-down': 5,
+        'border-radius': 6,
+        'button-border-radius': 7,
+        'border-color': [0, 0, 1, 1],
+    }
+
+    # without state, bg-color is not used
+    sig = _css_rect_signature(style, None, None)
+    test(sig[0] is None)
+    test(sig[1:4] == (2, 6, .1))
+    # the lists are converted to tuples: the signature is hashable
+    test(sig[8] == (0, 0, 1, 1))
+    try:
+        hash(sig)
+        test(True)
+    except TypeError:
+        test(False)
+
+    # key-state, then key
+    sig = _css_rect_signature(style, None, 'down')
+    test(sig[0] == (0, 1, 0, 1))
+    test(sig[1] == 3)
+    test(sig[2] == 6)
+
+    # prefix-key-state, prefix-key, key-state, key
+    test(_css_rect_signature(style, 'button', 'down')[1] == 5)
+    test(_css_rect_signature(style, 'button', None)[1] == 4)
+    test(_css_rect_signature(style, 'button', 'down')[2] == 7)
+    del style['button-border-width-down']
+    test(_css_rect_signature(style, 'button', 'down')[1] == 4)
+    del style['button-border-width']
+    test(_css_rect_signature(style, 'button', 'down')[1] == 3)
+    test(_css_rect_signature(style, 'button', None)[1] == 2)
+
+    # default values
+    test(_css_rect_signature({}, 'button', 'down') ==
+         (None, 1.5, 0, .1, 0, 1, 0, (1, 1, .5, .5), None))
+
+def unittest_css_rect_nested_displaylist():
+    import_pymt_window()
+    from pymt import Cache, GlDisplayList, drawCSSRectangle
+    from pymt.graphx.css import _css_rect_signature
+    style = {'bg-color': [1, 0, 0, 1], 'border-radius': 3}
+    key = ((21, 13), _css_rect_signature(style, None, None))
+    Cache.remove('pymt.cssrect', key)
+
+    # drawn inline in the outer list, the shared list is not created
+    outer = GlDisplayList()
+    with outer:
+        drawCSSRectangle(pos=(5, 5), size=(21, 13), style=style)
+    test(outer.is_compiled())
+    test(Cache.get('pymt.cssrect', key) is None)
+
+    # outside of a display list, the shared list is used
+    drawCSSRectangle(pos=(5, 5), size=(21, 13), style=style)
+    dl = Cache.get('pymt.cssrect', key)
+    test(dl is not None and dl.is_compiled())
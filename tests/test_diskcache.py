@@ -0,0 +1,30 @@
+'''
+Disk cache
+'''
+
+from init import test, import_pymt_no_window
+
+def unittest_diskcache_append_get():
+    import_pymt_no_window()
+    import shutil
+    import tempfile
+    from ctypes import c_float
+    from array import array
+    from pymt import DiskCache
+    path = tempfile.mkdtemp()
+    try:
+        DiskCache.enable(path)
+        DiskCache.register('test.disk', 1)
+        key = DiskCache.get_key('test.disk', 'input', 42)
+        test(DiskCache.get('test.disk', key) is None)
+        data = array('f', [1., 2., 3.])
+        DiskCache.append('test.disk', key, (3, 'f'), data)
+        header, blob = DiskCache.get('test.disk', key)
+        test(header == (3, 'f'))
+        test(list((c_float * 3).from_buffer(blob)) == [1., 2., 3.])
+        # a new version doesn't reuse previous entries
+        DiskCache.register('test.disk', 2)
+        test(DiskCache.get_key('test.disk', 'input', 42) != key)
+    finally:
+        DiskCache.disable()
+        shutil.rmtree(path)
@@ -71,3 +71,36 @@ def unittest_dispatcher():
     test('nohandler' and not testpass)
 
 
+
+def unittest_dispatcher_stack():
+    import_pymt_no_window()
+    from pymt import EventDispatcher
+
+    class MyEventDispatcher(EventDispatcher):
+        def __init__(self):
+            super(MyEventDispatcher, self).__init__()
+            self.register_event_type('on_test')
+        def on_test(self, calls):
+            calls.append('default')
+
+    a = MyEventDispatcher()
+    b = MyEventDispatcher()
+    # the instances share the same event types
+    test(a._event_types is b._event_types)
+
+    calls = []
+    def first(calls):
+        calls.append('first')
+    def second(calls):
+        calls.append('second')
+        return True
+    a.push_handlers(on_test=first)
+    a.push_handlers(on_test=second)
+    a.dispatch_event('on_test', calls)
+    test(calls == ['second'])
+
+    calls = []
+    a.remove_handler('on_test', second)
+    a.dispatch_event('on_test', calls)
+    b.dispatch_event('on_test', calls)
+    test(calls == ['first', 'default', 'default'])
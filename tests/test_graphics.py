@@ -0,0 +1,107 @@
+'''
+Graphics canvas batching
+'''
+
+from init import test, import_pymt_window
+
+def _batches(plan):
+    from pymt.graphics import CanvasBatch
+    return [x for x in plan if isinstance(x, CanvasBatch)]
+
+def unittest_canvas_batch_grouping():
+    import_pymt_window()
+    from pymt.graphics import Canvas, Color, CanvasBatch
+    canvas = Canvas()
+    r1 = canvas.rectangle(pos=(0, 0), size=(10, 10))
+    r2 = canvas.rectangle(pos=(20, 0), size=(10, 10))
+    r3 = canvas.rectangle(pos=(40, 0), size=(10, 10))
+    color = canvas.color(1, 0, 0, 1)
+    r4 = canvas.rectangle(pos=(0, 20), size=(10, 10))
+    r5 = canvas.rectangle(pos=(20, 20), size=(10, 10))
+    # a line strip can't be merged
+    line = canvas.line([0, 0, 50, 50])
+    plan = canvas._update_plan()
+    test(len(plan) == 4)
+    test(isinstance(plan[0], CanvasBatch))
+    test(plan[0].elements == [r1, r2, r3])
+    test(plan[1] is color)
+    test(plan[2].elements == [r4, r5])
+    test(plan[3] is line)
+    # the mesh contains the vertex of all the elements
+    test(plan[0].mesh.count == 12)
+    test(list(plan[0].mesh.data_v[8:16]) == [20, 0, 30, 0, 30, 10, 20, 10])
+
+def unittest_canvas_batch_ordering():
+    import_pymt_window()
+    from pymt.graphics import Canvas
+    canvas = Canvas()
+    r1 = canvas.rectangle(pos=(0, 0), size=(10, 10))
+    l1 = canvas.line([100, 100, 150, 150], type='lines')
+    # don't overlap the line: moved in the batch of r1
+    r2 = canvas.rectangle(pos=(20, 0), size=(10, 10))
+    # overlap the line: must be drawn after it
+    r3 = canvas.rectangle(pos=(120, 120), size=(10, 10))
+    batches = _batches(canvas._update_plan())
+    test(len(batches) == 3)
+    test(batches[0].elements == [r1, r2])
+    test(batches[1].elements == [l1])
+    test(batches[2].elements == [r3])
+
+def unittest_canvas_batch_lookback():
+    import_pymt_window()
+    from pymt.graphics import Canvas
+    canvas = Canvas()
+    r1 = canvas.rectangle(pos=(0, 0), size=(10, 10))
+    # too much batches to skip between r1 and r2
+    for x in xrange(17):
+        canvas.line([100, 100, 150, 150], type=('lines', 'points')[x % 2])
+    r2 = canvas.rectangle(pos=(20, 0), size=(10, 10))
+    batches = _batches(canvas._update_plan())
+    test(len(batches) == 19)
+    test(batches[0].elements == [r1])
+    test(batches[-1].elements == [r2])
+
+def unittest_canvas_batch_update():
+    import_pymt_window()
+    from pymt.graphics import Canvas
+    canvas = Canvas()
+    r1 = canvas.rectangle(pos=(0, 0), size=(10, 10))
+    l1 = canvas.line([100, 100, 150, 150], type='lines')
+    r2 = canvas.rectangle(pos=(20, 0), size=(10, 10))
+    r3 = canvas.rectangle(pos=(40, 0), size=(10, 10))
+    plan = canvas._update_plan()
+    batch = plan[0]
+    mesh = batch.mesh
+
+    # r1 is drawn in order, it can go anywhere: only its part is updated
+    r1.pos = (200, 200)
+    test(canvas._update_plan() is plan)
+    test(batch.mesh is mesh)
+    test(list(mesh.data_v[:8]) == [200, 200, 210, 200, 210, 210, 200, 210])
+
+    # r2 is drawn before l1, it can move as long as it stays in the area
+    # checked when it was merged
+    r2.size = (5, 5)
+    test(canvas._update_plan() is plan)
+    test(list(mesh.data_v[8:16]) == [20, 0, 25, 0, 25, 5, 20, 5])
+
+    # r2 goes over l1: the canvas is merged again
+    r2.pos = (120, 120)
+    plan = canvas._update_plan()
+    test(plan[0] is not batch)
+    batches = _batches(plan)
+    test(batches[0].elements == [r1])
+    test(batches[1].elements == [l1])
+    test(batches[2].elements == [r2, r3])
+
+    # the number of vertex changes: only the batch is rebuilt
+    canvas.color(1, 0, 0, 1)
+    l2 = canvas.line([300, 300, 350, 350], type='lines')
+    l3 = canvas.line([400, 300, 450, 350], type='lines')
+    plan = canvas._update_plan()
+    batch = plan[-1]
+    test(batch.elements == [l2, l3])
+    l2.points = [300, 300, 350, 350, 300, 350, 350, 300]
+    test(canvas._update_plan() is plan)
+    test(batch.mesh.count == 6)
+    test(list(batch.mesh.data_v[8:]) == [400, 300, 450, 350])
@@ -0,0 +1,63 @@
+'''
+HTTP fetcher
+'''
+
+from init import test, import_pymt_no_window
+
+def unittest_httpfetch_revalidate():
+    import_pymt_no_window()
+    import shutil
+    import tempfile
+    import threading
+    from BaseHTTPServer import HTTPServer, BaseHTTPRequestHandler
+    from pymt import DiskCache, HTTPFetcher
+
+    requests = []
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            requests.append(self.path)
+            if self.headers.get('if-none-match') == '"v1"':
+                self.send_response(304)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            body = 'data of %s' % self.path
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('ETag', '"v1"')
+            if self.path == '/fresh':
+                self.send_header('Cache-Control', 'max-age=60')
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *largs):
+            pass
+
+    server = HTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    url = 'http://127.0.0.1:%d' % server.server_port
+    path = tempfile.mkdtemp()
+    fetcher = HTTPFetcher()
+    try:
+        DiskCache.enable(path)
+        test(fetcher.fetch(url + '/a') == 'data of /a')
+        test(fetcher.fetch(url + '/fresh') == 'data of /fresh')
+        # the connection is reused
+        stats = fetcher.get_stats()
+        test(stats['connections'] == 1 and stats['reused'] == 1)
+        # revalidated with the etag, or not requested if fresh
+        test(str(fetcher.fetch(url + '/a')) == 'data of /a')
+        test(str(fetcher.fetch(url + '/fresh')) == 'data of /fresh')
+        test(requests == ['/a', '/fresh', '/a'])
+        stats = fetcher.get_stats()
+        test(stats['revalidated'] == 1 and stats['hits'] == 1)
+    finally:
+        DiskCache.disable()
+        fetcher.close()
+        server.shutdown()
+        shutil.rmtree(path)
@@ -0,0 +1,41 @@
+'''
+Input event queue coalescing
+'''
+
+from init import test, import_pymt_no_window
+
+class _FakeTouch(object):
+    def __init__(self, uid):
+        self.uid = uid
+
+def unittest_inputqueue_latest():
+    import_pymt_no_window()
+    from pymt import TouchEventQueue
+    a, b = _FakeTouch(1), _FakeTouch(2)
+    q = TouchEventQueue()
+    q.append('down', a)
+    q.append('move', a)
+    q.append('move', b)
+    q.append('move', a)
+    test(len(q) == 3)
+    test(list(q.drain()) == [('down', a), ('move', b), ('move', a)])
+    test(len(q) == 0)
+
+def unittest_inputqueue_all():
+    import_pymt_no_window()
+    from pymt import TouchEventQueue
+    a = _FakeTouch(1)
+    q = TouchEventQueue('all')
+    q.append('move', a)
+    q.append('move', a)
+    test(list(q.drain()) == [('move', a), ('move', a)])
+
+def unittest_inputqueue_merge():
+    import_pymt_no_window()
+    from pymt import TouchEventQueue
+    a = _FakeTouch(1)
+    q = TouchEventQueue('merge')
+    q.append('down', a)
+    q.append('move', a)
+    q.append('up', a)
+    test(list(q.drain()) == [('down', a), ('up', a)])
@@ -0,0 +1,98 @@
+'''
+Loader
+'''
+
+from init import test, import_pymt_no_window
+
+def unittest_loader_resource():
+    import_pymt_no_window()
+    import time
+    import threading
+    from pymt import Loader, LoaderResource, getClock
+
+    class TestResource(LoaderResource):
+        name = 'test'
+
+        def load(self, loader, filename, size=1):
+            return [filename * size, threading.currentThread().name]
+
+        def finalize(self, loader, data):
+            return data + [threading.currentThread().name]
+
+    Loader.register_resource(TestResource())
+    proxy = Loader.load('test', 'abc', size=2)
+    test(not proxy.loaded)
+    for i in xrange(100):
+        getClock().tick()
+        if proxy.loaded:
+            break
+        time.sleep(0.01)
+    test(proxy.loaded)
+    main = threading.currentThread().name
+    test(proxy.resource[0] == 'abcabc')
+    test(proxy.resource[2] == main)
+    # the attributes of the resource are available on the proxy
+    test(proxy.index('abcabc') == 0)
+    # the next request use the cache
+    test(Loader.load('test', 'abc', size=2).loaded)
+
+def unittest_loader_upload_order():
+    import_pymt_no_window()
+    from pymt import LoaderBase, LoaderResource, getClock, VirtualTimeSource
+    uploaded = []
+
+    class Sized(object):
+        cache_size = 100
+
+    class OrderResource(LoaderResource):
+        name = 'test.order'
+
+        def load(self, loader, filename):
+            return filename
+
+        def finalize(self, loader, data):
+            uploaded.append(data)
+            return Sized()
+
+    class ManualLoader(LoaderBase):
+        # the requests are loaded by the test, in the main thread
+        def start(self):
+            super(ManualLoader, self).start()
+        def run(self, *largs):
+            pass
+        def stop(self):
+            super(ManualLoader, self).stop()
+
+    LoaderBase.register_resource(OrderResource())
+    loader = ManualLoader()
+    loader.upload_budget = 10
+    # two images per frame
+    loader.upload_budget_bytes = 150
+    priorities = (('a', loader.PRIORITY_NORMAL),
+                  ('b', loader.PRIORITY_PREFETCH),
+                  ('c', loader.PRIORITY_VISIBLE),
+                  ('d', loader.PRIORITY_NORMAL),
+                  ('e', loader.PRIORITY_VISIBLE))
+    proxies = [loader.load('test.order', filename, priority=priority)
+               for filename, priority in priorities]
+    requests = {}
+    with loader._lock:
+        for x in xrange(len(priorities)):
+            request = loader._pop_request()
+            requests[request.filename] = request
+    for filename, priority in priorities:
+        loader._load(requests[filename])
+
+    clock = getClock()
+    source = clock.time_source
+    try:
+        virtual = VirtualTimeSource(start=clock.get_time())
+        clock.time_source = virtual
+        for x in xrange(3):
+            virtual.advance(.1)
+            clock.tick()
+    finally:
+        clock.time_source = source
+    # visible first, then in the order they have been loaded
+    test(uploaded == ['c', 'e', 'a', 'd', 'b'])
+    test(all(proxy.loaded for proxy in proxies))
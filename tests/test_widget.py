@@ -99,3 +99,112 @@ def unittest_coordinate_transform():
     # 100, 100 relative coordinate from child2 is 400, 400 in screen coordinate
     test(child2.to_window(100, 100, relative=True) == (400, 400))
 
+
+def unittest_update_subscription():
+    import_pymt_no_window()
+    from pymt import MTWidget
+
+    class UpdateWidget(MTWidget):
+        def on_update(self):
+            self.updated = True
+            super(UpdateWidget, self).on_update()
+
+    root = MTWidget()
+    idle = MTWidget()
+    root.add_widget(idle)
+    idle.add_widget(MTWidget())
+    test(root._update_count == 0)
+
+    # a widget overriding on_update subscribe his parents
+    w = UpdateWidget()
+    w.updated = False
+    idle.add_widget(w)
+    test(root._update_count == 1)
+    root.dispatch_event('on_update')
+    test(w.updated)
+
+    idle.remove_widget(w)
+    test(root._update_count == 0)
+
+    # explicit subscription and handlers
+    leaf = idle.children[0]
+    leaf.subscribe_update()
+    test(root._update_count == 1)
+    leaf.unsubscribe_update()
+    def on_update():
+        pass
+    leaf.push_handlers(on_update=on_update)
+    test(root._update_count == 1)
+    leaf.remove_handler('on_update', on_update)
+    test(root._update_count == 0)
+
+def unittest_children_snapshot():
+    import_pymt_no_window()
+    from pymt import MTWidget
+    root = MTWidget()
+    a, b = MTWidget(), MTWidget()
+    root.add_widget(a)
+    snapshot = root.children.snapshot()
+    # no copy while the children don't change
+    test(root.children.snapshot() is snapshot)
+    # modify the children during the iteration
+    for w in root.children.snapshot():
+        root.add_widget(b)
+    test(snapshot == (a, ))
+    test(root.children.snapshot() == (a, b))
+
+def unittest_children_assign_list():
+    import_pymt_no_window()
+    from pymt import MTWidget, SafeList
+
+    class RecordWidget(MTWidget):
+        def draw(self):
+            self.drawn = True
+        def on_update(self):
+            self.updated = True
+
+    root = MTWidget()
+    root.add_widget(MTWidget())
+    w = RecordWidget()
+    w.drawn = w.updated = False
+    # a plain list is converted to a SafeList
+    root.children = [w]
+    test(isinstance(root.children, SafeList))
+    test(root.children.snapshot() == (w, ))
+    root.dispatch_event('on_draw')
+    root.dispatch_event('on_update')
+    test(w.drawn)
+    test(w.updated)
+    test(root._update_count == 1)
+    root.children = []
+    test(root._update_count == 0)
+    root.dispatch_event('on_draw')
+    root.dispatch_event('on_update')
+
+def unittest_spatial_index():
+    import_pymt_no_window()
+    from pymt import MTWidget
+
+    class Touch(object):
+        def __init__(self, x, y):
+            self.x, self.y = x, y
+
+    received = []
+    class Child(MTWidget):
+        def on_touch_down(self, touch):
+            received.append(self)
+
+    root = MTWidget(spatial_index=True)
+    a = Child(pos=(0, 0), size=(100, 100))
+    b = Child(pos=(50, 50), size=(100, 100))
+    c = Child(pos=(500, 500), size=(100, 100))
+    root.add_widgets(a, b, c)
+    # only the children under the touch, front first
+    root.dispatch_event('on_touch_down', Touch(75, 75))
+    test(received == [b, a])
+    # the index follow the moves
+    del received[:]
+    c.pos = (60, 60)
+    root.remove_widget(a)
+    root.dispatch_event('on_touch_down', Touch(75, 75))
+    test(received == [c, b])